@@ -8,43 +8,64 @@ import json
 import urllib.request
 import urllib.error
 import socket
-from src import etl_script, eda_script
+from src import etl_script, eda_script, registry, scheduler, providers, replay, bench
 
 def _etl(args):
-    if args.fred_key:
-        import re
-        os.environ["FRED_API_KEY"] = "".join(re.findall(r"[a-z0-9]", args.fred_key.lower()))[:32]
-    elif args.fred_key_file and os.path.exists(args.fred_key_file):
-        with open(args.fred_key_file, "r", encoding="utf-8") as f:
-            for line in f:
-                s = line.strip()
-                if not s:
-                    continue
-                if "=" in s:
-                    s = s.split("=", 1)[1].strip()
-                s = s.strip("'\"")
-                import re
-                s_norm = "".join(re.findall(r"[a-z0-9]", s.lower()))
-                if len(s_norm) >= 32:
-                    os.environ["FRED_API_KEY"] = s_norm[:32]
-                    break
+    providers._set_fred_key(args.fred_key, args.fred_key_file)
+    if args.replay:
+        replay._install("replay", args.replay, args.latency_ms)
+    elif args.record:
+        replay._install("record", args.record)
+    etl_script._configure_cache(args.cache_dir, not args.no_cache, args.refresh)
+    etl_script._configure_resolve(args.resolve_ttl_days, args.re_resolve, args.resolve_miss_ttl_hours)
+    scheduler._configure("fred", args.fred_rpm, max_concurrent=args.max_concurrent)
+    scheduler._configure("tushare", args.tushare_rpm, max_concurrent=args.max_concurrent)
+    reg = registry._load_registry(args.registry)
     start = args.start
     end = args.end or datetime.today().strftime("%Y-%m-%d")
-    dfs = etl_script._extract(start, end)
-    df = etl_script._transform(dfs, args.mode, args.monthly_agg)
-    etl_script._validate(df)
-    etl_script._save(df, args.out)
+    dfs = etl_script._extract(start, end, args.jobs, reg)
+    raw = etl_script._raw_digest(dfs, args.mode, args.monthly_agg, reg, args.partition)
+    if not args.force and etl_script._etl_unchanged(args.out, raw):
+        print(f"源数据未变化，跳过转换与保存，沿用: {args.out}")
+    else:
+        done = False
+        if args.incremental and os.path.exists(args.out):
+            try:
+                etl_script._save_incremental(dfs, args.out, args.mode, args.monthly_agg, reg, args.partition)
+                done = True
+            except Exception as e:
+                print(f"增量更新失败，改为全量重建。原因: {e}")
+        if not done:
+            df = etl_script._transform(dfs, args.mode, args.monthly_agg, reg)
+            report = etl_script._validate(df, reg, etl_script._quality_path(args.out))
+            if report["status"] != "ok":
+                print(f"数据质量告警 {len(report['issues'])} 项，详见 {etl_script._quality_path(args.out)}")
+            etl_script._save(df, args.out, args.partition)
+            etl_script._save_state(dfs, args.out)
+        etl_script._record_etl(args.out, raw)
+    if args.export_csv:
+        etl_script._export_csv(args.out, args.export_csv)
+
+def _print_tasks(status: dict, out_dir: str):
+    for name, st in status.items():
+        outputs = ", ".join(eda_script._TASKS[name]["outputs"])
+        print(f"已生成: {outputs}" if st == "ran" else f"已是最新，跳过: {outputs}")
+    print(f"EDA 完成，输出目录: {out_dir}")
 
 def _eda(args):
-    df = eda_script._load_df(args.inp)
-    desc = eda_script._describe(df)
-    eda_script._save_csv(desc, os.path.join(args.out_dir, "describe.csv"))
-    corr = eda_script._corr(df)
-    eda_script._save_csv(corr, os.path.join(args.out_dir, "correlation.csv"))
-    metrics = eda_script._metrics(df)
-    eda_script._save_json(metrics, os.path.join(args.out_dir, "metrics.json"))
-    kpis = eda_script._kpis(df)
-    eda_script._save_json(kpis, os.path.join(args.out_dir, "kpis.json"))
+    reg = registry._load_registry(args.registry)
+    status = eda_script._run_tasks(args.inp, args.out_dir, reg, args.start, args.end, args.only, args.force, args.jobs)
+    _print_tasks(status, args.out_dir)
+
+def _bench(args):
+    print("开始 ETL 基准测试 …")
+    res = bench._run_bench(args.fixtures, args.modes, args.years, args.end, args.jobs, args.latency_ms,
+                           args.jitter, args.repeat, args.monthly_agg, args.format, registry._load_registry(args.registry))
+    summary = bench._summarize(res)
+    eda_script._save_csv(res.set_index(["mode", "years", "run"]), os.path.join(args.out_dir, "bench_runs.csv"))
+    eda_script._save_csv(summary, os.path.join(args.out_dir, "bench_summary.csv"))
+    print(summary.to_string(float_format=lambda v: f"{v:.4f}"))
+    print(f"基准测试完成，输出目录: {args.out_dir}")
 
 def _dash(args):
     cmd = [sys.executable, "-m", "streamlit", "run", os.path.join("src", "streamlit_app.py")]
@@ -108,21 +129,9 @@ def _run_all(args):
     inp = args.out if os.path.exists(args.out) else os.path.join("output", "master_data.csv")
     print(f"开始执行 EDA … 读取: {inp}")
     try:
-        df = eda_script._load_df(inp)
-        print(f"数据加载完成，行数: {len(df)}")
-        desc = eda_script._describe(df)
-        eda_script._save_csv(desc, os.path.join(args.eda_out_dir, "describe.csv"))
-        print("已生成: describe.csv")
-        corr = eda_script._corr(df)
-        eda_script._save_csv(corr, os.path.join(args.eda_out_dir, "correlation.csv"))
-        print("已生成: correlation.csv")
-        metrics = eda_script._metrics(df)
-        eda_script._save_json(metrics, os.path.join(args.eda_out_dir, "metrics.json"))
-        print("已生成: metrics.json")
-        kpis = eda_script._kpis(df)
-        eda_script._save_json(kpis, os.path.join(args.eda_out_dir, "kpis.json"))
-        print("已生成: kpis.json")
-        print(f"EDA 完成，输出目录: {args.eda_out_dir}")
+        reg = registry._load_registry(args.registry)
+        status = eda_script._run_tasks(inp, args.eda_out_dir, reg, force=args.force, jobs=args.eda_jobs)
+        _print_tasks(status, args.eda_out_dir)
     except Exception as e:
         print(f"EDA 失败，原因: {e}")
     chosen_port = _pick_available_port(args.port)
@@ -144,29 +153,86 @@ def main():
     p_etl = sub.add_parser("etl")
     p_etl.add_argument("--start", default="2000-01-01")
     p_etl.add_argument("--end", default=None)
-    p_etl.add_argument("--mode", choices=["monthly", "daily"], default="monthly")
+    p_etl.add_argument("--mode", choices=["monthly", "daily", "weekly", "quarterly"], default="monthly")
     p_etl.add_argument("--monthly-agg", choices=["last", "mean"], default="last")
     p_etl.add_argument("--out", default=os.path.join("output", "master_data.csv"))
     p_etl.add_argument("--fred-key", default=None)
     p_etl.add_argument("--fred-key-file", default=None)
+    p_etl.add_argument("--jobs", type=int, default=1)
+    p_etl.add_argument("--cache-dir", default=os.path.join("output", "cache"))
+    p_etl.add_argument("--no-cache", action="store_true")
+    p_etl.add_argument("--refresh", action="store_true")
+    p_etl.add_argument("--incremental", action="store_true")
+    p_etl.add_argument("--re-resolve", action="store_true")
+    p_etl.add_argument("--resolve-ttl-days", type=float, default=30)
+    p_etl.add_argument("--resolve-miss-ttl-hours", type=float, default=6)
+    p_etl.add_argument("--export-csv", default=None)
+    p_etl.add_argument("--partition", choices=["year", "month"], default=None)
+    p_etl.add_argument("--registry", default=None)
+    p_etl.add_argument("--fred-rpm", type=float, default=None)
+    p_etl.add_argument("--tushare-rpm", type=float, default=None)
+    p_etl.add_argument("--max-concurrent", type=int, default=None)
+    p_etl.add_argument("--record", default=None)
+    p_etl.add_argument("--replay", default=None)
+    p_etl.add_argument("--latency-ms", type=float, default=0.0)
+    p_etl.add_argument("--force", action="store_true")
     p_etl.set_defaults(func=_etl)
     p_eda = sub.add_parser("eda")
     p_eda.add_argument("--in", dest="inp", default=os.path.join("output", "master_data.csv"))
     p_eda.add_argument("--out-dir", default=os.path.join("output", "eda"))
+    p_eda.add_argument("--registry", default=None)
+    p_eda.add_argument("--start", default=None)
+    p_eda.add_argument("--end", default=None)
+    p_eda.add_argument("--force", action="store_true")
+    p_eda.add_argument("--only", default=None)
+    p_eda.add_argument("--jobs", type=int, default=0)
     p_eda.set_defaults(func=_eda)
+    p_bench = sub.add_parser("bench")
+    p_bench.add_argument("--fixtures", default=None)
+    p_bench.add_argument("--modes", nargs="+", choices=["monthly", "daily", "weekly", "quarterly"], default=["monthly", "daily"])
+    p_bench.add_argument("--years", nargs="+", type=int, default=[5, 10, 20, 40])
+    p_bench.add_argument("--end", default=None)
+    p_bench.add_argument("--monthly-agg", choices=["last", "mean"], default="last")
+    p_bench.add_argument("--jobs", type=int, default=1)
+    p_bench.add_argument("--latency-ms", type=float, default=0.0)
+    p_bench.add_argument("--jitter", type=float, default=0.0)
+    p_bench.add_argument("--repeat", type=int, default=3)
+    p_bench.add_argument("--format", choices=["csv", "parquet", "feather"], default="csv")
+    p_bench.add_argument("--registry", default=None)
+    p_bench.add_argument("--out-dir", default=os.path.join("output", "bench"))
+    p_bench.set_defaults(func=_bench)
     p_dash = sub.add_parser("dash")
     p_dash.add_argument("--port", type=int, default=8501)
     p_dash.set_defaults(func=_dash)
     p_run = sub.add_parser("run-all")
     p_run.add_argument("--start", default="2000-01-01")
     p_run.add_argument("--end", default=None)
-    p_run.add_argument("--mode", choices=["monthly", "daily"], default="monthly")
+    p_run.add_argument("--mode", choices=["monthly", "daily", "weekly", "quarterly"], default="monthly")
     p_run.add_argument("--monthly-agg", choices=["last", "mean"], default="last")
     p_run.add_argument("--out", default=os.path.join("output", "master_data.csv"))
     p_run.add_argument("--fred-key", default=None)
     p_run.add_argument("--fred-key-file", default=None)
+    p_run.add_argument("--jobs", type=int, default=1)
+    p_run.add_argument("--cache-dir", default=os.path.join("output", "cache"))
+    p_run.add_argument("--no-cache", action="store_true")
+    p_run.add_argument("--refresh", action="store_true")
+    p_run.add_argument("--incremental", action="store_true")
+    p_run.add_argument("--re-resolve", action="store_true")
+    p_run.add_argument("--resolve-ttl-days", type=float, default=30)
+    p_run.add_argument("--resolve-miss-ttl-hours", type=float, default=6)
+    p_run.add_argument("--export-csv", default=None)
+    p_run.add_argument("--partition", choices=["year", "month"], default=None)
+    p_run.add_argument("--registry", default=None)
+    p_run.add_argument("--fred-rpm", type=float, default=None)
+    p_run.add_argument("--tushare-rpm", type=float, default=None)
+    p_run.add_argument("--max-concurrent", type=int, default=None)
+    p_run.add_argument("--record", default=None)
+    p_run.add_argument("--replay", default=None)
+    p_run.add_argument("--latency-ms", type=float, default=0.0)
     p_run.add_argument("--eda-out-dir", dest="eda_out_dir", default=os.path.join("output", "eda"))
+    p_run.add_argument("--eda-jobs", type=int, default=0)
     p_run.add_argument("--port", type=int, default=8501)
+    p_run.add_argument("--force", action="store_true")
     p_run.set_defaults(func=_run_all)
     args = p.parse_args()
     args.func(args)
@@ -0,0 +1,72 @@
+import os
+import time
+import shutil
+import logging
+import tempfile
+import pandas as pd
+try:
+    from src import etl_script, registry, replay, scheduler
+except ModuleNotFoundError:
+    import etl_script
+    import registry
+    import replay
+    import scheduler
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    res = fn()
+    return res, time.perf_counter() - t0
+
+def _run_once(start: str, end: str, mode: str, agg: str, jobs: int, reg: dict, out_path: str) -> dict:
+    dfs, t_extract = _timed(lambda: etl_script._extract(start, end, jobs, reg))
+    df, t_transform = _timed(lambda: etl_script._transform(dfs, mode, agg, reg))
+    _, t_validate = _timed(lambda: etl_script._validate(df, reg))
+    _, t_save = _timed(lambda: etl_script._save(df, out_path))
+    return {
+        "rows": len(df),
+        "extract_s": t_extract,
+        "transform_s": t_transform,
+        "validate_s": t_validate,
+        "save_s": t_save,
+    }
+
+def _run_bench(fixtures: str = None, modes: list = None, years: list = None, end: str = None, jobs: int = 1,
+               latency_ms: float = 0.0, jitter: float = 0.0, repeat: int = 3, monthly_agg: str = "last",
+               fmt: str = "csv", reg: dict = None, rpm: float = None) -> pd.DataFrame:
+    reg = reg or registry._load_registry()
+    modes = modes or ["monthly", "daily"]
+    years = sorted(years or [5, 10, 20, 40])
+    end = end or pd.Timestamp.today().strftime("%Y-%m-%d")
+    tmp = tempfile.mkdtemp(prefix="etl_bench_")
+    try:
+        if not fixtures:
+            fixtures = os.path.join(tmp, "fixtures")
+        if not os.path.isdir(fixtures):
+            first = (pd.Timestamp(end) - pd.DateOffset(years=years[-1])).strftime("%Y-%m-%d")
+            logging.info("synthesizing fixtures in %s from %s", fixtures, first)
+            replay._synthesize(fixtures, reg, first, end)
+        replay._install("replay", fixtures, latency_ms, jitter)
+        etl_script._configure_cache(os.path.join(tmp, "cache"), enabled=False)
+        for name in ("fred", "tushare"):
+            scheduler._configure(name, rpm or 1e9, burst=None if rpm else 1_000_000, max_concurrent=max(1, jobs))
+        rows = []
+        for mode in modes:
+            for n in years:
+                start = (pd.Timestamp(end) - pd.DateOffset(years=n)).strftime("%Y-%m-%d")
+                out_path = os.path.join(tmp, f"master_{mode}_{n}.{fmt}")
+                for r in range(repeat):
+                    res = _run_once(start, end, mode, monthly_agg, jobs, reg, out_path)
+                    res.update({"mode": mode, "years": n, "run": r})
+                    rows.append(res)
+                    logging.info("bench mode=%s years=%d run=%d %s", mode, n, r, res)
+        cols = ["mode", "years", "run", "rows", "extract_s", "transform_s", "validate_s", "save_s"]
+        return pd.DataFrame(rows, columns=cols)
+    finally:
+        replay._install("live", None)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def _summarize(results: pd.DataFrame) -> pd.DataFrame:
+    stages = ["extract_s", "transform_s", "validate_s", "save_s"]
+    out = results.groupby(["mode", "years"], sort=False).agg({"rows": "max", **{s: "median" for s in stages}})
+    out["total_s"] = out[stages].sum(axis=1)
+    return out
@@ -0,0 +1,52 @@
+import numpy as np
+
+_CHUNK = 1000
+
+def _block_length(n: int, block: int = 0) -> int:
+    if block and block > 0:
+        return int(min(block, max(n, 1)))
+    return int(max(1, min(n, round(n ** (1 / 3)))))
+
+def _starts(rng, n: int, block: int, reps: int) -> np.ndarray:
+    return rng.integers(0, n - block + 1, size=(reps, -(-n // block)))
+
+def _window_sums(a: np.ndarray, w: int) -> np.ndarray:
+    c = np.zeros((a.shape[0] + 1, a.shape[1]))
+    np.cumsum(a, axis=0, out=c[1:])
+    return c[w:] - c[:-w]
+
+def _replicates(x: np.ndarray, y: np.ndarray, block: int, reps: int, seed) -> np.ndarray:
+    n = len(x)
+    starts = _starts(np.random.default_rng(seed), n, block, reps)
+    tail = n - (starts.shape[1] - 1) * block
+    x, y = x - x.mean(), y - y.mean()
+    cols = np.column_stack([x, y, x * x, y * y, x * y])
+    s = _window_sums(cols, block)[starts[:, :-1]].sum(axis=1) + _window_sums(cols, tail)[starts[:, -1]]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vx = s[:, 2] - s[:, 0] * s[:, 0] / n
+        vy = s[:, 3] - s[:, 1] * s[:, 1] / n
+        cov = s[:, 4] - s[:, 0] * s[:, 1] / n
+        tol = 1e-12 * np.maximum(cols[:, 2:4].sum(axis=0), 1e-300)
+        return np.where((vx > tol[0]) & (vy > tol[1]), np.clip(cov / np.sqrt(vx * vy), -1.0, 1.0), np.nan)
+
+def _corr_ci(pairs: dict, reps: int = 10000, block: int = 0, level: float = 0.95, seed: int = 0, executor=None) -> dict:
+    jobs, out = [], {}
+    for j, (name, (x, y)) in enumerate(pairs.items()):
+        ok = ~(np.isnan(x) | np.isnan(y))
+        x, y = np.asarray(x, dtype=float)[ok], np.asarray(y, dtype=float)[ok]
+        if len(x) < 3 or reps <= 0:
+            out[name] = {"low": None, "high": None, "block": None, "n": int(len(x))}
+            continue
+        b = _block_length(len(x), block)
+        seeds = np.random.SeedSequence([seed, j]).spawn(-(-reps // _CHUNK))
+        sizes = [min(_CHUNK, reps - i * _CHUNK) for i in range(len(seeds))]
+        jobs.append((name, x, y, b, sizes, seeds))
+    calls = [(x, y, b, s, sd) for _, x, y, b, sizes, seeds in jobs for s, sd in zip(sizes, seeds)]
+    results = iter(list((executor.map if executor else map)(_replicates, *zip(*calls))) if calls else [])
+    alpha = (1 - level) / 2
+    for name, x, y, b, sizes, _ in jobs:
+        r = np.concatenate([next(results) for _ in sizes])
+        r = r[~np.isnan(r)]
+        lo, hi = np.quantile(r, [alpha, 1 - alpha]) if len(r) else (np.nan, np.nan)
+        out[name] = {"low": None if np.isnan(lo) else float(lo), "high": None if np.isnan(hi) else float(hi), "block": b, "n": int(len(x))}
+    return {name: out[name] for name in pairs}
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+_METHODS = ("auto", "pelt", "binseg")
+
+def _prefix(cols: np.ndarray) -> np.ndarray:
+    c = np.zeros((cols.shape[0] + 1, cols.shape[1]))
+    np.cumsum(cols, axis=0, out=c[1:])
+    return c
+
+def _linear_cost(p: np.ndarray, s, t) -> np.ndarray:
+    d = p[t] - p[s]
+    n, st, stt, sy, sty, syy = d.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vt = stt - st * st / n
+        cty = sty - st * sy / n
+        fit = np.where(vt > 0, cty * cty / np.where(vt > 0, vt, 1.0), 0.0)
+        return np.maximum(syy - sy * sy / n - fit, 0.0)
+
+def _var_cost(p: np.ndarray, s, t) -> np.ndarray:
+    d = p[t] - p[s]
+    n, sy, syy = d.T
+    v = np.maximum(syy - sy * sy / n, 0.0) / n
+    floor = max(1e-12 * p[-1, 2] / p[-1, 0], 1e-300)
+    return n * np.log(np.maximum(v, floor))
+
+def _pelt(p: np.ndarray, cost, penalty: float, min_size: int) -> list:
+    n = len(p) - 1
+    f = np.full(n + 1, np.inf)
+    f[0] = -penalty
+    last = np.zeros(n + 1, dtype=np.int64)
+    cand = np.array([0], dtype=np.int64)
+    for t in range(min_size, n + 1):
+        ready = cand[cand <= t - min_size]
+        if len(ready) == 0:
+            continue
+        c = cost(p, ready, t)
+        v = f[ready] + c + penalty
+        i = int(np.argmin(v))
+        f[t], last[t] = v[i], ready[i]
+        keep = np.ones(len(cand), dtype=bool)
+        keep[cand <= t - min_size] = f[ready] + c <= f[t]
+        cand = np.append(cand[keep], t)
+    out, t = [], n
+    while t > 0:
+        t = int(last[t])
+        out.append(t)
+    return sorted(out)[1:]
+
+def _binseg(p: np.ndarray, cost, penalty: float, min_size: int) -> list:
+    out, stack = [], [(0, len(p) - 1)]
+    while stack:
+        lo, hi = stack.pop()
+        if hi - lo < 2 * min_size:
+            continue
+        s = np.arange(lo + min_size, hi - min_size + 1)
+        gain = cost(p, lo, hi) - cost(p, lo, s) - cost(p, s, hi)
+        i = int(np.argmax(gain))
+        if gain[i] > penalty:
+            out.append(int(s[i]))
+            stack.extend([(lo, int(s[i])), (int(s[i]), hi)])
+    return sorted(out)
+
+def _search(p: np.ndarray, cost, penalty: float, min_size: int, method: str = "auto", pelt_rows: int = 5000) -> list:
+    if method not in _METHODS:
+        raise RuntimeError(f"unknown change-point method: {method}")
+    if method == "pelt" or (method == "auto" and len(p) - 1 <= pelt_rows):
+        return _pelt(p, cost, penalty, min_size)
+    return _binseg(p, cost, penalty, min_size)
+
+def _periods_per_year(index: pd.DatetimeIndex) -> float:
+    if len(index) < 2:
+        return 1.0
+    days = (index.max() - index.min()) / pd.Timedelta(days=1)
+    return (len(index) - 1) * 365.25 / days if days > 0 else 1.0
+
+def _level_breaks(s: pd.Series, penalty: float, min_size: int, method: str = "auto", pelt_rows: int = 5000) -> list:
+    y = s.to_numpy(dtype=float)
+    n = len(y)
+    if n < 2 * min_size + 1:
+        return []
+    dh = y[min_size:] - y[:-min_size]
+    scale = np.median(np.abs(dh - np.median(dh))) / 0.6745
+    if not np.isfinite(scale) or scale <= 0:
+        scale = np.std(np.diff(y)) * np.sqrt(min_size)
+    if not scale > 0:
+        return []
+    t = np.arange(n, dtype=float)
+    tc, yc = t - t.mean(), y - y.mean()
+    p = _prefix(np.column_stack([np.ones(n), tc, tc * tc, yc, tc * yc, yc * yc]))
+    cps = _search(p, _linear_cost, penalty * 3 * np.log(n) * scale * scale, min_size, method, pelt_rows)
+    bounds = [0] + cps + [n]
+    slopes = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        slopes.append(float(np.polyfit(t[lo:hi], y[lo:hi], 1)[0]) if hi - lo > 1 else 0.0)
+    return [{
+        "date": s.index[c].strftime("%Y-%m-%d"),
+        "value": float(y[c]),
+        "slope_before": slopes[i],
+        "slope_after": slopes[i + 1],
+    } for i, c in enumerate(cps)]
+
+def _vol_breaks(r: pd.Series, penalty: float, min_size: int, method: str = "auto", pelt_rows: int = 5000) -> list:
+    y = r.to_numpy(dtype=float)
+    n = len(y)
+    if n < 2 * min_size + 1:
+        return []
+    yc = y - y.mean()
+    m2 = np.mean(yc * yc)
+    kurt = np.mean(yc ** 4) / (m2 * m2) if m2 > 0 else 3.0
+    p = _prefix(np.column_stack([np.ones(n), yc, yc * yc]))
+    cps = _search(p, _var_cost, penalty * max(1.0, (kurt - 1) / 2) * 2 * np.log(n), min_size, method, pelt_rows)
+    bounds = [0] + cps + [n]
+    vols = [float(np.std(y[lo:hi], ddof=1)) if hi - lo > 1 else 0.0 for lo, hi in zip(bounds[:-1], bounds[1:])]
+    return [{
+        "date": r.index[c].strftime("%Y-%m-%d"),
+        "vol_before": vols[i],
+        "vol_after": vols[i + 1],
+    } for i, c in enumerate(cps)]
@@ -2,64 +2,268 @@ import os
 import argparse
 import logging
 import json
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
 import pandas as pd
+try:
+    from src import bootstrap, changepoint, fingerprint, forecast, granger, moments, prefix, registry, scenario, storage
+except ModuleNotFoundError:
+    import bootstrap
+    import changepoint
+    import fingerprint
+    import forecast
+    import granger
+    import moments
+    import prefix
+    import registry
+    import scenario
+    import storage
 
 def _parse_args():
     p = argparse.ArgumentParser()
     p.add_argument("--in", dest="inp", default=os.path.join("output", "master_data.csv"))
     p.add_argument("--out-dir", default=os.path.join("output", "eda"))
+    p.add_argument("--registry", default=None)
+    p.add_argument("--start", default=None)
+    p.add_argument("--end", default=None)
+    p.add_argument("--force", action="store_true")
+    p.add_argument("--only", default=None)
+    p.add_argument("--jobs", type=int, default=0)
     return p.parse_args()
 
 def _init_logger():
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
-def _load_df(path: str) -> pd.DataFrame:
-    df = pd.read_csv(path)
-    df["Date"] = pd.to_datetime(df["Date"]) 
-    df = df.sort_values("Date").set_index("Date")
-    return df
+def _load_df(path: str, columns: list = None, start=None, end=None) -> pd.DataFrame:
+    return storage._load(path, columns, start, end)
 
-def _save_csv(df: pd.DataFrame, path: str):
+def _eda_digest(inp: str, start=None, end=None) -> str:
+    return fingerprint._digest(fingerprint._path_digest(inp), start, end)
+
+def _save_csv(df: pd.DataFrame, path: str, float_format: str = None):
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    df.to_csv(path)
+    df.to_csv(path, float_format=float_format)
 
 def _save_json(obj: dict, path: str):
     os.makedirs(os.path.dirname(path), exist_ok=True)
     with open(path, "w", encoding="utf-8") as f:
         json.dump(obj, f, ensure_ascii=False, indent=2)
 
-def _describe(df: pd.DataFrame) -> pd.DataFrame:
-    return df.describe()
+def _moments(df: pd.DataFrame, out_dir: str, force: bool = False, reg: dict = None) -> dict:
+    reg = reg or registry._load_registry()
+    return moments._update(df, os.path.join(out_dir, "moments.npz"), force, reg["quantiles"])
+
+def _describe(df: pd.DataFrame, state: dict = None) -> pd.DataFrame:
+    return moments._describe(state) if state else df.describe()
 
-def _corr(df: pd.DataFrame) -> pd.DataFrame:
-    return df.corr(numeric_only=True)
+def _corr(df: pd.DataFrame, state: dict = None) -> pd.DataFrame:
+    return moments._corr(state) if state else df.corr(numeric_only=True)
 
-def _metrics(df: pd.DataFrame) -> dict:
-    interest_spread = df["US_Interest_Rate"] - df["CN_LPR"]
-    inflation_spread = df["US_CPI"] - df["CN_CPI"]
+def _metrics(df: pd.DataFrame, reg: dict = None, jobs: int = 1) -> dict:
+    reg = reg or registry._load_registry()
+    specs = registry._by_name(reg)
+    df = registry._add_derived(reg, df.copy())
+    target = df[reg["target"]]
+    alias = reg["alias"]
     m = {}
-    m["volatility_usd_cny"] = float(df["USD_CNY_Rate"].std())
-    m["interest_spread_mean"] = float(interest_spread.mean())
-    m["inflation_spread_mean"] = float(inflation_spread.mean())
-    m["corr_usd_cny_gold"] = float(df["USD_CNY_Rate"].corr(df["Gold_Price"]))
-    m["corr_usd_cny_interest_spread"] = float(df["USD_CNY_Rate"].corr(interest_spread))
-    m["corr_usd_cny_sp500"] = float(df["USD_CNY_Rate"].corr(df["SP500_Close"]))
-    m["corr_usd_cny_cn_stock"] = float(df["USD_CNY_Rate"].corr(df["CN_Stock_Price"]))
-    m["skew_usd_cny"] = float(df["USD_CNY_Rate"].skew())
+    m[f"volatility_{alias}"] = float(target.std())
+    for name in reg["spread_means"]:
+        m[f"{specs[name]['alias']}_mean"] = float(df[name].mean())
+    for name in reg["correlations"]:
+        m[f"corr_{alias}_{specs[name]['alias']}"] = float(target.corr(df[name]))
+    m[f"skew_{alias}"] = float(target.skew())
+    bs = reg["bootstrap"]
+    pairs = {name: (target.to_numpy(dtype=float), df[name].to_numpy(dtype=float)) for name in reg["correlations"]}
+    workers = jobs or os.cpu_count() or 1
+    if workers > 1 and bs["replicates"] * len(df) * len(pairs) > 1 << 27:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            cis = bootstrap._corr_ci(pairs, bs["replicates"], bs["block"], bs["level"], bs["seed"], ex)
+    else:
+        cis = bootstrap._corr_ci(pairs, bs["replicates"], bs["block"], bs["level"], bs["seed"])
+    for name, ci in cis.items():
+        key = f"corr_{alias}_{specs[name]['alias']}"
+        m[f"{key}_ci_low"] = ci["low"]
+        m[f"{key}_ci_high"] = ci["high"]
+    m["bootstrap"] = {"replicates": bs["replicates"], "level": bs["level"], "seed": bs["seed"], "block": {specs[name]["alias"]: ci["block"] for name, ci in cis.items()}}
     return m
 
-def _kpis(df: pd.DataFrame) -> dict:
-    fields = [
-        "USD_CNY_Rate",
-        "US_Interest_Rate",
-        "CN_LPR",
-        "Gold_Price",
-        "SP500_Close",
-        "CN_M2",
-        "US_CPI",
-        "CN_CPI",
-        "CN_Stock_Price",
-    ]
+def _prefix_index(df: pd.DataFrame, inp: str, out_dir: str, reg: dict = None, start=None, end=None):
+    reg = reg or registry._load_registry()
+    stamp = fingerprint._stat_digest(inp)
+    if start or end:
+        stamp = fingerprint._digest(stamp, start, end)
+    df = registry._add_derived(reg, df.copy(), registry._dashboard_cols(reg))
+    prefix._write(prefix._build(df, stamp, reg["quantiles"]), os.path.join(out_dir, "prefix_index.npz"))
+
+def _changes(df: pd.DataFrame) -> pd.DataFrame:
+    positive = ((df > 0) | df.isna()).all()
+    out = df.diff()
+    out.loc[:, positive] = df.loc[:, positive].pct_change(fill_method=None)
+    return out
+
+def _window_sums(a: np.ndarray, w: int) -> np.ndarray:
+    c = np.zeros((a.shape[0] + 1,) + a.shape[1:])
+    np.cumsum(a, axis=0, out=c[1:])
+    out = np.full(a.shape, np.nan)
+    if w <= a.shape[0]:
+        out[w - 1:] = c[w:] - c[:-w]
+    return out
+
+def _rolling(df: pd.DataFrame, reg: dict = None) -> pd.DataFrame:
+    reg = reg or registry._load_registry()
+    target = reg["target"]
+    df = registry._add_derived(reg, df.copy(), registry._dashboard_cols(reg))
+    drivers = [c for c in registry._dashboard_cols(reg) if c in df.columns and c != target]
+    ch = _changes(df[[target] + drivers]).to_numpy(dtype=float)
+    valid = ~np.isnan(ch)
+    ch = np.where(valid, ch - np.nanmean(np.where(valid, ch, np.nan), axis=0), 0.0)
+    x, y = ch[:, :1], ch[:, 1:]
+    pair = valid[:, :1] & valid[:, 1:]
+    tol = 1e-12 * np.maximum((ch * ch).sum(axis=0), 1e-300)
+    out = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for w in reg["rolling_windows"]:
+            full = _window_sums(valid[:, 0].astype(float), w) >= w
+            sx = _window_sums(x[:, 0], w)
+            vx = _window_sums(x[:, 0] * x[:, 0], w) - sx * sx / w
+            vx = np.where(vx > tol[0], vx, 0.0)
+            out[f"vol_{w}"] = np.where(full & (w > 1), np.sqrt(vx / max(w - 1, 1)), np.nan)
+            full = _window_sums(pair.astype(float), w) >= w
+            xp = np.where(pair, x, 0.0)
+            sx = _window_sums(xp, w)
+            sy = _window_sums(y, w)
+            cxy = _window_sums(xp * y, w) - sx * sy / w
+            vx = _window_sums(xp * xp, w) - sx * sx / w
+            vy = _window_sums(y * y, w) - sy * sy / w
+            vx = np.where(vx > tol[0], vx, 0.0)
+            vy = np.where(vy > tol[1:], vy, 0.0)
+            corr = np.where(full & (vx > 0) & (vy > 0), cxy / np.sqrt(vx * vy), np.nan)
+            beta = np.where(full & (vy > 0), cxy / vy, np.nan)
+            for j, name in enumerate(drivers):
+                out[f"corr_{w}_{name}"] = np.clip(corr[:, j], -1.0, 1.0)
+                out[f"beta_{w}_{name}"] = beta[:, j]
+    res = pd.DataFrame(out, index=df.index)
+    return res.dropna(how="all")
+
+def _xcorr(fa: np.ndarray, fb: np.ndarray, nfft: int, max_lag: int) -> np.ndarray:
+    c = np.fft.irfft(fa * np.conj(fb), nfft, axis=0)
+    return np.concatenate([c[nfft - max_lag:], c[:max_lag + 1]])
+
+def _ccf(a: np.ndarray, max_lag: int, min_periods: int = 3) -> tuple:
+    valid = ~np.isnan(a)
+    a = np.where(valid, a - np.nanmean(np.where(valid, a, np.nan), axis=0), 0.0)
+    n = len(a)
+    max_lag = max(min(max_lag, n - 1), 0)
+    nfft = 1 << max(int(np.ceil(np.log2(max(2 * n, 2)))), 1)
+    m = np.fft.rfft(valid.astype(float), nfft, axis=0)
+    x = np.fft.rfft(a, nfft, axis=0)
+    xx = np.fft.rfft(a * a, nfft, axis=0)
+    t = slice(0, 1)
+    cnt = np.rint(_xcorr(m[:, t], m, nfft, max_lag))
+    sx = _xcorr(x[:, t], m, nfft, max_lag)
+    sy = _xcorr(m[:, t], x, nfft, max_lag)
+    sxx = _xcorr(xx[:, t], m, nfft, max_lag)
+    syy = _xcorr(m[:, t], xx, nfft, max_lag)
+    sxy = _xcorr(x[:, t], x, nfft, max_lag)
+    tol = 1e-12 * np.maximum((a * a).sum(axis=0), 1e-300)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vx = sxx - sx * sx / cnt
+        vy = syy - sy * sy / cnt
+        cov = sxy - sx * sy / cnt
+        vx = np.where(vx > tol[0], vx, 0.0)
+        vy = np.where(vy > tol, vy, 0.0)
+        r = np.where((cnt >= min_periods) & (vx > 0) & (vy > 0), cov / np.sqrt(vx * vy), np.nan)
+    return np.clip(r[:, 1:], -1.0, 1.0), cnt[:, 1:].astype(int)
+
+def _leadlag(df: pd.DataFrame, reg: dict = None) -> dict:
+    reg = reg or registry._load_registry()
+    target = reg["target"]
+    df = registry._add_derived(reg, df.copy(), registry._dashboard_cols(reg))
+    drivers = [c for c in registry._dashboard_cols(reg) if c in df.columns and c != target]
+    max_lag = reg["leadlag_max_lag"]
+    out = {"target": target, "max_lag": max_lag, "lags": [], "bases": {}}
+    frames = {"levels": df[[target] + drivers].astype(float), "returns": _changes(df[[target] + drivers])}
+    for basis, frame in frames.items():
+        r, cnt = _ccf(frame.to_numpy(dtype=float, na_value=np.nan), max_lag)
+        m = (len(r) - 1) // 2
+        lags = list(range(-m, m + 1))
+        out["lags"] = lags
+        items = {}
+        for j, name in enumerate(drivers):
+            col = r[:, j]
+            item = {"corr": [None if np.isnan(v) else round(float(v), 6) for v in col], "n": [int(v) for v in cnt[:, j]]}
+            if np.isnan(col).all():
+                item.update({"peak_lag": None, "peak_corr": None, "corr_0": None})
+            else:
+                best = np.nanmax(np.abs(col))
+                i = min(np.flatnonzero(np.abs(col) == best), key=lambda k: (abs(lags[k]), lags[k]))
+                item.update({"peak_lag": lags[i], "peak_corr": float(col[i]), "corr_0": None if np.isnan(col[m]) else float(col[m])})
+            items[name] = item
+        out["bases"][basis] = items
+    return out
+
+def _granger(df: pd.DataFrame, out_dir: str, reg: dict = None, force: bool = False, jobs: int = 0) -> dict:
+    reg = reg or registry._load_registry()
+    target = reg["target"]
+    df = registry._add_derived(reg, df.copy(), registry._dashboard_cols(reg))
+    drivers = [c for c in registry._dashboard_cols(reg) if c in df.columns and c != target]
+    ch = _changes(df[[target] + drivers])
+    cache_path = os.path.join(out_dir, "granger_cache.json")
+    workers = jobs or min(len(drivers), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            run = granger._run(ch, target, drivers, reg["granger_max_lag"], cache_path, force, ex)
+    else:
+        run = granger._run(ch, target, drivers, reg["granger_max_lag"], cache_path, force)
+    logging.info("granger refit=%d cached=%d", len(run["refit"]), len(drivers) - len(run["refit"]))
+    pairs = {d: {"nobs": f["nobs"], "selected_lag": f["selected_lag"], "lags": {p: {k: v for k, v in r.items() if k != "params"} for p, r in f["lags"].items()}} for d, f in run["fits"].items()}
+    return {"target": target, "basis": "changes", "max_lag": reg["granger_max_lag"], "ranking": granger._ranking(run["fits"]), "pairs": pairs}
+
+def _breakpoints(df: pd.DataFrame, reg: dict = None) -> dict:
+    reg = reg or registry._load_registry()
+    target = reg["target"]
+    cfg = reg["changepoints"]
+    s = df[target].dropna()
+    min_size = max(2, int(round(changepoint._periods_per_year(s.index) * cfg["min_years"])))
+    r = _changes(s.to_frame())[target].dropna()
+    return {
+        "target": target,
+        "method": cfg["method"] if cfg["method"] != "auto" else ("pelt" if len(s) <= cfg["pelt_rows"] else "binseg"),
+        "penalty": cfg["penalty"],
+        "min_size": min_size,
+        "levels": changepoint._level_breaks(s, cfg["penalty"], min_size, cfg["method"], cfg["pelt_rows"]),
+        "volatility": changepoint._vol_breaks(r, cfg["penalty"], min_size, cfg["method"], cfg["pelt_rows"]),
+    }
+
+def _forecast(df: pd.DataFrame, out_dir: str, reg: dict = None, force: bool = False, jobs: int = 0) -> dict:
+    reg = reg or registry._load_registry()
+    cfg = reg["forecast"]
+    df = registry._add_derived(reg, df.copy(), cfg["series"])
+    state_path = os.path.join(out_dir, "forecast_state.json")
+    state = {} if force else fingerprint._read(state_path).get("models", {})
+    workers = jobs or min(len(cfg["series"]) * len(cfg["models"]), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            out, state = forecast._run(df, cfg, state, ex)
+    else:
+        out, state = forecast._run(df, cfg, state)
+    fingerprint._write(state_path, {"version": forecast._VERSION, "models": state})
+    modes = [m["fit"] for s in out.values() for m in s["models"].values()]
+    logging.info("forecast %s", ", ".join(f"{k}={modes.count(k)}" for k in ("cached", "filter", "warm", "cold")))
+    return {"horizon": cfg["horizon"], "level": cfg["level"], "series": out}
+
+def _scenario(df: pd.DataFrame, reg: dict = None) -> dict:
+    reg = reg or registry._load_registry()
+    cfg = reg["scenarios"]
+    df = registry._add_derived(reg, df.copy(), cfg["factors"])
+    cal = scenario._calibrate(df, reg["target"], cfg["factors"])
+    horizon = scenario._horizon(df[reg["target"]].dropna().index, cfg["horizon_years"])
+    base = scenario._simulate(cal, None, horizon, cfg["paths"], cfg["seed"])
+    return dict(cal, horizon=horizon, paths=cfg["paths"], seed=cfg["seed"], baseline=scenario._summary(base, cal["last_value"]))
+
+def _kpis(df: pd.DataFrame, reg: dict = None) -> dict:
+    reg = reg or registry._load_registry()
+    fields = [f for f in reg["kpi_fields"] if f in df.columns]
     last_date = df.index.max()
     mom = df[fields].pct_change(periods=1)
     qoq = df[fields].pct_change(periods=3)
@@ -75,25 +279,137 @@ def _kpis(df: pd.DataFrame) -> dict:
         }
     return out
 
+def _task_moments(df: pd.DataFrame, reg: dict, ctx: dict):
+    state = _moments(df, ctx["out_dir"], ctx["force"], reg)
+    logging.info("updated moments fresh_rows=%d", state["fresh_rows"])
+
+def _task_describe(df: pd.DataFrame, reg: dict, ctx: dict):
+    state = moments._load(os.path.join(ctx["out_dir"], "moments.npz"))
+    _save_csv(_describe(df, state), os.path.join(ctx["out_dir"], "describe.csv"))
+
+def _task_correlation(df: pd.DataFrame, reg: dict, ctx: dict):
+    state = moments._load(os.path.join(ctx["out_dir"], "moments.npz"))
+    _save_csv(_corr(df, state), os.path.join(ctx["out_dir"], "correlation.csv"))
+
+def _task_metrics(df: pd.DataFrame, reg: dict, ctx: dict):
+    _save_json(_metrics(df, reg, ctx["jobs"]), os.path.join(ctx["out_dir"], "metrics.json"))
+
+def _task_kpis(df: pd.DataFrame, reg: dict, ctx: dict):
+    _save_json(_kpis(df, reg), os.path.join(ctx["out_dir"], "kpis.json"))
+
+def _task_rolling(df: pd.DataFrame, reg: dict, ctx: dict):
+    _save_csv(_rolling(df, reg), os.path.join(ctx["out_dir"], "rolling.csv"), "%.6g")
+
+def _task_leadlag(df: pd.DataFrame, reg: dict, ctx: dict):
+    _save_json(_leadlag(df, reg), os.path.join(ctx["out_dir"], "leadlag.json"))
+
+def _task_granger(df: pd.DataFrame, reg: dict, ctx: dict):
+    _save_json(_granger(df, ctx["out_dir"], reg, ctx["force"], ctx["jobs"]), os.path.join(ctx["out_dir"], "granger.json"))
+
+def _task_breakpoints(df: pd.DataFrame, reg: dict, ctx: dict):
+    _save_json(_breakpoints(df, reg), os.path.join(ctx["out_dir"], "breakpoints.json"))
+
+def _task_forecast(df: pd.DataFrame, reg: dict, ctx: dict):
+    _save_json(_forecast(df, ctx["out_dir"], reg, ctx["force"], ctx["jobs"]), os.path.join(ctx["out_dir"], "forecast.json"))
+
+def _task_scenario(df: pd.DataFrame, reg: dict, ctx: dict):
+    _save_json(_scenario(df, reg), os.path.join(ctx["out_dir"], "scenario.json"))
+
+def _task_prefix_index(df: pd.DataFrame, reg: dict, ctx: dict):
+    _prefix_index(df, ctx["inp"], ctx["out_dir"], reg, ctx["start"], ctx["end"])
+
+_TASKS = {
+    "moments": {"fn": _task_moments, "outputs": ("moments.npz",), "inputs": ("data", "registry"), "deps": (), "version": "2"},
+    "describe": {"fn": _task_describe, "outputs": ("describe.csv",), "inputs": (), "deps": ("moments",), "version": "1"},
+    "correlation": {"fn": _task_correlation, "outputs": ("correlation.csv",), "inputs": (), "deps": ("moments",), "version": "1"},
+    "metrics": {"fn": _task_metrics, "outputs": ("metrics.json",), "inputs": ("data", "registry"), "deps": (), "version": "2"},
+    "kpis": {"fn": _task_kpis, "outputs": ("kpis.json",), "inputs": ("data", "registry"), "deps": (), "version": "1"},
+    "rolling": {"fn": _task_rolling, "outputs": ("rolling.csv",), "inputs": ("data", "registry"), "deps": (), "version": "2"},
+    "leadlag": {"fn": _task_leadlag, "outputs": ("leadlag.json",), "inputs": ("data", "registry"), "deps": (), "version": "2"},
+    "granger": {"fn": _task_granger, "outputs": ("granger.json",), "inputs": ("data", "registry"), "deps": (), "version": "2"},
+    "breakpoints": {"fn": _task_breakpoints, "outputs": ("breakpoints.json",), "inputs": ("data", "registry"), "deps": (), "version": "2"},
+    "forecast": {"fn": _task_forecast, "outputs": ("forecast.json",), "inputs": ("data", "registry"), "deps": (), "version": "1"},
+    "scenario": {"fn": _task_scenario, "outputs": ("scenario.json",), "inputs": ("data", "registry"), "deps": (), "version": "1"},
+    "prefix_index": {"fn": _task_prefix_index, "outputs": ("prefix_index.npz",), "inputs": ("data", "stat", "registry"), "deps": (), "version": "3"},
+}
+
+def _select(only=None) -> list:
+    if not only:
+        return list(_TASKS)
+    wanted = [n.strip() for n in only.split(",") if n.strip()] if isinstance(only, str) else list(only)
+    unknown = [n for n in wanted if n not in _TASKS]
+    if unknown:
+        raise RuntimeError(f"unknown EDA task: {', '.join(unknown)}; choose from {', '.join(_TASKS)}")
+    todo = set()
+    stack = list(wanted)
+    while stack:
+        n = stack.pop()
+        if n not in todo:
+            todo.add(n)
+            stack.extend(_TASKS[n]["deps"])
+    return [n for n in _TASKS if n in todo]
+
+def _budget(jobs: int, tasks: int) -> tuple:
+    total = jobs or os.cpu_count() or 1
+    outer = max(1, min(tasks, total))
+    return outer, max(1, total // outer)
+
+def _run_task(name: str, df: pd.DataFrame, reg: dict, ctx: dict) -> str:
+    _TASKS[name]["fn"](df, reg, ctx)
+    return name
+
+def _run_tasks(inp: str, out_dir: str, reg: dict, start=None, end=None, only=None, force: bool = False, jobs: int = 0) -> dict:
+    names = _select(only)
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    done_before = fingerprint._read(manifest_path).get("tasks", {})
+    sources = {"data": _eda_digest(inp, start, end), "stat": fingerprint._stat_digest(inp), "registry": fingerprint._file_digest(reg["path"])}
+    keys, stale = {}, []
+    for n in names:
+        t = _TASKS[n]
+        keys[n] = fingerprint._digest(n, t["version"], [sources[i] for i in t["inputs"]], [keys[d] for d in t["deps"]])
+        missing = not all(os.path.exists(os.path.join(out_dir, o)) for o in t["outputs"])
+        if force or missing or done_before.get(n, {}).get("key") != keys[n] or any(d in stale for d in t["deps"]):
+            stale.append(n)
+    status = {n: "fresh" for n in names if n not in stale}
+    if not stale:
+        return status
+    logging.info("loading %s", inp)
+    df = _load_df(inp, start=start, end=end)
+    workers, inner = _budget(jobs, len(stale))
+    ctx = {"inp": inp, "out_dir": out_dir, "start": start, "end": end, "force": force, "jobs": inner}
+    tasks = dict(done_before)
+    def record(n):
+        tasks[n] = {"key": keys[n], "version": _TASKS[n]["version"], "outputs": list(_TASKS[n]["outputs"])}
+        fingerprint._write(manifest_path, {"tasks": tasks})
+        status[n] = "ran"
+    if workers <= 1:
+        for n in stale:
+            logging.info("running %s", n)
+            _run_task(n, df, reg, ctx)
+            record(n)
+        return status
+    pending, running = list(stale), {}
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        while pending or running:
+            for n in [n for n in pending if all(status.get(d) for d in _TASKS[n]["deps"])]:
+                logging.info("running %s", n)
+                running[ex.submit(_run_task, n, df, reg, ctx)] = n
+                pending.remove(n)
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for f in finished:
+                n = running.pop(f)
+                f.result()
+                record(n)
+    return status
+
 def main():
     args = _parse_args()
     _init_logger()
-    logging.info("loading %s", args.inp)
-    df = _load_df(args.inp)
-    logging.info("computing describe")
-    desc = _describe(df)
-    _save_csv(desc, os.path.join(args.out_dir, "describe.csv"))
-    logging.info("computing correlation")
-    corr = _corr(df)
-    _save_csv(corr, os.path.join(args.out_dir, "correlation.csv"))
-    logging.info("computing metrics")
-    metrics = _metrics(df)
-    _save_json(metrics, os.path.join(args.out_dir, "metrics.json"))
-    logging.info("computing kpis")
-    kpis = _kpis(df)
-    _save_json(kpis, os.path.join(args.out_dir, "kpis.json"))
-    logging.info("saved outputs to %s", args.out_dir)
+    reg = registry._load_registry(args.registry)
+    status = _run_tasks(args.inp, args.out_dir, reg, args.start, args.end, args.only, args.force, args.jobs)
+    for n, st in status.items():
+        logging.info("%s: %s", n, st)
+    logging.info("outputs in %s", args.out_dir)
 
 if __name__ == "__main__":
     main()
-
@@ -3,332 +3,575 @@ import re
 import argparse
 import logging
 import time
-from datetime import datetime
+import threading
+import json
+import io
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 from fredapi import Fred
-os.environ["YF_USE_CURL_CFFI"] = "0"
-import tushare as ts
+try:
+    from src import fingerprint, providers, quality, registry, scheduler, storage
+except ModuleNotFoundError:
+    import fingerprint
+    import providers
+    import quality
+    import registry
+    import scheduler
+    import storage
+
+_CACHE = {"dir": os.path.join("output", "cache"), "enabled": True, "refresh": False}
+_RESOLVE = {"ttl_days": 30, "miss_ttl_hours": 6, "force": False, "map": None}
+_RESOLVE_LOCK = threading.Lock()
+_MODES = {"weekly": ("W-FRI", "W-FRI"), "monthly": ("ME", "M"), "quarterly": ("QE", "Q")}
+_CACHE_DEFAULT_POLICY = (24, 90)
+_TS_ROW_CAP = {"index_daily": 8000, "fut_daily": 2000, "daily": 6000}
+_TS_DEFAULT_ROW_CAP = 2000
+_TS_ROWS_PER_DAY = 5 / 7
 
 def _parse_args():
     p = argparse.ArgumentParser()
     p.add_argument("--start", default="2000-01-01")
     p.add_argument("--end", default=None)
-    p.add_argument("--mode", choices=["monthly", "daily"], default="monthly")
+    p.add_argument("--mode", choices=["monthly", "daily", "weekly", "quarterly"], default="monthly")
     p.add_argument("--monthly-agg", choices=["last", "mean"], default="last")
     p.add_argument("--out", default=os.path.join("output", "master_data.csv"))
     p.add_argument("--fred-key", default=None)
     p.add_argument("--fred-key-file", default=None)
+    p.add_argument("--jobs", type=int, default=1)
+    p.add_argument("--cache-dir", default=os.path.join("output", "cache"))
+    p.add_argument("--no-cache", action="store_true")
+    p.add_argument("--refresh", action="store_true")
+    p.add_argument("--incremental", action="store_true")
+    p.add_argument("--re-resolve", action="store_true")
+    p.add_argument("--resolve-ttl-days", type=float, default=30)
+    p.add_argument("--resolve-miss-ttl-hours", type=float, default=6)
+    p.add_argument("--export-csv", default=None)
+    p.add_argument("--partition", choices=["year", "month"], default=None)
+    p.add_argument("--registry", default=None)
+    p.add_argument("--fred-rpm", type=float, default=None)
+    p.add_argument("--tushare-rpm", type=float, default=None)
+    p.add_argument("--max-concurrent", type=int, default=None)
+    p.add_argument("--record", default=None)
+    p.add_argument("--replay", default=None)
+    p.add_argument("--latency-ms", type=float, default=0.0)
+    p.add_argument("--force", action="store_true")
     return p.parse_args()
 
 def _init_logger():
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
-def _get_env_value(name: str) -> str:
-    v = os.getenv(name)
-    if v:
-        return v.strip().strip("'\"")
-    env_paths = [
-        os.path.join(os.getcwd(), ".env"),
-        os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, ".env")),
-    ]
-    for pth in env_paths:
-        if os.path.exists(pth):
-            with open(pth, "r", encoding="utf-8") as f:
-                for line in f:
-                    s = line.strip()
-                    if not s or s.startswith("#"):
-                        continue
-                    if "=" in s:
-                        k, val = s.split("=", 1)
-                        k_norm = re.sub(r"[^A-Za-z_]", "", k).upper()
-                        if k_norm == name.upper():
-                            return val.strip().strip("'\"")
-    return ""
-
 def _fred_client():
-    key = os.getenv("FRED_API_KEY")
-    if not key:
-        env_paths = [
-            os.path.join(os.getcwd(), ".env"),
-            os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, ".env")),
-        ]
-        for pth in env_paths:
-            if not key and os.path.exists(pth):
-                logging.info("reading .env %s", pth)
-                with open(pth, "r", encoding="utf-8") as f:
-                    for line in f:
-                        s = line.strip()
-                        if not s or s.startswith("#"):
-                            continue
-                        s_raw = line
-                        if not key and "fred_api_key" in s_raw.lower():
-                            part = s_raw
-                            if "=" in part:
-                                part = part.split("=", 1)[1]
-                            v_norm2 = "".join(re.findall(r"[a-z0-9]", part.lower()))
-                            if len(v_norm2) >= 32:
-                                key = v_norm2[:32]
-                                logging.info("loaded key from .env direct")
-                                break
-                        if "=" in s:
-                            k, v = s.split("=", 1)
-                            k_norm = re.sub(r"[^a-z]", "", k.lower())
-                            v_norm = "".join(re.findall(r"[a-z0-9]", v.lower()))
-                            logging.info("env key line k=%s len(v)=%d", k_norm, len(v_norm))
-                            if k_norm == "fredapikey" and len(v_norm) >= 32:
-                                key = v_norm[:32]
-                                logging.info("loaded key from .env")
-                                break
-        candidates = []
-        env_path = os.getenv("FRED_API_KEY_FILE")
-        if env_path:
-            candidates.append(env_path)
-        candidates.append(os.path.join("secrets", "fred_api_key.txt"))
-        candidates.append(os.path.join(os.getcwd(), "fred_api_key.txt"))
-        script_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
-        candidates.append(os.path.join(script_root, "fred_api_key.txt"))
-        for key_file in candidates:
-            if not key and os.path.exists(key_file):
-                logging.info("reading key file %s", key_file)
-                with open(key_file, "r", encoding="utf-8") as f:
-                    for line in f:
-                        s = line.strip()
-                        if not s:
-                            continue
-                        if "=" in s:
-                            s = s.split("=", 1)[1].strip()
-                        s = s.strip("'\"")
-                        s_norm = "".join(re.findall(r"[a-z0-9]", s.lower()))
-                        if len(s_norm) >= 32:
-                            key = s_norm[:32]
-                            logging.info("loaded key from file")
-                            break
-    if not key:
-        raise RuntimeError("FRED_API_KEY not set")
-    return Fred(api_key=key)
-
-def _fred_series(fred: Fred, series_id: str, start: str, end: str) -> pd.DataFrame:
-    s = fred.get_series(series_id, observation_start=start, observation_end=end)
+    return providers._get("fred")
+
+def _configure_cache(cache_dir: str, enabled: bool = True, refresh: bool = False):
+    _CACHE["dir"] = cache_dir
+    _CACHE["enabled"] = enabled
+    _CACHE["refresh"] = refresh
+    _RESOLVE["map"] = None
+
+def _cache_paths(key: str):
+    name = re.sub(r"[^A-Za-z0-9_.-]", "_", key)
+    base = os.path.join(_CACHE["dir"], "raw")
+    return os.path.join(base, name + ".csv"), os.path.join(base, name + ".json")
+
+def _cache_read(key: str):
+    data_path, meta_path = _cache_paths(key)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None, None
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        df = pd.read_csv(data_path, index_col=0, float_precision="round_trip")
+        df.index = pd.to_datetime(df.index)
+    except Exception as e:
+        logging.warning("cache read failed key=%s: %s", key, e)
+        return None, None
+    return df, meta
+
+def _cache_write(key: str, df: pd.DataFrame, meta: dict):
+    data_path, meta_path = _cache_paths(key)
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    df.to_csv(data_path + ".tmp", index_label="date")
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(data_path + ".tmp", data_path)
+    os.replace(meta_path + ".tmp", meta_path)
+
+def _cached_fetch(key: str, start: str, end: str, fetch, policy: tuple = None) -> pd.DataFrame:
+    if not _CACHE["enabled"]:
+        return fetch(start, end)
+    start = pd.to_datetime(start).strftime("%Y-%m-%d")
+    end = pd.to_datetime(end).strftime("%Y-%m-%d")
+    ttl_hours, revision_days = policy or _CACHE_DEFAULT_POLICY
+    now = datetime.now()
+    df, meta = (None, None) if _CACHE["refresh"] else _cache_read(key)
+    if df is None or meta.get("start", "9999") > start:
+        df = fetch(start, end)
+        meta = {"start": start, "end": end}
+    else:
+        age = now - datetime.fromisoformat(meta["fetched_at"])
+        covered = meta["end"] >= min(end, meta["fetched_at"][:10])
+        if age < timedelta(hours=ttl_hours) and covered:
+            logging.info("cache hit %s", key)
+            return df.loc[start:end]
+        last = df.index.max() if len(df) > 0 else pd.to_datetime(meta["start"])
+        since = max(pd.to_datetime(meta["start"]), last - timedelta(days=revision_days)).strftime("%Y-%m-%d")
+        until = max(meta["end"], end)
+        new = fetch(since, until)
+        logging.info("cache refresh %s since=%s until=%s rows=%d", key, since, until, len(new))
+        df = pd.concat([df.loc[df.index < pd.to_datetime(since)], new])
+        meta = {"start": meta["start"], "end": until}
+    meta["fetched_at"] = now.isoformat(timespec="seconds")
+    _cache_write(key, df, meta)
+    return df.loc[start:end]
+
+def _fred_series_raw(fred: Fred, series_id: str, start: str, end: str) -> pd.DataFrame:
+    s = scheduler._call("fred", fred.get_series, series_id, observation_start=start, observation_end=end)
     df = s.to_frame(name=series_id)
     df.index = pd.to_datetime(df.index)
     df = df.sort_index()
     return df
 
-def _fred_series_by_query(fred: Fred, query: str, start: str, end: str, out_col: str) -> pd.DataFrame:
-    res = fred.search(query)
+def _fred_series(fred: Fred, series_id: str, start: str, end: str, policy: tuple = None) -> pd.DataFrame:
+    return _cached_fetch(series_id, start, end, lambda s, e: _fred_series_raw(fred, series_id, s, e), policy)
+
+def _configure_resolve(ttl_days: float = 30, force: bool = False, miss_ttl_hours: float = 6):
+    _RESOLVE["ttl_days"] = ttl_days
+    _RESOLVE["miss_ttl_hours"] = miss_ttl_hours
+    _RESOLVE["force"] = force
+
+def _resolve_path() -> str:
+    return os.path.join(_CACHE["dir"], "fred_search.json")
+
+def _resolve_map() -> dict:
+    if _RESOLVE["map"] is None:
+        m = {}
+        if os.path.exists(_resolve_path()):
+            try:
+                with open(_resolve_path(), "r", encoding="utf-8") as f:
+                    m = json.load(f)
+            except Exception as e:
+                logging.warning("resolve cache read failed: %s", e)
+        _RESOLVE["map"] = m
+    return _RESOLVE["map"]
+
+def _resolve_store(query: str, series_id):
+    with _RESOLVE_LOCK:
+        m = _resolve_map()
+        m[query] = {"id": series_id, "resolved_at": datetime.now().isoformat(timespec="seconds")}
+        if _CACHE["enabled"]:
+            pth = _resolve_path()
+            os.makedirs(os.path.dirname(pth), exist_ok=True)
+            with open(pth + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(m, f, ensure_ascii=False, indent=2)
+            os.replace(pth + ".tmp", pth)
+
+def _fred_resolve(fred: Fred, query: str, force: bool = False):
+    if _CACHE["enabled"] and not (force or _RESOLVE["force"]):
+        with _RESOLVE_LOCK:
+            ent = _resolve_map().get(query)
+        if ent:
+            age = datetime.now() - datetime.fromisoformat(ent["resolved_at"])
+            ttl = timedelta(days=_RESOLVE["ttl_days"]) if ent["id"] else timedelta(hours=_RESOLVE["miss_ttl_hours"])
+            if age < ttl:
+                return ent["id"], True
+    res = scheduler._call("fred", fred.search, query)
     chosen = None
     if isinstance(res, pd.DataFrame) and len(res) > 0:
         chosen = res.iloc[0].get("id")
+    _resolve_store(query, chosen)
+    return chosen, False
+
+def _fred_series_by_query(fred: Fred, query: str, start: str, end: str, out_col: str, policy: tuple = None) -> pd.DataFrame:
+    chosen, cached = _fred_resolve(fred, query)
     if not chosen:
         raise RuntimeError("fred search no match")
-    df = _fred_series(fred, chosen, start, end)
+    try:
+        df = _fred_series(fred, chosen, start, end, policy)
+    except Exception:
+        if not cached:
+            raise
+        logging.info("re-resolving %r after cached id %s failed", query, chosen)
+        chosen, _ = _fred_resolve(fred, query, force=True)
+        if not chosen:
+            raise RuntimeError("fred search no match")
+        df = _fred_series(fred, chosen, start, end, policy)
     return df.rename(columns={df.columns[0]: out_col})
 
-def _fred_series_try_list(fred: Fred, ids: list, start: str, end: str, out_col: str) -> pd.DataFrame:
-    for sid in ids:
+def _ts_pro():
+    return providers._get("tushare")
+
+def _ts_windows(start: str, end: str, cap: int) -> list:
+    span = pd.Timedelta(days=max(1, int(cap / _TS_ROWS_PER_DAY * 0.8)))
+    lo, end = pd.to_datetime(start).normalize(), pd.to_datetime(end).normalize()
+    out = []
+    while lo <= end:
+        hi = min(end, lo + span - pd.Timedelta(days=1))
+        out.append((lo, hi))
+        lo = hi + pd.Timedelta(days=1)
+    return out
+
+def _ts_window(pro, api: str, ts_code: str, lo: pd.Timestamp, hi: pd.Timestamp, cap: int) -> list:
+    df = scheduler._call("tushare", getattr(pro, api), ts_code=ts_code, start_date=lo.strftime("%Y%m%d"), end_date=hi.strftime("%Y%m%d"))
+    if df is None:
+        raise RuntimeError(f"tushare {api} {ts_code} {lo:%Y%m%d}-{hi:%Y%m%d} returned no response")
+    if len(df) == 0:
+        return []
+    if len(df) >= cap:
+        if lo >= hi:
+            raise RuntimeError(f"tushare {api} {ts_code} {lo:%Y%m%d} hit row cap {cap}")
+        mid = lo + pd.Timedelta(days=(hi - lo).days // 2)
+        logging.info("tushare %s %s %s-%s hit row cap, splitting", api, ts_code, lo.strftime("%Y%m%d"), hi.strftime("%Y%m%d"))
+        return _ts_window(pro, api, ts_code, lo, mid, cap) + _ts_window(pro, api, ts_code, mid + pd.Timedelta(days=1), hi, cap)
+    return [df]
+
+def _ts_daily_close(pro, api: str, ts_code: str, start: str, end: str) -> pd.DataFrame:
+    cap = _TS_ROW_CAP.get(api, _TS_DEFAULT_ROW_CAP)
+    windows = _ts_windows(start, end, cap)
+    if len(windows) <= 1:
+        chunks = [_ts_window(pro, api, ts_code, lo, hi, cap) for lo, hi in windows]
+    else:
+        workers = min(len(windows), scheduler._provider("tushare")["config"]["max_concurrent"])
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            chunks = list(pool.map(lambda w: _ts_window(pro, api, ts_code, w[0], w[1], cap), windows))
+    filled = [i for i, chunk in enumerate(chunks) if chunk]
+    gaps = [windows[i] for i in range(filled[0], len(windows) - 1) if not chunks[i]] if filled else []
+    if gaps:
+        lo, hi = gaps[0]
+        logging.warning("tushare %s %s returned no rows for %d window(s), first %s-%s", api, ts_code, len(gaps), lo.strftime("%Y%m%d"), hi.strftime("%Y%m%d"))
+        raise RuntimeError(f"tushare {api} {ts_code} {lo:%Y%m%d}-{hi:%Y%m%d} returned no rows")
+    parts = [p for chunk in chunks for p in chunk]
+    if not parts:
+        raise RuntimeError(f"tushare {api} {ts_code} returned no rows for {start}-{end}")
+    df = pd.concat(parts, ignore_index=True)
+    df["trade_date"] = pd.to_datetime(df["trade_date"].astype(str))
+    df = df.drop_duplicates("trade_date", keep="last").sort_values("trade_date").set_index("trade_date")
+    return df.loc[:, ["close"]]
+
+def _ts_series(api: str, ts_code: str, start: str, end: str, policy: tuple = None) -> pd.DataFrame:
+    return _cached_fetch("tushare_" + ts_code, start, end, lambda s, e: _ts_daily_close(_ts_pro(), api, ts_code, s, e), policy)
+
+def _series_plan(fred: Fred, spec: dict, start: str, end: str) -> list:
+    name = spec["name"]
+    policy = (spec["ttl_hours"], spec["revision_days"])
+    if spec["source"] == "tushare":
+        return [
+            lambda code=code, api=api: _ts_series(api, code, start, end, policy).rename(columns={"close": name})
+            for code, api in zip(spec["ids"], spec["apis"])
+        ]
+    fns = [lambda sid=sid: _fred_series(fred, sid, start, end, policy).rename(columns={sid: name}) for sid in spec["ids"]]
+    fns += [lambda q=q: _fred_series_by_query(fred, q, start, end, name, policy) for q in spec["queries"]]
+    return fns
+
+def _extract_plan(fred: Fred, start: str, end: str, reg: dict) -> dict:
+    return {spec["name"]: _series_plan(fred, spec, start, end) for spec in reg["series"]}
+
+def _first_ok(fns: list):
+    err = None
+    for fn in fns:
         try:
-            df = _fred_series(fred, sid, start, end)
-            return df.rename(columns={sid: out_col})
-        except Exception:
-            pass
-    raise RuntimeError("fred series list no match")
+            return fn()
+        except Exception as e:
+            logging.info("candidate failed, trying next: %s", e)
+            err = e
+    raise err
 
-def _ts_pro():
-    token = _get_env_value("TUSHARE_TOKEN")
-    if not token:
-        raise RuntimeError("TUSHARE_TOKEN not set")
-    ts.set_token(token)
-    return ts.pro_api()
-
-def _ts_gold_price(start: str, end: str) -> pd.DataFrame:
-    pro = _ts_pro()
-    start_s = pd.to_datetime(start).strftime("%Y%m%d")
-    end_s = pd.to_datetime(end).strftime("%Y%m%d")
-    try:
-        df = pro.index_daily(ts_code="AU9999.SGE", start_date=start_s, end_date=end_s)
-        if df is not None and len(df) > 0:
-            df["trade_date"] = pd.to_datetime(df["trade_date"]) 
-            df = df.sort_values("trade_date").set_index("trade_date")
-            return df.loc[:, ["close"]].rename(columns={"close": "Gold_Price"})
-    except Exception:
-        pass
+def _resolve_optional(col: str, get, optional: bool):
     try:
-        df = pro.fut_daily(ts_code="AU", start_date=start_s, end_date=end_s)
-        if df is not None and len(df) > 0:
-            df["trade_date"] = pd.to_datetime(df["trade_date"]) 
-            df = df.sort_values("trade_date").set_index("trade_date")
-            return df.loc[:, ["close"]].rename(columns={"close": "Gold_Price"})
-    except Exception:
-        pass
-    raise RuntimeError("tushare gold series no match")
-
- 
-
-def _ts_sse_close(start: str, end: str) -> pd.DataFrame:
-    pro = _ts_pro()
-    start_s = pd.to_datetime(start).strftime("%Y%m%d")
-    end_s = pd.to_datetime(end).strftime("%Y%m%d")
-    df = pro.index_daily(ts_code="000001.SH", start_date=start_s, end_date=end_s)
-    if df is None or len(df) == 0:
-        return pd.DataFrame(columns=["SSE_Close"])  
-    df["trade_date"] = pd.to_datetime(df["trade_date"])
-    df = df.sort_values("trade_date")
-    df = df.set_index("trade_date")
-    df = df.loc[:, ["close"]].rename(columns={"close": "SSE_Close"})
-    return df
+        return get()
+    except Exception as e:
+        if not optional:
+            raise
+        logging.warning("optional series %s skipped: %s", col, e)
+        return None
 
-def _extract(start: str, end: str) -> dict:
+def _extract(start: str, end: str, jobs: int = 1, reg: dict = None) -> dict:
+    reg = reg or registry._load_registry()
+    optional = {s["name"]: s["optional"] for s in reg["series"]}
     fred = _fred_client()
-    usd_cny = _fred_series(fred, "DEXCHUS", start, end).rename(columns={"DEXCHUS": "USD_CNY_Rate"})
-    fedfunds = _fred_series(fred, "FEDFUNDS", start, end).rename(columns={"FEDFUNDS": "US_Interest_Rate"})
-    us_cpi = _fred_series(fred, "CPIAUCSL", start, end).rename(columns={"CPIAUCSL": "US_CPI"})
-    cn_cpi = _fred_series(fred, "CHNCPIALLMINMEI", start, end).rename(columns={"CHNCPIALLMINMEI": "CN_CPI"})
-    cn_lpr = None
-    try:
-        cn_lpr = _fred_series(fred, "DPRCMLTLPR1Y", start, end).rename(columns={"DPRCMLTLPR1Y": "CN_LPR"})
-    except Exception:
-        cn_lpr = _fred_series_by_query(
-            fred,
-            "Immediate Rates (< 24 Hours): Central Bank Rates: Total for China",
-            start,
-            end,
-            "CN_LPR",
-        )
-    try:
-        gold = _fred_series_by_query(
-            fred,
-            "Credit Suisse NASDAQ Gold FLOWS103 Price Index",
-            start,
-            end,
-            "Gold_Price",
-        )
-    except Exception:
-        try:
-            gold = _fred_series_by_query(
-                fred,
-                "Export Price Index (End Use): Nonmonetary Gold",
-                start,
-                end,
-                "Gold_Price",
-            )
-        except Exception:
-            gold = _fred_series_by_query(
-                fred,
-                "Import Price Index (End Use): Nonmonetary Gold",
-                start,
-                end,
-                "Gold_Price",
-            )
-    sp500 = _fred_series_try_list(
-        fred,
-        ["SP500"],
-        start,
-        end,
-        "SP500_Close",
-    )
-    cn_stock = None
-    try:
-        cn_stock = _fred_series_by_query(
-            fred,
-            "Stock Price Index for China",
-            start,
-            end,
-            "CN_Stock_Price",
-        )
-    except Exception:
-        try:
-            cn_stock = _fred_series_by_query(
-                fred,
-                "Share Prices: Total for China",
-                start,
-                end,
-                "CN_Stock_Price",
-            )
-        except Exception:
-            cn_stock = _fred_series_by_query(
-                fred,
-                "Stock Prices: Total for China",
-                start,
-                end,
-                "CN_Stock_Price",
-            )
-    cn_m2 = _fred_series_by_query(
-        fred,
-        "Money Supply M2 for China",
-        start,
-        end,
-        "CN_M2",
-    )
-    return {
-        "USD_CNY_Rate": usd_cny,
-        "US_Interest_Rate": fedfunds,
-        "US_CPI": us_cpi,
-        "CN_CPI": cn_cpi,
-        "CN_LPR": cn_lpr,
-        "Gold_Price": gold,
-        "SP500_Close": sp500,
-        "CN_M2": cn_m2,
-        "CN_Stock_Price": cn_stock,
-    }
-
-def _transform(dfs: dict, mode: str, monthly_agg: str) -> pd.DataFrame:
-    df = pd.concat(list(dfs.values()), axis=1)
-    df = df.sort_index()
-    daily_cols = ["USD_CNY_Rate", "US_Interest_Rate", "SP500_Close"]
-    monthly_cols = ["US_CPI", "CN_CPI", "CN_LPR", "Gold_Price", "CN_M2", "CN_Stock_Price"]
-    df[daily_cols] = df[daily_cols].ffill()
+    plan = _extract_plan(fred, start, end, reg)
+    if jobs <= 1:
+        out = {col: _resolve_optional(col, lambda fns=fns: _first_ok(fns), optional[col]) for col, fns in plan.items()}
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futs = {col: pool.submit(_first_ok, fns) for col, fns in plan.items()}
+            out = {col: _resolve_optional(col, fut.result, optional[col]) for col, fut in futs.items()}
+    logging.info("request stats %s", scheduler._stats())
+    return {col: d for col, d in out.items() if d is not None}
+
+def _arrays(d: pd.DataFrame):
+    return d.index.values.astype("datetime64[ns]", copy=False), d.to_numpy(dtype=float).ravel()
+
+def _asof(dates: np.ndarray, values: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    valid = ~np.isnan(values)
+    dates = dates[valid]
+    values = values[valid]
+    pos = np.searchsorted(dates, targets, side="right") - 1
+    out = values[np.maximum(pos, 0)] if len(values) > 0 else np.full(len(targets), np.nan)
+    return np.where(pos >= 0, out, np.nan)
+
+def _shared_indexes(arrays: dict) -> dict:
+    groups = {}
+    for k, (dates, _) in arrays.items():
+        key = (len(dates), hash(dates.tobytes()))
+        groups.setdefault(key, []).append(k)
+    return {ks[0]: ks for ks in groups.values()}
+
+def _bucket_labels(lo: np.datetime64, hi: np.datetime64, mode: str) -> pd.DatetimeIndex:
+    off = pd.tseries.frequencies.to_offset(_MODES[mode][0])
+    return pd.date_range(off.rollforward(pd.Timestamp(lo)), off.rollforward(pd.Timestamp(hi)), freq=off)
+
+def _transform(dfs: dict, mode: str, monthly_agg: str, reg: dict = None, since: pd.Timestamp = None) -> pd.DataFrame:
+    reg = reg or registry._load_registry()
+    specs = registry._by_name(reg)
+    names = list(dfs.keys())
+    arrays = {k: _arrays(d) for k, d in dfs.items()}
+    shared = _shared_indexes(arrays)
+    union = np.unique(np.concatenate([arrays[k][0] for k in shared]))
     if mode == "daily":
-        df[monthly_cols] = df[monthly_cols].ffill()
+        targets = union if since is None else union[union >= np.datetime64(since)]
+        out = pd.DataFrame({k: _asof(*arrays[k], targets) for k in names}, index=pd.DatetimeIndex(targets))
     else:
-        if monthly_agg == "last":
-            df = df.resample("ME").last()
-        else:
-            df = df.resample("ME").mean()
-        df = df.ffill()
-    df = df.dropna()
-    df.index = pd.to_datetime(df.index)
-    df.index.name = "Date"
+        aggs = {k: specs.get(k, {}).get("agg") or monthly_agg for k in names}
+        daily = {k: specs.get(k, {}).get("freq", "daily") == "daily" for k in names}
+        mean_daily = [k for k in names if aggs[k] != "last" and daily[k]]
+        mean_slow = {k for k in names if aggs[k] != "last" and not daily[k]}
+        lo = union[0] if since is None else np.datetime64(since)
+        if since is not None:
+            for k in mean_slow:
+                dates, values = arrays[k]
+                before = dates[(dates < lo) & ~np.isnan(values)]
+                if len(before) > 0:
+                    lo = min(lo, np.datetime64(_period_start(pd.Timestamp(before[-1]), mode)))
+            lo = max(lo, union[0])
+        labels = _bucket_labels(lo, union[-1], mode)
+        lab = labels.values
+        buckets = range(len(lab))
+        cols = {k: _asof(*arrays[k], lab) for k in names if aggs[k] == "last"}
+        if mean_daily:
+            grid = union[union >= lo]
+            frame = pd.DataFrame({k: _asof(*arrays[k], grid) for k in mean_daily})
+            cols.update(frame.groupby(np.searchsorted(lab, grid, side="left")).mean().reindex(buckets).to_dict("series"))
+        for first, ks in shared.items():
+            ks = [k for k in ks if k in mean_slow]
+            if not ks:
+                continue
+            dates = arrays[first][0]
+            keep = dates >= lo
+            frame = pd.DataFrame({k: arrays[k][1][keep] for k in ks})
+            cols.update(frame.groupby(np.searchsorted(lab, dates[keep], side="left")).mean().reindex(buckets).to_dict("series"))
+        out = pd.DataFrame({k: np.asarray(cols[k]) for k in names}, index=labels).ffill()
+        if since is not None:
+            out = out.loc[out.index >= since]
+    out = out.dropna(subset=[c for c in registry._required(reg) if c in out.columns])
+    out.index = pd.to_datetime(out.index)
+    out.index.name = "Date"
+    return out
+
+def _state_path(out_path: str) -> str:
+    return os.path.splitext(out_path)[0] + ".state.json"
+
+def _year_digests(d: pd.DataFrame) -> dict:
+    valid = d.dropna()
+    out = {}
+    if len(valid) == 0:
+        return out
+    for year, part in valid.groupby(valid.index.year):
+        h = fingerprint._hasher()
+        fingerprint._update_frame(h, part)
+        out[str(year)] = h.hexdigest()
+    return out
+
+def _save_state(dfs: dict, out_path: str):
+    last_obs, blocks = {}, {}
+    for k, d in dfs.items():
+        valid = d.dropna()
+        last_obs[k] = valid.index.max().strftime("%Y-%m-%d") if len(valid) > 0 else None
+        blocks[k] = _year_digests(valid)
+    with open(_state_path(out_path), "w", encoding="utf-8") as f:
+        json.dump({"last_obs": last_obs, "blocks": blocks}, f, ensure_ascii=False, indent=2)
+
+def _revised_since(d: pd.DataFrame, last_obs: str, blocks: dict):
+    valid = d.dropna()
+    old = _year_digests(valid.loc[valid.index <= pd.to_datetime(last_obs)])
+    changed = [int(y) for y in set(old) | set(blocks) if old.get(y) != blocks.get(y)]
+    return pd.Timestamp(year=min(changed), month=1, day=1) if changed else None
+
+def _line_date(line: bytes) -> pd.Timestamp:
+    return pd.to_datetime(line.split(b",", 1)[0].decode("utf-8"))
+
+def _read_master_tail(path: str, cutoff: pd.Timestamp):
+    with open(path, "rb") as f:
+        header = f.readline()
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        block = 4096
+        while True:
+            pos = max(len(header), size - block)
+            f.seek(pos)
+            lines = f.read(size - pos).splitlines(keepends=True)
+            if pos > len(header):
+                lines = lines[1:]
+            if pos == len(header) or (lines and _line_date(lines[0]) < cutoff):
+                break
+            block *= 2
+    offset = size - sum(len(line) for line in lines)
+    while lines and _line_date(lines[0]) < cutoff:
+        offset += len(lines.pop(0))
+    df = pd.read_csv(io.BytesIO(header + b"".join(lines)), float_precision="round_trip")
+    df["Date"] = pd.to_datetime(df["Date"])
+    df = df.set_index("Date")
+    return df, offset
+
+def _period_start(ts: pd.Timestamp, mode: str) -> pd.Timestamp:
+    if mode == "daily":
+        return ts
+    return ts.to_period(_MODES[mode][1]).start_time
+
+def _is_period_end(idx: pd.DatetimeIndex, mode: str) -> bool:
+    return bool((idx == idx.to_period(_MODES[mode][1]).to_timestamp(how="end").normalize()).all())
+
+def _tail_cutoff(dfs: dict, out_path: str, mode: str) -> pd.Timestamp:
+    with open(_state_path(out_path), "r", encoding="utf-8") as f:
+        state = json.load(f)
+    last_obs = state["last_obs"]
+    if "blocks" not in state:
+        raise RuntimeError("state has no revision digests")
+    if storage._is_partitioned(out_path) or storage._data_format(out_path) != "csv":
+        last = storage._bounds(out_path)[1]
+    else:
+        with open(out_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 4096))
+            last = _line_date(f.read().splitlines()[-1])
+    cutoff = _period_start(last, mode)
+    for k, d in dfs.items():
+        if last_obs.get(k) is None:
+            raise RuntimeError(f"no state for {k}")
+        new = d.loc[d.index > pd.to_datetime(last_obs[k])].dropna()
+        if len(new) > 0:
+            cutoff = min(cutoff, _period_start(new.index[0], mode))
+        revised = _revised_since(d, last_obs[k], state["blocks"].get(k, {}))
+        if revised is not None:
+            logging.info("revised history in %s since %s", k, revised.strftime("%Y-%m-%d"))
+            cutoff = min(cutoff, _period_start(revised, mode))
+    return cutoff
+
+def _save_incremental(dfs: dict, out_path: str, mode: str, monthly_agg: str, reg: dict = None, partition: str = None) -> pd.DataFrame:
+    layout = storage._layout(out_path)
+    if partition and partition != layout:
+        raise RuntimeError("existing dataset layout differs")
+    cutoff = _tail_cutoff(dfs, out_path, mode)
+    if layout:
+        master = storage._load(out_path, start=storage._partition_floor(cutoff, layout), exact=True)
+    elif storage._data_format(out_path) == "csv":
+        master, offset = _read_master_tail(out_path, cutoff)
+    else:
+        master = storage._load(out_path, exact=True)
+    tail = master.loc[master.index >= cutoff]
+    if mode != "daily" and not _is_period_end(tail.index, mode):
+        raise RuntimeError(f"existing dataset is not {mode}")
+    df = _transform(dfs, mode, monthly_agg, reg, since=cutoff)
+    if len(master.columns) > 0 and list(df.columns) != list(master.columns):
+        raise RuntimeError("existing dataset columns differ")
+    _validate(df, reg, _quality_path(out_path))
+    if layout:
+        merged = pd.concat([master.loc[master.index < cutoff], df])
+        keys = set(storage._partition_keys(master.index, layout)) | set(storage._partition_keys(merged.index, layout))
+        storage._save_partitions(merged, out_path, layout, keys)
+    elif storage._data_format(out_path) == "csv":
+        with open(out_path, "r+b") as f:
+            f.seek(offset)
+            f.truncate()
+            f.write(df.reset_index().to_csv(index=False, header=False).encode("utf-8"))
+    else:
+        _save(pd.concat([master.loc[master.index < cutoff], df]), out_path)
+    _save_state(dfs, out_path)
     return df
 
-def _validate(df: pd.DataFrame):
-    expected = ["USD_CNY_Rate", "US_Interest_Rate", "Gold_Price", "US_CPI", "CN_CPI", "CN_LPR", "SP500_Close", "CN_M2", "CN_Stock_Price"]
-    cols = ["Date"] + expected
-    if any(c not in df.columns for c in expected):
-        raise RuntimeError("columns missing")
-    if df.isna().sum().sum() != 0:
-        raise RuntimeError("nan present")
+def _quality_path(out_path: str) -> str:
+    return os.path.splitext(out_path)[0] + ".quality.json"
+
+def _validate(df: pd.DataFrame, reg: dict = None, report_path: str = None) -> dict:
+    reg = reg or registry._load_registry()
+    report = quality._check(df, reg)
+    if report_path:
+        os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+        with open(report_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(report_path + ".tmp", report_path)
+    for i in report["issues"]:
+        if i["level"] == "warn":
+            logging.warning("quality %s %s=%s threshold=%s", i["column"], i["check"], i["value"], i["threshold"])
+    fails = [i for i in report["issues"] if i["level"] == "fail"]
+    if fails:
+        raise RuntimeError("data quality failed: " + "; ".join(f"{i['column']} {i['check']}={i['value']}" for i in fails))
+    return report
+
+def _manifest_path(out_path: str) -> str:
+    return os.path.splitext(out_path)[0] + ".manifest.json"
+
+def _raw_digest(dfs: dict, mode: str, monthly_agg: str, reg: dict, partition: str = None) -> str:
+    params = {"mode": mode, "monthly_agg": monthly_agg, "partition": partition, "registry": fingerprint._file_digest(reg["path"])}
+    return fingerprint._frames_digest(dfs, params)
+
+def _etl_unchanged(out_path: str, raw: str) -> bool:
+    m = fingerprint._read(_manifest_path(out_path))
+    return bool(m) and m.get("raw") == raw and m.get("master") == fingerprint._path_digest(out_path)
 
-def _save(df: pd.DataFrame, out_path: str):
-    os.makedirs(os.path.dirname(out_path), exist_ok=True)
-    df.reset_index().to_csv(out_path, index=False)
+def _record_etl(out_path: str, raw: str):
+    fingerprint._write(_manifest_path(out_path), {"raw": raw, "master": fingerprint._path_digest(out_path)})
+
+def _save(df: pd.DataFrame, out_path: str, partition: str = None):
+    storage._save(df, out_path, partition)
+
+def _export_csv(src_path: str, csv_path: str):
+    storage._save(storage._load(src_path, exact=True), csv_path)
 
 def main():
     args = _parse_args()
     _init_logger()
-    if args.fred_key:
-        os.environ["FRED_API_KEY"] = "".join(re.findall(r"[a-z0-9]", args.fred_key.lower()))[:32]
-    elif args.fred_key_file and os.path.exists(args.fred_key_file):
-        with open(args.fred_key_file, "r", encoding="utf-8") as f:
-            for line in f:
-                s = line.strip()
-                if not s:
-                    continue
-                if "=" in s:
-                    s = s.split("=", 1)[1].strip()
-                s = s.strip("'\"")
-                s_norm = "".join(re.findall(r"[a-z0-9]", s.lower()))
-                if len(s_norm) >= 32:
-                    os.environ["FRED_API_KEY"] = s_norm[:32]
-                    break
+    providers._set_fred_key(args.fred_key, args.fred_key_file)
+    if args.replay or args.record:
+        try:
+            from src import replay
+        except ModuleNotFoundError:
+            import replay
+        replay._install("replay" if args.replay else "record", args.replay or args.record, args.latency_ms)
+    _configure_cache(args.cache_dir, not args.no_cache, args.refresh)
+    _configure_resolve(args.resolve_ttl_days, args.re_resolve, args.resolve_miss_ttl_hours)
+    scheduler._configure("fred", args.fred_rpm, max_concurrent=args.max_concurrent)
+    scheduler._configure("tushare", args.tushare_rpm, max_concurrent=args.max_concurrent)
+    reg = registry._load_registry(args.registry)
     start = args.start
     end = args.end or datetime.today().strftime("%Y-%m-%d")
     logging.info("extract start=%s end=%s", start, end)
-    dfs = _extract(start, end)
-    logging.info("transform mode=%s", args.mode)
-    df = _transform(dfs, args.mode, args.monthly_agg)
-    _validate(df)
-    _save(df, args.out)
-    logging.info("saved %s rows=%d", args.out, len(df))
+    dfs = _extract(start, end, args.jobs, reg)
+    raw = _raw_digest(dfs, args.mode, args.monthly_agg, reg, args.partition)
+    if not args.force and _etl_unchanged(args.out, raw):
+        logging.info("raw series unchanged, keeping %s", args.out)
+    else:
+        logging.info("transform mode=%s", args.mode)
+        df = None
+        if args.incremental and os.path.exists(args.out):
+            try:
+                df = _save_incremental(dfs, args.out, args.mode, args.monthly_agg, reg, args.partition)
+                logging.info("updated %s rows=%d", args.out, len(df))
+            except Exception as e:
+                logging.warning("incremental update failed, rebuilding: %s", e)
+                df = None
+        if df is None:
+            df = _transform(dfs, args.mode, args.monthly_agg, reg)
+            _validate(df, reg, _quality_path(args.out))
+            _save(df, args.out, args.partition)
+            _save_state(dfs, args.out)
+            logging.info("saved %s rows=%d", args.out, len(df))
+        _record_etl(args.out, raw)
+    if args.export_csv:
+        _export_csv(args.out, args.export_csv)
+        logging.info("exported %s", args.export_csv)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,74 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+try:
+    from src import storage
+except ModuleNotFoundError:
+    import storage
+
+def _hasher():
+    return hashlib.blake2b(digest_size=16)
+
+def _update_frame(h, df: pd.DataFrame):
+    h.update(json.dumps([str(c) for c in df.columns]).encode("utf-8"))
+    h.update(np.ascontiguousarray(df.index.values.astype("datetime64[ns]").view(np.int64)).tobytes())
+    h.update(np.ascontiguousarray(df.to_numpy(dtype=float, na_value=np.nan)).tobytes())
+
+def _frames_digest(dfs: dict, extra: dict = None) -> str:
+    h = _hasher()
+    h.update(json.dumps(extra or {}, sort_keys=True, default=str).encode("utf-8"))
+    for k in sorted(dfs):
+        h.update(k.encode("utf-8"))
+        _update_frame(h, dfs[k])
+    return h.hexdigest()
+
+def _file_digest(path: str, h=None) -> str:
+    h = h or _hasher()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _path_digest(path: str) -> str:
+    if not os.path.exists(path):
+        return None
+    if not storage._is_partitioned(path):
+        return _file_digest(path)
+    h = _hasher()
+    _file_digest(os.path.join(path, storage._MANIFEST), h)
+    for p in storage._manifest(path)["partitions"]:
+        _file_digest(os.path.join(path, p["file"]), h)
+    return h.hexdigest()
+
+def _stat_digest(path: str) -> str:
+    if not os.path.exists(path):
+        return None
+    files = [path]
+    if storage._is_partitioned(path):
+        files = [os.path.join(path, storage._MANIFEST)] + [os.path.join(path, p["file"]) for p in storage._manifest(path)["partitions"]]
+    h = _hasher()
+    for f in files:
+        st = os.stat(f)
+        h.update(f"{os.path.basename(f)}:{st.st_size}:{st.st_mtime_ns};".encode("utf-8"))
+    return h.hexdigest()
+
+def _digest(*parts) -> str:
+    return hashlib.blake2b(json.dumps(parts, sort_keys=True, default=str).encode("utf-8"), digest_size=16).hexdigest()
+
+def _read(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write(path: str, obj: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    obj = dict(obj, updated_at=pd.Timestamp.now().isoformat(timespec="seconds"))
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
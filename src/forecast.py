@@ -0,0 +1,104 @@
+import warnings
+import numpy as np
+import pandas as pd
+try:
+    from src import fingerprint
+except ModuleNotFoundError:
+    import fingerprint
+
+_VERSION = "1"
+_MODELS = ("arima", "ets")
+
+def _series_digest(y: pd.Series) -> str:
+    h = fingerprint._hasher()
+    fingerprint._update_frame(h, y.to_frame())
+    return h.hexdigest()
+
+def _future_dates(index: pd.DatetimeIndex, horizon: int) -> list:
+    freq = pd.infer_freq(index[-min(len(index), 60):]) if len(index) >= 3 else None
+    if freq is None:
+        days = np.median(np.diff(index.values[-min(len(index), 60):]).astype("timedelta64[D]").astype(float)) if len(index) > 1 else 1.0
+        freq = "B" if days < 2 else ("W" if days < 10 else ("ME" if days < 60 else ("QE" if days < 150 else "YE")))
+    return [d.strftime("%Y-%m-%d") for d in pd.date_range(index[-1], periods=horizon + 1, freq=freq)[1:]]
+
+def _model(kind: str, y: pd.Series, cfg: dict):
+    if kind == "arima":
+        from statsmodels.tsa.arima.model import ARIMA
+        return ARIMA(y, order=tuple(cfg["arima_order"]))
+    if kind == "ets":
+        from statsmodels.tsa.exponential_smoothing.ets import ETSModel
+        return ETSModel(y, error="add", trend="add", damped_trend=True)
+    raise RuntimeError(f"unknown forecast model: {kind}")
+
+def _fit(kind: str, y: np.ndarray, cfg: dict, params=None, mode: str = "cold") -> dict:
+    y = pd.Series(y)
+    mod = _model(kind, y, cfg)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        if mode == "filter":
+            res = mod.filter(params) if kind == "arima" else mod.smooth(params)
+        else:
+            kw = {"disp": False} if kind == "ets" else {}
+            res = mod.fit(start_params=params if mode == "warm" else None, **kw)
+        h = cfg["horizon"]
+        alpha = 1 - cfg["level"]
+        if kind == "arima":
+            frame = res.get_forecast(h).summary_frame(alpha=alpha)
+            lower, upper = frame["mean_ci_lower"], frame["mean_ci_upper"]
+        else:
+            frame = res.get_prediction(start=len(y), end=len(y) + h - 1).summary_frame(alpha=alpha)
+            lower, upper = frame["pi_lower"], frame["pi_upper"]
+    return {
+        "params": np.asarray(res.params, dtype=float).tolist(),
+        "aic": float(res.aic) if np.isfinite(res.aic) else None,
+        "mean": frame["mean"].astype(float).tolist(),
+        "lower": lower.astype(float).tolist(),
+        "upper": upper.astype(float).tolist(),
+    }
+
+def _plan(y: pd.Series, kind: str, cfg: dict, prev: dict) -> tuple:
+    digest = _series_digest(y)
+    if prev.get("digest") == digest and prev.get("config") == cfg:
+        return "cached", None
+    n0 = prev.get("nobs", 0)
+    same = prev.get("config") == cfg and prev.get("params") and 0 < n0 < len(y) and _series_digest(y.iloc[:n0]) == prev.get("digest")
+    if not same:
+        return "cold", None
+    if len(y) - prev.get("fit_nobs", n0) < cfg["refit_every"]:
+        return "filter", prev["params"]
+    return "warm", prev["params"]
+
+def _run(df: pd.DataFrame, cfg: dict, state: dict, executor=None) -> tuple:
+    names = [n for n in cfg["series"] if n in df.columns]
+    cfg = {k: v for k, v in cfg.items() if k != "series"}
+    jobs, out, new_state = [], {}, {}
+    for name in names:
+        y = df[name].dropna()
+        if len(y) < 10:
+            continue
+        out[name] = {"last_date": y.index[-1].strftime("%Y-%m-%d"), "last_value": float(y.iloc[-1]), "dates": _future_dates(y.index, cfg["horizon"]), "models": {}}
+        for kind in cfg["models"]:
+            if kind not in _MODELS:
+                raise RuntimeError(f"unknown forecast model: {kind}")
+            key = f"{name}:{kind}"
+            prev = state.get(key, {})
+            mode, params = _plan(y, kind, cfg, prev)
+            if mode == "cached":
+                new_state[key] = prev
+                out[name]["models"][kind] = dict(prev["result"], fit="cached")
+            else:
+                jobs.append((key, name, kind, y, mode, params, prev))
+    calls = [(kind, y.to_numpy(dtype=float), cfg, params, mode) for _, _, kind, y, mode, params, _ in jobs]
+    fits = list((executor.map if executor else map)(_fit, *zip(*calls))) if calls else []
+    for (key, name, kind, y, mode, _, prev), res in zip(jobs, fits):
+        result = {k: res[k] for k in ("aic", "mean", "lower", "upper")}
+        new_state[key] = {
+            "digest": _series_digest(y),
+            "nobs": len(y),
+            "fit_nobs": prev.get("fit_nobs", len(y)) if mode == "filter" else len(y),
+            "config": cfg,
+            "params": res["params"],
+            "result": result,
+        }
+        out[name]["models"][kind] = dict(result, fit=mode)
+    return out, new_state
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+try:
+    from src import fingerprint
+except ModuleNotFoundError:
+    import fingerprint
+
+_VERSION = "1"
+
+def _pair_key(y: np.ndarray, x: np.ndarray, driver: str, max_lag: int) -> str:
+    h = fingerprint._hasher()
+    h.update(fingerprint._digest(_VERSION, driver, max_lag).encode("utf-8"))
+    h.update(np.ascontiguousarray(np.column_stack([y, x])).tobytes())
+    return h.hexdigest()
+
+def _test(res, caused: int, causing: int) -> dict:
+    t = res.test_causality(caused, [causing], kind="f")
+    return {"f": float(t.test_statistic), "p_value": float(t.pvalue), "df": [int(d) for d in t.df]}
+
+def _fit_pair(y: np.ndarray, x: np.ndarray, max_lag: int) -> dict:
+    from statsmodels.tsa.api import VAR
+    data = np.column_stack([y, x])
+    max_lag = min(max_lag, (len(data) - 1) // 3)
+    if max_lag < 1 or np.nanstd(y) == 0 or np.nanstd(x) == 0:
+        return {"nobs": len(data), "selected_lag": None, "lags": {}}
+    model = VAR(data)
+    try:
+        selected = int(model.select_order(max_lag).selected_orders["aic"])
+    except (ValueError, np.linalg.LinAlgError):
+        selected = 1
+    lags = {}
+    for p in range(1, max_lag + 1):
+        try:
+            res = model.fit(p)
+            lags[str(p)] = {
+                "aic": float(res.aic),
+                "bic": float(res.bic),
+                "params": np.round(res.params, 10).tolist(),
+                "driver_to_target": _test(res, 0, 1),
+                "target_to_driver": _test(res, 1, 0),
+            }
+        except (ValueError, np.linalg.LinAlgError):
+            continue
+    return {"nobs": len(data), "selected_lag": max(selected, 1), "lags": lags}
+
+def _pairs(df: pd.DataFrame, target: str, drivers: list) -> dict:
+    out = {}
+    for d in drivers:
+        pair = df[[target, d]].dropna()
+        out[d] = (pair[target].to_numpy(dtype=float), pair[d].to_numpy(dtype=float))
+    return out
+
+def _run(df: pd.DataFrame, target: str, drivers: list, max_lag: int, cache_path: str = None, force: bool = False, executor=None) -> dict:
+    cache = {} if force or not cache_path else fingerprint._read(cache_path).get("pairs", {})
+    pairs = _pairs(df, target, drivers)
+    keys = {d: _pair_key(y, x, d, max_lag) for d, (y, x) in pairs.items()}
+    todo = [d for d in drivers if cache.get(keys[d], {}).get("driver") != d]
+    if todo:
+        ys, xs = [pairs[d][0] for d in todo], [pairs[d][1] for d in todo]
+        fits = list((executor.map if executor else map)(_fit_pair, ys, xs, [max_lag] * len(todo)))
+        for d, fit in zip(todo, fits):
+            cache[keys[d]] = dict(fit, driver=d)
+    fits = {d: cache[keys[d]] for d in drivers}
+    if cache_path:
+        fingerprint._write(cache_path, {"version": _VERSION, "pairs": {keys[d]: fits[d] for d in drivers}})
+    return {"fits": fits, "refit": todo}
+
+def _ranking(fits: dict) -> list:
+    rows = []
+    for d, fit in fits.items():
+        lag = fit.get("selected_lag")
+        res = fit["lags"].get(str(lag)) if lag else None
+        if res is None:
+            continue
+        best = min(fit["lags"].items(), key=lambda kv: kv[1]["driver_to_target"]["p_value"])
+        rows.append({
+            "driver": d,
+            "lag": lag,
+            "f": res["driver_to_target"]["f"],
+            "p_value": res["driver_to_target"]["p_value"],
+            "reverse_p_value": res["target_to_driver"]["p_value"],
+            "min_p_lag": int(best[0]),
+            "min_p_value": best[1]["driver_to_target"]["p_value"],
+            "nobs": fit["nobs"],
+        })
+    return sorted(rows, key=lambda r: (r["p_value"], r["driver"]))
@@ -0,0 +1,173 @@
+import os
+import numpy as np
+import pandas as pd
+try:
+    from src import fingerprint, sketch
+except ModuleNotFoundError:
+    import fingerprint
+    import sketch
+
+_STATS = ("n", "mean", "m2", "c")
+_QUANTILES = (0.25, 0.5, 0.75)
+
+def _block_stats(x: np.ndarray, compression: float = None) -> dict:
+    valid = ~np.isnan(x)
+    v = valid.astype(float)
+    cnt = v.sum(axis=0)
+    mu = np.divide(np.nansum(x, axis=0), cnt, out=np.zeros(x.shape[1]), where=cnt > 0)
+    y = np.where(valid, x - mu, 0.0)
+    n = v.T @ v
+    s = y.T @ v
+    q = (y * y).T @ v
+    p = y.T @ y
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shift = np.where(n > 0, s / n, 0.0)
+        m2 = np.where(n > 0, q - s * shift, 0.0)
+        c = np.where(n > 0, p - s * shift.T, 0.0)
+    vals = [np.sort(x[valid[:, j], j]) for j in range(x.shape[1])]
+    sk = [(a, np.ones(len(a))) if compression is None else sketch._compress(a, np.ones(len(a)), compression) for a in vals]
+    return {
+        "n": n,
+        "mean": mu[:, None] + shift,
+        "m2": np.maximum(m2, 0.0),
+        "c": c,
+        "min": np.array([a[0] if len(a) else np.nan for a in vals]),
+        "max": np.array([a[-1] if len(a) else np.nan for a in vals]),
+        "values": [m for m, _ in sk],
+        "weights": [w for _, w in sk],
+    }
+
+def _merge(a: dict, b: dict) -> dict:
+    n = a["n"] + b["n"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wb = np.where(n > 0, b["n"] / n, 0.0)
+        d = b["mean"] - a["mean"]
+        w = a["n"] * wb
+    return {
+        "n": n,
+        "mean": a["mean"] + d * wb,
+        "m2": a["m2"] + b["m2"] + d * d * w,
+        "c": a["c"] + b["c"] + d * d.T * w,
+        "min": np.fmin(a["min"], b["min"]),
+        "max": np.fmax(a["max"], b["max"]),
+    }
+
+def _combine(blocks: list, k: int) -> dict:
+    out = {key: np.zeros((k, k)) for key in _STATS}
+    out.update({"min": np.full(k, np.nan), "max": np.full(k, np.nan)})
+    for b in blocks:
+        out = _merge(out, b)
+    out["values"] = [np.concatenate([np.empty(0)] + [b["values"][j] for b in blocks]) for j in range(k)]
+    out["weights"] = [np.concatenate([np.empty(0)] + [b["weights"][j] for b in blocks]) for j in range(k)]
+    return out
+
+def _read_state(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with np.load(path, allow_pickle=False) as f:
+            z = {key: f[key] for key in f.files}
+    except (OSError, ValueError, KeyError):
+        return {}
+    columns = [str(c) for c in z["columns"]]
+    k = len(columns)
+    compression = float(z["compression"]) if "compression" in z else np.nan
+    blocks = {}
+    for i, digest in enumerate(z["digests"]):
+        offs = z["offsets"][i]
+        b = {key: z[key][i] for key in _STATS}
+        b.update({"min": z["min"][i], "max": z["max"][i]})
+        b["values"] = [z["values"][offs[j]:offs[j + 1]] for j in range(k)]
+        b["weights"] = [z["weights"][offs[j]:offs[j + 1]] for j in range(k)] if "weights" in z else [np.ones(offs[j + 1] - offs[j]) for j in range(k)]
+        blocks[str(digest)] = b
+    return {"columns": columns, "blocks": blocks, "compression": None if np.isnan(compression) else compression}
+
+def _write_state(path: str, columns: list, digests: list, blocks: list, compression: float = None):
+    k = len(columns)
+    offsets = np.zeros((len(blocks), k + 1), dtype=np.int64)
+    pos = 0
+    for i, b in enumerate(blocks):
+        for j in range(k):
+            offsets[i, j] = pos
+            pos += len(b["values"][j])
+        offsets[i, k] = pos
+    arrays = {key: np.stack([b[key] for b in blocks]) if blocks else np.zeros((0, k, k)) for key in _STATS}
+    for key in ("min", "max"):
+        arrays[key] = np.stack([b[key] for b in blocks]) if blocks else np.zeros((0, k))
+    arrays["values"] = np.concatenate([v for b in blocks for v in b["values"]]) if pos else np.empty(0)
+    arrays["weights"] = np.concatenate([v for b in blocks for v in b["weights"]]) if pos else np.empty(0)
+    arrays["compression"] = np.array(np.nan if compression is None else compression)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        np.savez(f, columns=np.array(columns, dtype=str), digests=np.array(digests, dtype=str), offsets=offsets, **arrays)
+    os.replace(path + ".tmp", path)
+
+def _block_digest(df: pd.DataFrame) -> str:
+    h = fingerprint._hasher()
+    fingerprint._update_frame(h, df)
+    return h.hexdigest()
+
+def _update(df: pd.DataFrame, path: str = None, force: bool = False, quantiles: dict = None) -> dict:
+    df = df.select_dtypes("number")
+    columns = [str(c) for c in df.columns]
+    cfg = sketch._config({"quantiles": quantiles or {}})
+    compression = None if sketch._use_exact(cfg, len(df)) else cfg["compression"]
+    state = {} if force or not path else _read_state(path)
+    same = state.get("columns") == columns and state.get("compression") == compression
+    cached = state.get("blocks", {}) if same else {}
+    df = df.sort_index()
+    years = df.index.year.to_numpy()
+    cuts = np.concatenate([[0], np.flatnonzero(np.diff(years)) + 1, [len(df)]]) if len(df) else []
+    digests, blocks, fresh = [], [], 0
+    for lo, hi in zip(cuts[:-1], cuts[1:]):
+        part = df.iloc[lo:hi]
+        digest = _block_digest(part)
+        b = cached.get(digest)
+        if b is None:
+            b = _block_stats(part.to_numpy(dtype=float, na_value=np.nan), compression)
+            fresh += len(part)
+        digests.append(digest)
+        blocks.append(b)
+    if path:
+        _write_state(path, columns, digests, blocks, compression)
+    out = _combine(blocks, len(columns))
+    out.update({"columns": columns, "fresh_rows": fresh, "compression": compression})
+    return out
+
+def _load(path: str) -> dict:
+    state = _read_state(path)
+    if not state:
+        return {}
+    out = _combine(list(state["blocks"].values()), len(state["columns"]))
+    out.update({"columns": state["columns"], "fresh_rows": 0, "compression": state["compression"]})
+    return out
+
+def _quantiles(state: dict, j: int) -> np.ndarray:
+    v, w = state["values"][j], state["weights"][j]
+    if not len(v):
+        return np.full(len(_QUANTILES), np.nan)
+    if state.get("compression") is None:
+        return np.quantile(v, _QUANTILES)
+    m, w = sketch._merge([(v, w)], state["compression"])
+    return sketch._quantile(m, w, _QUANTILES, state["min"][j], state["max"][j])
+
+def _describe(state: dict) -> pd.DataFrame:
+    n = np.diag(state["n"]).copy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(n > 0, np.diag(state["mean"]), np.nan)
+        std = np.where(n > 1, np.sqrt(np.diag(state["m2"]) / (n - 1)), np.nan)
+    qs = np.array([_quantiles(state, j) for j in range(len(state["columns"]))])
+    qs = qs.reshape(len(state["columns"]), len(_QUANTILES))
+    rows = [n, mean, std, state["min"]] + [qs[:, i] for i in range(len(_QUANTILES))] + [state["max"]]
+    index = ["count", "mean", "std", "min"] + [f"{q:.0%}" for q in _QUANTILES] + ["max"]
+    return pd.DataFrame(np.vstack(rows), index=index, columns=state["columns"])
+
+def _corr(state: dict) -> pd.DataFrame:
+    m2 = state["m2"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denom = np.sqrt(m2 * m2.T)
+        r = np.where((state["n"] > 1) & (denom > 0), state["c"] / denom, np.nan)
+    r = np.clip(r, -1.0, 1.0)
+    d = np.diag(r).copy()
+    np.fill_diagonal(r, np.where(np.isnan(d), np.nan, 1.0))
+    return pd.DataFrame(r, index=state["columns"], columns=state["columns"])
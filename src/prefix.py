@@ -0,0 +1,300 @@
+import os
+import numpy as np
+import pandas as pd
+try:
+    from src import moments, sketch
+except ModuleNotFoundError:
+    import moments
+    import sketch
+
+_EPS = 16 * np.finfo(float).eps
+_REL_TOL = 1e-7
+_FP_ZERO = 1e-14
+_ROWS = ["count", "mean", "median", "std", "min", "max", "q25", "q75", "skew", "kurt"]
+
+def _cumsum(a: np.ndarray) -> np.ndarray:
+    out = np.zeros((a.shape[0] + 1,) + a.shape[1:])
+    np.cumsum(a, axis=0, out=out[1:])
+    return out
+
+def _sketches(x: np.ndarray, dates: np.ndarray, compression: float) -> dict:
+    years = dates.astype("datetime64[D]").astype("datetime64[Y]").astype(np.int64)
+    rows = np.r_[0, np.flatnonzero(np.diff(years)) + 1, len(years)]
+    k = x.shape[1]
+    level = []
+    for a, b in zip(rows[:-1], rows[1:]):
+        block = x[a:b]
+        level.append(([sketch._from_values(block[:, j], compression) for j in range(k)],
+                      np.where(np.isnan(block), np.inf, block).min(axis=0),
+                      np.where(np.isnan(block), -np.inf, block).max(axis=0)))
+    nodes, starts = [], []
+    while level:
+        starts.append(len(nodes))
+        nodes.extend(level)
+        if len(level) == 1:
+            break
+        level = [([sketch._merge([l[0][j], r[0][j]], compression) for j in range(k)], np.minimum(l[1], r[1]), np.maximum(l[2], r[2]))
+                 for l, r in zip(level[0::2], level[1::2])] + ([level[-1]] if len(level) % 2 else [])
+    offsets = np.zeros((len(nodes), k + 1), dtype=np.int64)
+    pos = 0
+    for i, (sk, _, _) in enumerate(nodes):
+        for j in range(k):
+            offsets[i, j] = pos
+            pos += len(sk[j][0])
+        offsets[i, k] = pos
+    return {
+        "sk_rows": rows.astype(np.int64),
+        "sk_levels": np.array(starts, dtype=np.int64),
+        "sk_offsets": offsets,
+        "sk_means": np.concatenate([np.empty(0)] + [m for sk, _, _ in nodes for m, _ in sk]),
+        "sk_weights": np.concatenate([np.empty(0)] + [w for sk, _, _ in nodes for _, w in sk]),
+        "sk_min": np.array([n[1] for n in nodes]).reshape(-1, k),
+        "sk_max": np.array([n[2] for n in nodes]).reshape(-1, k),
+    }
+
+def _cover(idx: dict, p_lo: int, p_hi: int) -> list:
+    starts = idx["sk_levels"]
+    nodes, level = [], 0
+    while p_lo < p_hi:
+        if p_lo & 1:
+            nodes.append(starts[level] + p_lo)
+            p_lo += 1
+        if p_hi & 1:
+            p_hi -= 1
+            nodes.append(starts[level] + p_hi)
+        p_lo >>= 1
+        p_hi >>= 1
+        level += 1
+    return nodes
+
+def _build(df: pd.DataFrame, digest: str = None, quantiles: dict = None) -> dict:
+    df = df.select_dtypes("number").sort_index()
+    x = df.to_numpy(dtype=float, na_value=np.nan)
+    valid = ~np.isnan(x)
+    center = np.nan_to_num(np.nanmean(np.where(valid, x, np.nan), axis=0)) if x.size else np.zeros(x.shape[1])
+    d = np.where(valid, x - center, 0.0)
+    v = valid.astype(float)
+    d2 = d * d
+    i, j = np.triu_indices(x.shape[1], 1)
+    rows = np.arange(len(df))
+    last = np.where(valid, rows[:, None], -1)
+    np.maximum.accumulate(last, axis=0, out=last)
+    cfg = sketch._config({"quantiles": quantiles or {}})
+    out = {
+        "dates": df.index.values.astype("datetime64[D]").astype(np.int64),
+        "columns": np.array([str(c) for c in df.columns], dtype=str),
+        "digest": np.array(digest or "", dtype=str),
+        "values": x,
+        "center": center,
+        "last": last.astype(np.int32),
+        "n": _cumsum(v),
+        "p1": _cumsum(d),
+        "p2": _cumsum(d2),
+        "p3": _cumsum(d2 * d),
+        "p4": _cumsum(d2 * d2),
+        "pair_n": _cumsum(v[:, i] * v[:, j]),
+        "pair_si": _cumsum(d[:, i] * v[:, j]),
+        "pair_sj": _cumsum(v[:, i] * d[:, j]),
+        "pair_qi": _cumsum(d2[:, i] * v[:, j]),
+        "pair_qj": _cumsum(v[:, i] * d2[:, j]),
+        "pair_p": _cumsum(d[:, i] * d[:, j]),
+        "q_method": np.array(cfg["method"], dtype=str),
+        "q_compression": np.array(cfg["compression"]),
+        "q_exact_rows": np.array(cfg["exact_rows"]),
+    }
+    if not sketch._use_exact(cfg, len(df)):
+        out.update(_sketches(x, out["dates"], cfg["compression"]))
+    return out
+
+def _write(idx: dict, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        np.savez(f, **{k: v for k, v in idx.items() if k not in ("values", "base")})
+    os.replace(path + ".tmp", path)
+
+def _read(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with np.load(path, allow_pickle=False) as f:
+            return {key: f[key] for key in f.files}
+    except (OSError, ValueError):
+        return {}
+
+def _window(idx: dict, df: pd.DataFrame, start=None, end=None) -> dict:
+    lo, hi = _span(idx, start, end)
+    x = df.sort_index().reindex(columns=[str(c) for c in idx["columns"]]).to_numpy(dtype=float, na_value=np.nan)
+    if len(x) != hi - lo:
+        return {}
+    return dict(idx, values=x, base=lo)
+
+def _rows(idx: dict, lo: int, hi: int) -> np.ndarray:
+    base = int(idx.get("base", 0))
+    return idx["values"][lo - base:hi - base]
+
+def _span(idx: dict, start=None, end=None) -> tuple:
+    dates = idx["dates"]
+    lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start).date(), "D").astype(np.int64), "left"))
+    hi = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end).date(), "D").astype(np.int64), "right"))
+    return lo, max(lo, hi)
+
+def _positions(idx: dict, cols: list) -> list:
+    names = list(idx["columns"])
+    return [names.index(c) for c in cols if c in names]
+
+def _shape(n, mean, m2, m3, m4) -> dict:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.where(n > 1, np.sqrt(np.maximum(m2, 0.0) / (n - 1)), np.nan)
+        m2 = np.where(m2 > _FP_ZERO, m2, 0.0)
+        skew = np.where(m2 > 0, n * np.sqrt(n - 1) / (n - 2) * m3 / m2 ** 1.5, 0.0)
+        kurt = np.where(m2 > 0, n * (n + 1) * (n - 1) * m4 / ((n - 2) * (n - 3) * m2 * m2), 0.0) - np.where(m2 > 0, 3 * (n - 1) ** 2 / ((n - 2) * (n - 3)), 0.0)
+    return {
+        "count": n,
+        "mean": np.where(n > 0, mean, np.nan),
+        "std": std,
+        "skew": np.where(n > 2, skew, np.nan),
+        "kurt": np.where(n > 3, kurt, np.nan),
+    }
+
+def _exact(x: np.ndarray) -> dict:
+    valid = ~np.isnan(x)
+    n = valid.sum(axis=0).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(n > 0, np.where(valid, x, 0.0).sum(axis=0) / n, np.nan)
+    d = np.where(valid, x - mean, 0.0)
+    d2 = d * d
+    return _shape(n, mean, d2.sum(axis=0), (d2 * d).sum(axis=0), (d2 * d2).sum(axis=0))
+
+def _moments(idx: dict, lo: int, hi: int, pos: list) -> dict:
+    def diff(key):
+        return idx[key][hi, pos] - idx[key][lo, pos]
+    n = diff("n")
+    s1, s2, s3, s4 = diff("p1"), diff("p2"), diff("p3"), diff("p4")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mu = np.where(n > 0, s1 / n, 0.0)
+        m2 = s2 - n * mu * mu
+        m3 = s3 - 3 * mu * s2 + 2 * n * mu ** 3
+        m4 = s4 - 4 * mu * s3 + 6 * mu * mu * s2 - 3 * n * mu ** 4
+        err2 = _EPS * (idx["p2"][hi, pos] + idx["p2"][lo, pos])
+        err4 = _EPS * (idx["p4"][hi, pos] + idx["p4"][lo, pos])
+        bad = (n > 1) & ((err2 > _REL_TOL * m2) | (err4 > _REL_TOL * m4))
+    out = _shape(n, mu + idx["center"][pos], m2, m3, m4)
+    if bad.any():
+        cols = np.asarray(pos)[bad]
+        exact = _exact(_rows(idx, lo, hi)[:, cols])
+        for key in out:
+            out[key][bad] = exact[key]
+    out["exact_fallback"] = int(bad.sum())
+    return out
+
+def _full_partitions(idx: dict, lo: int, hi: int):
+    if "sk_rows" not in idx:
+        return None
+    cfg = {"method": str(idx["q_method"]), "exact_rows": int(idx["q_exact_rows"])}
+    if sketch._use_exact(cfg, hi - lo):
+        return None
+    rows = idx["sk_rows"]
+    p_lo = int(np.searchsorted(rows, lo, "left"))
+    p_hi = int(np.searchsorted(rows, hi, "right")) - 1
+    return (p_lo, p_hi) if p_lo < p_hi else None
+
+def _sketch_quantiles(idx: dict, lo: int, hi: int, pos: list, parts: tuple):
+    p_lo, p_hi = parts
+    rows, offs = idx["sk_rows"], idx["sk_offsets"]
+    compression = float(idx["q_compression"])
+    nodes = _cover(idx, p_lo, p_hi)
+    edges = np.r_[_rows(idx, lo, rows[p_lo]), _rows(idx, rows[p_hi], hi)]
+    q = np.full((3, len(pos)), np.nan)
+    mn = np.full(len(pos), np.nan)
+    mx = np.full(len(pos), np.nan)
+    for c, j in enumerate(pos):
+        e = edges[:, j]
+        e = e[~np.isnan(e)]
+        sk = [(idx["sk_means"][offs[i, j]:offs[i, j + 1]], idx["sk_weights"][offs[i, j]:offs[i, j + 1]]) for i in nodes]
+        m, w = sketch._merge(sk + [(e, np.ones(len(e)))], compression)
+        if not len(m):
+            continue
+        mn[c] = np.min(np.r_[idx["sk_min"][nodes, j], e])
+        mx[c] = np.max(np.r_[idx["sk_max"][nodes, j], e])
+        q[:, c] = sketch._quantile(m, w, [0.25, 0.5, 0.75], mn[c], mx[c])
+    return q, mn, mx
+
+def _summary(idx: dict, start=None, end=None, cols: list = None) -> pd.DataFrame:
+    cols = list(idx["columns"]) if cols is None else cols
+    pos = _positions(idx, cols)
+    if not pos:
+        return pd.DataFrame()
+    lo, hi = _span(idx, start, end)
+    m = _moments(idx, lo, hi, pos)
+    has = m["count"] > 0
+    parts = _full_partitions(idx, lo, hi)
+    if parts and has.any():
+        q, mn, mx = _sketch_quantiles(idx, lo, hi, pos, parts)
+    elif hi > lo and has.any():
+        x = _rows(idx, lo, hi)[:, pos]
+        with np.errstate(invalid="ignore"):
+            q = np.full((3, len(pos)), np.nan)
+            q[:, has] = np.nanquantile(x[:, has], [0.25, 0.5, 0.75], axis=0)
+            mn = np.full(len(pos), np.nan)
+            mx = np.full(len(pos), np.nan)
+            mn[has] = np.nanmin(x[:, has], axis=0)
+            mx[has] = np.nanmax(x[:, has], axis=0)
+    else:
+        q, mn, mx = np.full((3, len(pos)), np.nan), np.full(len(pos), np.nan), np.full(len(pos), np.nan)
+    rows = {"count": m["count"], "mean": m["mean"], "median": q[1], "std": m["std"], "min": mn, "max": mx,
+            "q25": q[0], "q75": q[2], "skew": m["skew"], "kurt": m["kurt"]}
+    names = [str(idx["columns"][p]) for p in pos]
+    out = pd.DataFrame(np.vstack([rows[r] for r in _ROWS]), index=_ROWS, columns=names)
+    return out.loc[:, has]
+
+def _corr(idx: dict, start=None, end=None, cols: list = None) -> pd.DataFrame:
+    cols = list(idx["columns"]) if cols is None else cols
+    pos = _positions(idx, cols)
+    if not pos:
+        return pd.DataFrame()
+    lo, hi = _span(idx, start, end)
+    k = len(idx["columns"])
+    i, j = np.triu_indices(k, 1)
+    def diff(key):
+        return idx[key][hi] - idx[key][lo]
+    n = diff("pair_n")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        si, sj = diff("pair_si"), diff("pair_sj")
+        vi = diff("pair_qi") - np.where(n > 0, si * si / n, 0.0)
+        vj = diff("pair_qj") - np.where(n > 0, sj * sj / n, 0.0)
+        c = diff("pair_p") - np.where(n > 0, si * sj / n, 0.0)
+        r = np.where((n > 1) & (vi > 0) & (vj > 0), c / np.sqrt(vi * vj), np.nan)
+        bad = (n > 1) & ((_EPS * (idx["pair_qi"][hi] + idx["pair_qi"][lo]) > _REL_TOL * vi) | (_EPS * (idx["pair_qj"][hi] + idx["pair_qj"][lo]) > _REL_TOL * vj))
+    full = np.full((k, k), np.nan)
+    full[i, j] = np.clip(r, -1.0, 1.0)
+    full[j, i] = full[i, j]
+    single = idx["n"][hi] - idx["n"][lo]
+    var = idx["p2"][hi] - idx["p2"][lo] - np.where(single > 0, (idx["p1"][hi] - idx["p1"][lo]) ** 2 / np.maximum(single, 1), 0.0)
+    np.fill_diagonal(full, np.where((single > 1) & (var > _EPS * (idx["p2"][hi] + idx["p2"][lo])), 1.0, np.nan))
+    sub = full[np.ix_(pos, pos)]
+    sel = np.zeros((k, k), dtype=bool)
+    sel[i[bad], j[bad]] = True
+    sel = (sel | sel.T)[np.ix_(pos, pos)]
+    if sel.any():
+        state = moments._block_stats(_rows(idx, lo, hi)[:, pos])
+        state["columns"] = pos
+        exact = moments._corr(state).to_numpy()
+        sub[sel] = exact[sel]
+    names = [str(idx["columns"][p]) for p in pos]
+    return pd.DataFrame(sub, index=names, columns=names)
+
+def _latest(idx: dict, start=None, end=None, cols: list = None) -> dict:
+    cols = list(idx["columns"]) if cols is None else cols
+    lo, hi = _span(idx, start, end)
+    out = {}
+    if hi <= lo:
+        return out
+    for p in _positions(idx, cols):
+        last = int(idx["last"][hi - 1, p])
+        if last < lo:
+            continue
+        prev = int(idx["last"][last - 1, p]) if last > lo else -1
+        val = float(_rows(idx, last, last + 1)[0, p])
+        prev_val = float(_rows(idx, prev, prev + 1)[0, p]) if prev >= lo else None
+        out[str(idx["columns"][p])] = (val, prev_val)
+    return out
@@ -0,0 +1,200 @@
+import os
+import re
+import json
+import logging
+import threading
+import urllib.error
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from fredapi import Fred
+os.environ["YF_USE_CURL_CFFI"] = "0"
+from tushare.pro.client import DataApi
+try:
+    from src import scheduler
+except ModuleNotFoundError:
+    import scheduler
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+_TIMEOUT = 30
+_TS_URL = "http://api.waditu.com/dataapi"
+_LOCK = threading.Lock()
+_CLIENTS = {}
+
+def _env_paths() -> list:
+    return [os.path.join(os.getcwd(), ".env"), os.path.join(_ROOT, ".env")]
+
+def _norm_key(s: str) -> str:
+    return "".join(re.findall(r"[a-z0-9]", s.lower()))
+
+@lru_cache(maxsize=None)
+def _dotenv(path: str) -> tuple:
+    if not os.path.exists(path):
+        return ()
+    logging.info("reading .env %s", path)
+    with open(path, "r", encoding="utf-8") as f:
+        return tuple(f.readlines())
+
+def _env_value(name: str) -> str:
+    v = os.getenv(name)
+    if v:
+        return v.strip().strip("'\"")
+    for pth in _env_paths():
+        for line in _dotenv(pth):
+            s = line.strip()
+            if not s or s.startswith("#"):
+                continue
+            if "=" in s:
+                k, val = s.split("=", 1)
+                k_norm = re.sub(r"[^A-Za-z_]", "", k).upper()
+                if k_norm == name.upper():
+                    return val.strip().strip("'\"")
+    return ""
+
+def _key_from_file(path: str) -> str:
+    if not path or not os.path.exists(path):
+        return ""
+    logging.info("reading key file %s", path)
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            s = line.strip()
+            if not s:
+                continue
+            if "=" in s:
+                s = s.split("=", 1)[1].strip()
+            s = s.strip("'\"")
+            s_norm = _norm_key(s)
+            if len(s_norm) >= 32:
+                return s_norm[:32]
+    return ""
+
+def _fred_key_from_dotenv() -> str:
+    for pth in _env_paths():
+        for line in _dotenv(pth):
+            s = line.strip()
+            if not s or s.startswith("#"):
+                continue
+            if "fred_api_key" in line.lower():
+                part = line.split("=", 1)[1] if "=" in line else line
+                v_norm = _norm_key(part)
+                if len(v_norm) >= 32:
+                    logging.info("loaded key from .env direct")
+                    return v_norm[:32]
+            if "=" in s:
+                k, v = s.split("=", 1)
+                if re.sub(r"[^a-z]", "", k.lower()) == "fredapikey" and len(_norm_key(v)) >= 32:
+                    logging.info("loaded key from .env")
+                    return _norm_key(v)[:32]
+    return ""
+
+@lru_cache(maxsize=None)
+def _fred_key() -> str:
+    key = os.getenv("FRED_API_KEY") or _fred_key_from_dotenv()
+    if not key:
+        candidates = [
+            os.getenv("FRED_API_KEY_FILE"),
+            os.path.join("secrets", "fred_api_key.txt"),
+            os.path.join(os.getcwd(), "fred_api_key.txt"),
+            os.path.join(_ROOT, "fred_api_key.txt"),
+        ]
+        for key_file in candidates:
+            key = _key_from_file(key_file)
+            if key:
+                logging.info("loaded key from file")
+                break
+    if not key:
+        raise RuntimeError("FRED_API_KEY not set")
+    return key
+
+def _set_fred_key(key: str = None, key_file: str = None):
+    if key:
+        os.environ["FRED_API_KEY"] = _norm_key(key)[:32]
+    elif key_file:
+        k = _key_from_file(key_file)
+        if k:
+            os.environ["FRED_API_KEY"] = k
+    _fred_key.cache_clear()
+    with _LOCK:
+        _CLIENTS.pop("fred", None)
+
+def _session(name: str) -> requests.Session:
+    size = max(1, scheduler._provider(name)["config"]["max_concurrent"])
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=size)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+if not callable(getattr(Fred, "_Fred__fetch_data", None)):
+    raise RuntimeError("unsupported fredapi version: Fred.__fetch_data hook not found")
+
+class _PooledFred(Fred):
+    def __init__(self, api_key: str, session: requests.Session):
+        super().__init__(api_key=api_key)
+        self.session = session
+        if self.proxies:
+            self.session.proxies.update({k: v for k, v in self.proxies.items() if v})
+
+    def _Fred__fetch_data(self, url):
+        url += "&api_key=" + self.api_key
+        resp = self.session.get(url, timeout=_TIMEOUT)
+        if resp.status_code == 429 or resp.status_code >= 500:
+            raise urllib.error.HTTPError(url.replace(self.api_key, "***"), resp.status_code, resp.reason, resp.headers, None)
+        root = ET.fromstring(resp.content)
+        if resp.status_code >= 400:
+            raise ValueError(root.get("message"))
+        return root
+
+class _PooledDataApi(DataApi):
+    def __init__(self, token: str, session: requests.Session, timeout: int = _TIMEOUT, url: str = _TS_URL):
+        super().__init__(token=token, timeout=timeout)
+        self.session = session
+        self.token = token
+        self.timeout = timeout
+        self.url = url
+
+    def query(self, api_name, fields="", **kwargs):
+        kwargs.setdefault("ts_type_name", self.url)
+        req_params = {"api_name": api_name, "token": self.token, "params": kwargs, "fields": fields}
+        url = f"{self.url}/{api_name}"
+        res = self.session.post(url, json=req_params, timeout=self.timeout)
+        if res.status_code == 429 or res.status_code >= 500:
+            raise urllib.error.HTTPError(url, res.status_code, res.reason, res.headers, None)
+        if not res.ok:
+            raise RuntimeError(f"tushare {api_name} HTTP {res.status_code}: {res.reason}")
+        result = json.loads(res.text)
+        if result["code"] != 0:
+            raise Exception(result["msg"])
+        return pd.DataFrame(result["data"]["items"], columns=result["data"]["fields"])
+
+def _new_fred():
+    return _PooledFred(_fred_key(), _session("fred"))
+
+def _new_pro():
+    token = _env_value("TUSHARE_TOKEN")
+    if not token:
+        raise RuntimeError("TUSHARE_TOKEN not set")
+    return _PooledDataApi(token, _session("tushare"))
+
+_FACTORIES = {"fred": _new_fred, "tushare": _new_pro}
+
+def _get(name: str):
+    with _LOCK:
+        if _CLIENTS.get(name) is None:
+            _CLIENTS[name] = _FACTORIES[name]()
+        return _CLIENTS[name]
+
+def _install(name: str, client):
+    with _LOCK:
+        _CLIENTS[name] = client
+
+def _reset():
+    with _LOCK:
+        for c in _CLIENTS.values():
+            if isinstance(getattr(c, "session", None), requests.Session):
+                c.session.close()
+        _CLIENTS.clear()
+    _fred_key.cache_clear()
+    _dotenv.cache_clear()
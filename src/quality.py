@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+try:
+    from src import registry
+except ModuleNotFoundError:
+    import registry
+
+_DEFAULTS = {
+    "stale_warn": 12,
+    "stale_fail": 0,
+    "gap_warn": 2,
+    "gap_fail": 0,
+    "outlier_method": "z",
+    "outlier_z": 10.0,
+    "outlier_warn": 1,
+    "outlier_fail": 0,
+    "jump_warn": 5.0,
+    "jump_fail": 0,
+    "coverage_warn": 0.9,
+    "coverage_fail": 1.0,
+    "duplicate_dates": "fail",
+    "non_monotonic": "fail",
+}
+_INDEX_CHECKS = ("duplicate_dates", "non_monotonic", "outlier_method")
+_LEVELS = {"ok": 0, "warn": 1, "fail": 2}
+
+def _thresholds(reg: dict, names: list):
+    base = dict(_DEFAULTS)
+    base.update(reg.get("quality", {}))
+    specs = registry._by_name(reg)
+    cols = {}
+    for key in _DEFAULTS:
+        if key not in _INDEX_CHECKS:
+            cols[key] = np.array([float(specs.get(c, {}).get("quality", {}).get(key, base[key])) for c in names])
+    return base, cols
+
+def _run_max(cont: np.ndarray):
+    k, n = cont.shape
+    if n == 0:
+        return np.zeros(k, dtype=np.int32), np.zeros(k, dtype=int)
+    rows = np.arange(n, dtype=np.int32)
+    span = np.where(cont, np.int32(0), rows)
+    np.maximum.accumulate(span, axis=1, out=span)
+    np.subtract(rows, span, out=span)
+    end = span.argmax(axis=1)
+    return span[np.arange(k), end], end
+
+def _stale_runs(x: np.ndarray, valid: np.ndarray):
+    same = np.zeros_like(valid)
+    np.equal(x[:, 1:], x[:, :-1], out=same[:, 1:])
+    return _run_max(same)
+
+def _gap_runs(valid: np.ndarray):
+    started = np.arange(valid.shape[1]) >= valid.argmax(axis=1)[:, None] if valid.shape[1] else valid
+    return _run_max(~valid & started)
+
+def _masked_max(a: np.ndarray):
+    if a.shape[1] == 0:
+        return np.full(a.shape[0], np.nan), np.zeros(a.shape[0], dtype=int)
+    a[np.isnan(a)] = -np.inf
+    pos = a.argmax(axis=1)
+    val = a[np.arange(a.shape[0]), pos]
+    return np.where(np.isfinite(val), val, np.nan), pos
+
+def _outlier_scores(dx: np.ndarray, changed: np.ndarray, method: str) -> np.ndarray:
+    if method == "mad":
+        d = np.where(changed, dx, np.nan)
+        med = np.nanmedian(d, axis=1, keepdims=True)
+        dev = np.abs(d - med)
+        scale = np.nanmedian(dev, axis=1, keepdims=True) * 1.4826
+    else:
+        cnt = np.maximum(changed.sum(axis=1, keepdims=True), 1)
+        d = np.where(changed, dx, 0.0)
+        mean = d.sum(axis=1, keepdims=True) / cnt
+        scale = np.sqrt(np.maximum(np.einsum("ij,ij->i", d, d)[:, None] / cnt - mean * mean, 0.0))
+        dev = np.abs(d - mean, out=d)
+        dev[~changed] = np.nan
+    return dev / np.where(scale > 0, scale, np.nan)
+
+def _check(df: pd.DataFrame, reg: dict = None) -> dict:
+    reg = reg or registry._load_registry()
+    names = list(df.columns)
+    required = registry._required(reg)
+    base, th = _thresholds(reg, names)
+    x = np.ascontiguousarray(df.to_numpy(dtype=float, na_value=np.nan).T)
+    days = df.index.values.astype("datetime64[D]").astype(np.int64)
+    k, n = x.shape
+    step = np.diff(days)
+    index = {
+        "rows": int(n),
+        "start": df.index.min().strftime("%Y-%m-%d") if n else None,
+        "end": df.index.max().strftime("%Y-%m-%d") if n else None,
+        "duplicate_dates": int((step == 0).sum()),
+        "non_monotonic": int((step < 0).sum()),
+    }
+    issues = []
+    for key in ("duplicate_dates", "non_monotonic"):
+        if index[key] and base[key] in _LEVELS:
+            issues.append({"column": None, "check": key, "level": base[key], "value": index[key], "threshold": 0})
+    for c in required:
+        if c not in df.columns:
+            issues.append({"column": c, "check": "missing", "level": "fail", "value": None, "threshold": None})
+    valid = ~np.isnan(x)
+    coverage = valid.mean(axis=1) if n else np.zeros(k)
+    stale_rows, stale_end = _stale_runs(x, valid)
+    gap_rows, gap_end = _gap_runs(valid)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        dx = np.diff(x, axis=1)
+        changed = np.isfinite(dx) & (dx != 0)
+        nchg = changed.sum(axis=1)
+        first = changed.argmax(axis=1) if n > 1 else np.zeros(k, dtype=int)
+        lastc = n - 2 - changed[:, ::-1].argmax(axis=1) if n > 1 else np.zeros(k, dtype=int)
+        period = np.where(nchg > 1, np.maximum(1.0, (lastc - first) / np.maximum(nchg - 1, 1)), 1.0)
+        z = _outlier_scores(dx, changed, base["outlier_method"])
+        pos = x > 0
+        ratio = np.divide(x[:, 1:], x[:, :-1], out=np.full(dx.shape, np.nan), where=pos[:, 1:] & pos[:, :-1])
+        np.maximum(ratio, 1.0 / ratio, out=ratio)
+        outliers = (z > th["outlier_z"][:, None]).sum(axis=1)
+        max_z, z_pos = _masked_max(z)
+    max_jump, jump_pos = _masked_max(ratio)
+    stale = stale_rows / period
+    gaps = gap_rows / period
+    checks = {
+        "stale": (stale, th["stale_warn"], th["stale_fail"], True),
+        "gap": (gaps, th["gap_warn"], th["gap_fail"], True),
+        "outliers": (outliers.astype(float), th["outlier_warn"], th["outlier_fail"], True),
+        "jump": (np.nan_to_num(max_jump, nan=0.0), th["jump_warn"], th["jump_fail"], True),
+        "coverage": (coverage, th["coverage_warn"], np.where(np.isin(names, required), th["coverage_fail"], 0.0), False),
+    }
+    for check, (vals, warn, fail, above) in checks.items():
+        hit_fail = (fail > 0) & ((vals >= fail) if above else (vals < fail))
+        hit_warn = ~hit_fail & (warn > 0) & ((vals >= warn) if above else (vals < warn))
+        for j in np.flatnonzero(hit_fail | hit_warn):
+            issues.append({
+                "column": names[j],
+                "check": check,
+                "level": "fail" if hit_fail[j] else "warn",
+                "value": round(float(vals[j]), 4),
+                "threshold": float(fail[j] if hit_fail[j] else warn[j]),
+            })
+    labels = df.index.values.astype("datetime64[D]")
+    has = valid.any(axis=1)
+    first_valid = valid.argmax(axis=1) if n else np.zeros(k, dtype=int)
+    last_valid = n - 1 - valid[:, ::-1].argmax(axis=1) if n else np.zeros(k, dtype=int)
+    def date(pos, ok):
+        return str(labels[pos]) if ok else None
+    series = {}
+    for j, c in enumerate(names):
+        series[c] = {
+            "coverage": round(float(coverage[j]), 4),
+            "first_valid": date(first_valid[j], has[j]),
+            "last_valid": date(last_valid[j], has[j]),
+            "period_rows": round(float(period[j]), 2),
+            "max_stale_periods": round(float(stale[j]), 2),
+            "max_stale_days": int(days[stale_end[j]] - days[stale_end[j] - stale_rows[j]]) if n else 0,
+            "max_stale_end": date(stale_end[j], stale[j] > 0),
+            "max_gap_periods": round(float(gaps[j]), 2),
+            "max_gap_days": int(days[gap_end[j]] - days[gap_end[j] - gap_rows[j]]) if n else 0,
+            "max_gap_end": date(gap_end[j], gaps[j] > 0),
+            "outliers": int(outliers[j]),
+            "max_abs_z": None if np.isnan(max_z[j]) else round(float(max_z[j]), 2),
+            "max_abs_z_date": date(z_pos[j] + 1, not np.isnan(max_z[j])),
+            "max_jump_ratio": None if np.isnan(max_jump[j]) else round(float(max_jump[j]), 4),
+            "max_jump_date": date(jump_pos[j] + 1, not np.isnan(max_jump[j])),
+        }
+    status = max((i["level"] for i in issues), key=_LEVELS.get, default="ok")
+    return {
+        "status": status,
+        "generated_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "index": index,
+        "thresholds": base,
+        "issues": issues,
+        "series": series,
+    }
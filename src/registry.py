@@ -0,0 +1,131 @@
+import os
+import tomllib
+from functools import lru_cache
+
+_DEFAULT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, "config", "series.toml"))
+_SOURCES = ("fred", "tushare")
+
+def _default_path() -> str:
+    return os.getenv("SERIES_REGISTRY") or _DEFAULT_PATH
+
+@lru_cache(maxsize=None)
+def _load_registry(path: str = None) -> dict:
+    path = path or _default_path()
+    with open(path, "rb") as f:
+        raw = tomllib.load(f)
+    series = []
+    for s in raw.get("series", []):
+        if "name" not in s:
+            raise RuntimeError(f"registry {path}: series entry without name")
+        if s.get("source", "fred") not in _SOURCES:
+            raise RuntimeError(f"registry {path}: unknown source for {s['name']}")
+        if not (s.get("ids") or s.get("queries")):
+            raise RuntimeError(f"registry {path}: no ids or queries for {s['name']}")
+        apis = list(s.get("apis", [s.get("api", "index_daily")] * len(s.get("ids", []))))
+        if len(apis) != len(s.get("ids", [])):
+            raise RuntimeError(f"registry {path}: apis and ids differ in length for {s['name']}")
+        series.append({
+            "name": s["name"],
+            "alias": s.get("alias", s["name"].lower()),
+            "source": s.get("source", "fred"),
+            "api": s.get("api", "index_daily"),
+            "apis": apis,
+            "ids": list(s.get("ids", [])),
+            "queries": list(s.get("queries", [])),
+            "freq": s.get("freq", "daily"),
+            "agg": s.get("agg"),
+            "optional": bool(s.get("optional", False)),
+            "ttl_hours": float(s.get("ttl_hours", 24)),
+            "revision_days": int(s.get("revision_days", 90)),
+            "label": dict(s.get("label", {})),
+            "quality": dict(s.get("quality", {})),
+        })
+    names = [s["name"] for s in series]
+    if len(set(names)) != len(names):
+        raise RuntimeError(f"registry {path}: duplicate series names")
+    derived = []
+    for d in raw.get("derived", []):
+        derived.append({
+            "name": d["name"],
+            "alias": d.get("alias", d["name"].lower()),
+            "expr": d["expr"],
+            "dashboard": bool(d.get("dashboard", True)),
+            "label": dict(d.get("label", {})),
+        })
+    dataset = raw.get("dataset", {})
+    target = dataset.get("target", names[0] if names else None)
+    if target not in names:
+        raise RuntimeError(f"registry {path}: target {target} is not a series")
+    metrics = raw.get("metrics", {})
+    dashboard_cols = names + [d["name"] for d in derived if d["dashboard"]]
+    return {
+        "path": path,
+        "target": target,
+        "alias": dataset.get("alias", target.lower()),
+        "kpi_fields": list(dataset.get("kpi_fields", names)),
+        "headline_kpis": list(dataset.get("headline_kpis", names[:4])),
+        "dashboard_cols": list(dataset.get("dashboard_cols", dashboard_cols)),
+        "spread_means": list(metrics.get("spread_means", [])),
+        "correlations": list(metrics.get("correlations", [])),
+        "rolling_windows": [int(w) for w in metrics.get("rolling_windows", [3, 6, 12, 36])],
+        "leadlag_max_lag": int(metrics.get("leadlag_max_lag", 12)),
+        "granger_max_lag": int(metrics.get("granger_max_lag", 6)),
+        "forecast": {
+            "series": list(metrics.get("forecast_series", [target] + list(metrics.get("correlations", [])))),
+            "models": list(metrics.get("forecast_models", ["arima", "ets"])),
+            "horizon": int(metrics.get("forecast_horizon", 12)),
+            "level": float(metrics.get("forecast_level", 0.95)),
+            "arima_order": [int(v) for v in metrics.get("forecast_arima_order", [1, 1, 1])],
+            "refit_every": int(metrics.get("forecast_refit_every", 6)),
+        },
+        "scenarios": {
+            "factors": list(metrics.get("scenario_factors", ["Interest_Spread", "Inflation_Spread"])),
+            "horizon_years": float(metrics.get("scenario_horizon_years", 0.25)),
+            "paths": int(metrics.get("scenario_paths", 100000)),
+            "seed": int(metrics.get("scenario_seed", 0)),
+        },
+        "changepoints": {
+            "method": metrics.get("changepoint_method", "auto"),
+            "pelt_rows": int(metrics.get("changepoint_pelt_rows", 5000)),
+            "penalty": float(metrics.get("changepoint_penalty", 1.0)),
+            "min_years": float(metrics.get("changepoint_min_years", 1.0)),
+        },
+        "bootstrap": {
+            "replicates": int(metrics.get("bootstrap_replicates", 10000)),
+            "block": int(metrics.get("bootstrap_block", 0)),
+            "level": float(metrics.get("bootstrap_level", 0.95)),
+            "seed": int(metrics.get("bootstrap_seed", 0)),
+        },
+        "quantiles": {
+            "method": metrics.get("quantile_method", "auto"),
+            "compression": float(metrics.get("quantile_compression", 200)),
+            "exact_rows": int(metrics.get("quantile_exact_rows", 5000)),
+        },
+        "quality": dict(raw.get("quality", {})),
+        "series": series,
+        "derived": derived,
+    }
+
+def _names(reg: dict) -> list:
+    return [s["name"] for s in reg["series"]]
+
+def _required(reg: dict) -> list:
+    return [s["name"] for s in reg["series"] if not s["optional"]]
+
+def _by_name(reg: dict) -> dict:
+    out = {s["name"]: s for s in reg["series"]}
+    out.update({d["name"]: d for d in reg["derived"]})
+    return out
+
+def _add_derived(reg: dict, df, names: list = None):
+    for d in reg["derived"]:
+        if names is None or d["name"] in names:
+            df[d["name"]] = df.eval(d["expr"])
+    return df
+
+def _dashboard_cols(reg: dict) -> list:
+    return reg["dashboard_cols"]
+
+def _labels(reg: dict, lang: str) -> dict:
+    by_name = _by_name(reg)
+    return {k: v["label"].get(lang, k) for k, v in by_name.items()}
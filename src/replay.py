@@ -0,0 +1,193 @@
+import os
+import re
+import json
+import time
+import random
+import logging
+import threading
+import numpy as np
+import pandas as pd
+try:
+    from src import providers, registry
+except ModuleNotFoundError:
+    import providers
+    import registry
+
+_LOCK = threading.Lock()
+_FREQS = {"daily": "B", "weekly": "W-FRI", "monthly": "MS", "quarterly": "QS"}
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+def _fred_path(root: str, series_id: str) -> str:
+    return os.path.join(root, "fred", _safe(series_id) + ".csv")
+
+def _ts_path(root: str, api: str, ts_code: str) -> str:
+    return os.path.join(root, "tushare", _safe(api), _safe(ts_code) + ".csv")
+
+def _search_path(root: str) -> str:
+    return os.path.join(root, "fred_search.json")
+
+def _read_fixture(path: str, date_col: str) -> pd.DataFrame:
+    df = pd.read_csv(path, dtype={date_col: str}, float_precision="round_trip")
+    df[date_col] = pd.to_datetime(df[date_col])
+    return df.set_index(date_col).sort_index()
+
+def _write_fixture(path: str, df: pd.DataFrame, date_col: str, fmt: str = None):
+    with _LOCK:
+        if os.path.exists(path):
+            old = _read_fixture(path, date_col)
+            df = pd.concat([old.loc[~old.index.isin(df.index)], df]).sort_index()
+        out = df.copy()
+        out.index = out.index.strftime(fmt) if fmt else out.index.strftime("%Y-%m-%d")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        out.to_csv(path + ".tmp", index_label=date_col)
+        os.replace(path + ".tmp", path)
+
+def _load_search(root: str) -> dict:
+    if not os.path.exists(_search_path(root)):
+        return {}
+    with open(_search_path(root), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _store_search(root: str, query: str, ids: list):
+    with _LOCK:
+        m = _load_search(root)
+        m[query] = ids
+        os.makedirs(root, exist_ok=True)
+        with open(_search_path(root) + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(m, f, ensure_ascii=False, indent=2)
+        os.replace(_search_path(root) + ".tmp", _search_path(root))
+
+class _Latency:
+    def __init__(self, latency_ms: float = 0.0, jitter: float = 0.0):
+        self.latency = max(0.0, latency_ms) / 1000.0
+        self.jitter = max(0.0, min(1.0, jitter))
+
+    def wait(self):
+        if self.latency > 0:
+            time.sleep(self.latency * random.uniform(1.0 - self.jitter, 1.0 + self.jitter))
+
+class _FakeFred:
+    def __init__(self, root: str, latency: _Latency):
+        self.root = root
+        self.latency = latency
+        self.search_map = _load_search(root)
+
+    def get_series(self, series_id, observation_start=None, observation_end=None, **kwargs):
+        self.latency.wait()
+        path = _fred_path(self.root, series_id)
+        if not os.path.exists(path):
+            raise ValueError("Bad Request.  The series does not exist.")
+        s = _read_fixture(path, "date")["value"]
+        return s.loc[observation_start:observation_end]
+
+    def search(self, text, **kwargs):
+        self.latency.wait()
+        ids = self.search_map.get(text)
+        if not ids:
+            return None
+        return pd.DataFrame({"id": ids}, index=pd.Index(ids, name="series id"))
+
+class _FakePro:
+    def __init__(self, root: str, latency: _Latency):
+        self.root = root
+        self.latency = latency
+
+    def __getattr__(self, api: str):
+        if api.startswith("_"):
+            raise AttributeError(api)
+        def query(ts_code=None, start_date=None, end_date=None, **kwargs):
+            self.latency.wait()
+            path = _ts_path(self.root, api, ts_code)
+            if not os.path.exists(path):
+                return pd.DataFrame(columns=["ts_code", "trade_date", "close"])
+            df = _read_fixture(path, "trade_date")
+            df = df.loc[pd.to_datetime(start_date):pd.to_datetime(end_date)].sort_index(ascending=False)
+            df.index = df.index.strftime("%Y%m%d")
+            df = df.reset_index()
+            df.insert(0, "ts_code", ts_code)
+            return df
+        return query
+
+class _RecordingFred:
+    def __init__(self, root: str, live):
+        self.root = root
+        self.live = live
+
+    def get_series(self, series_id, observation_start=None, observation_end=None, **kwargs):
+        s = self.live.get_series(series_id, observation_start=observation_start, observation_end=observation_end, **kwargs)
+        df = s.to_frame(name="value")
+        df.index = pd.to_datetime(df.index)
+        _write_fixture(_fred_path(self.root, series_id), df, "date")
+        return s
+
+    def search(self, text, **kwargs):
+        res = self.live.search(text, **kwargs)
+        ids = [] if res is None or len(res) == 0 else [str(i) for i in res["id"].tolist()]
+        _store_search(self.root, text, ids)
+        return res
+
+class _RecordingPro:
+    def __init__(self, root: str, live):
+        self.root = root
+        self.live = live
+
+    def __getattr__(self, api: str):
+        if api.startswith("_"):
+            raise AttributeError(api)
+        fn = getattr(self.live, api)
+        def query(ts_code=None, start_date=None, end_date=None, **kwargs):
+            df = fn(ts_code=ts_code, start_date=start_date, end_date=end_date, **kwargs)
+            if df is not None and len(df) > 0:
+                rec = df.loc[:, ["trade_date", "close"]].copy()
+                rec["trade_date"] = pd.to_datetime(rec["trade_date"].astype(str))
+                _write_fixture(_ts_path(self.root, api, ts_code), rec.set_index("trade_date"), "trade_date", "%Y%m%d")
+            return df
+        return query
+
+class _LazyPro:
+    def __init__(self, factory):
+        self.factory = factory
+        self.pro = None
+
+    def __getattr__(self, api: str):
+        if api.startswith("_"):
+            raise AttributeError(api)
+        if self.pro is None:
+            self.pro = self.factory()
+        return getattr(self.pro, api)
+
+def _install(mode: str, root: str, latency_ms: float = 0.0, jitter: float = 0.0):
+    if mode == "replay":
+        if not os.path.isdir(root):
+            raise RuntimeError(f"fixtures not found: {root}")
+        lat = _Latency(latency_ms, jitter)
+        providers._install("fred", _FakeFred(root, lat))
+        providers._install("tushare", _FakePro(root, lat))
+    elif mode == "record":
+        os.makedirs(root, exist_ok=True)
+        providers._install("fred", _RecordingFred(root, providers._new_fred()))
+        providers._install("tushare", _RecordingPro(root, _LazyPro(providers._new_pro)))
+    else:
+        providers._reset()
+    logging.info("provider mode=%s fixtures=%s latency_ms=%s", mode, root, latency_ms)
+
+def _synthesize(root: str, reg: dict = None, start: str = "1970-01-01", end: str = None, seed: int = 0):
+    reg = reg or registry._load_registry()
+    end = end or pd.Timestamp.today().strftime("%Y-%m-%d")
+    rng = np.random.default_rng(seed)
+    for spec in reg["series"]:
+        idx = pd.date_range(start, end, freq=_FREQS.get(spec["freq"], "B"))
+        values = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, len(idx))))
+        df = pd.DataFrame({"value": np.round(values, 4)}, index=idx)
+        if spec["source"] == "tushare":
+            _write_fixture(_ts_path(root, spec["apis"][0], spec["ids"][0]), df.rename(columns={"value": "close"}), "trade_date", "%Y%m%d")
+            continue
+        if spec["freq"] == "daily":
+            df.loc[rng.random(len(idx)) < 0.02, "value"] = np.nan
+        sid = spec["ids"][0] if spec["ids"] else "SYN_" + _safe(spec["name"]).upper()
+        _write_fixture(_fred_path(root, sid), df, "date")
+        for q in spec["queries"]:
+            _store_search(root, q, [sid])
+    return root
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+try:
+    from src import changepoint
+except ModuleNotFoundError:
+    import changepoint
+
+_PERCENTILES = (5, 25, 50, 75, 95)
+_FAN_STEPS = 25
+
+def _calibrate(df: pd.DataFrame, target: str, factors: list) -> dict:
+    factors = [f for f in factors if f in df.columns]
+    data = pd.DataFrame({"r": np.log(df[target]).diff()})
+    data["r_lag"] = data["r"].shift(1)
+    for f in factors:
+        data[f] = df[f].diff()
+    data = data.dropna()
+    if len(data) < len(factors) + 5:
+        raise RuntimeError(f"not enough history to calibrate scenarios: {len(data)} rows")
+    x = np.column_stack([np.ones(len(data)), data[["r_lag"] + factors].to_numpy(dtype=float)])
+    y = data["r"].to_numpy(dtype=float)
+    coef, *_ = np.linalg.lstsq(x, y, rcond=None)
+    resid = y - x @ coef
+    last = df[target].dropna()
+    return {
+        "target": target,
+        "factors": factors,
+        "intercept": float(coef[0]),
+        "phi": float(np.clip(coef[1], -0.99, 0.99)),
+        "beta": {f: float(b) for f, b in zip(factors, coef[2:])},
+        "sigma": float(resid.std(ddof=x.shape[1])),
+        "residuals": (resid - resid.mean()).tolist(),
+        "factor_std": {f: float(data[f].std()) for f in factors},
+        "last_date": last.index[-1].strftime("%Y-%m-%d"),
+        "last_value": float(last.iloc[-1]),
+        "last_return": float(data["r"].iloc[-1]),
+        "nobs": int(len(data)),
+    }
+
+def _horizon(index: pd.DatetimeIndex, years: float) -> int:
+    return max(1, int(round(changepoint._periods_per_year(index) * years)))
+
+def _simulate(cal: dict, shocks: dict = None, horizon: int = 3, paths: int = 10000, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    resid = np.asarray(cal["residuals"], dtype=np.float64)
+    r = resid[rng.integers(0, len(resid), size=(horizon, paths))]
+    drift = cal["intercept"] + sum(cal["beta"].get(f, 0.0) * v / horizon for f, v in (shocks or {}).items())
+    prev = np.full(paths, cal["last_return"])
+    for t in range(horizon):
+        prev *= cal["phi"]
+        prev += drift
+        prev += r[t]
+        r[t] = prev
+    np.cumsum(r, axis=0, out=r)
+    np.exp(r, out=r)
+    r *= cal["last_value"]
+    return r.T
+
+def _summary(levels: np.ndarray, last_value: float, alphas=(0.95, 0.99)) -> dict:
+    ret = levels[:, -1] / last_value - 1
+    out = {"mean_return": float(ret.mean()), "prob_up": float((ret > 0).mean()), "risk": {}}
+    for a in alphas:
+        up, down = np.quantile(ret, [a, 1 - a])
+        out["risk"][f"{a:.0%}"] = {
+            "var_up": float(up),
+            "es_up": float(ret[ret >= up].mean()),
+            "var_down": float(-down),
+            "es_down": float(-ret[ret <= down].mean()),
+        }
+    steps = np.unique(np.linspace(0, levels.shape[1] - 1, min(levels.shape[1], _FAN_STEPS)).round().astype(int))
+    fan = np.percentile(levels.T[steps], _PERCENTILES, axis=1)
+    out["fan"] = {"steps": (steps + 1).tolist(), **{str(p): v.tolist() for p, v in zip(_PERCENTILES, fan)}}
+    return out
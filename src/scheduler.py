@@ -0,0 +1,120 @@
+import time
+import random
+import logging
+import threading
+import urllib.error
+from xml.etree.ElementTree import ParseError
+
+_RETRY_MARKERS = (
+    "too many requests",
+    "rate limit",
+    "internal server error",
+    "bad gateway",
+    "service unavailable",
+    "gateway timeout",
+    "timed out",
+    "temporarily",
+    "每分钟最多访问",
+    "访问频率",
+)
+_DEFAULTS = {
+    "fred": {"rate_per_min": 110, "burst": 5, "max_concurrent": 8},
+    "tushare": {"rate_per_min": 180, "burst": 5, "max_concurrent": 4},
+}
+_RETRY = {"max_retries": 5, "base_delay": 1.0, "max_delay": 30.0}
+_LOCK = threading.Lock()
+_PROVIDERS = {}
+
+class _TokenBucket:
+    def __init__(self, rate_per_min: float, burst: int):
+        self.rate = rate_per_min / 60.0
+        self.capacity = float(max(1, burst))
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return waited
+                delay = (1.0 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+def _check_limits(name: str, rate_per_min, burst, max_concurrent):
+    if not isinstance(rate_per_min, (int, float)) or not rate_per_min > 0:
+        raise ValueError(f"{name}: rate_per_min must be a positive number, got {rate_per_min!r}")
+    for key, val in (("burst", burst), ("max_concurrent", max_concurrent)):
+        if not isinstance(val, int) or val < 1:
+            raise ValueError(f"{name}: {key} must be a positive integer, got {val!r}")
+
+def _new_provider(name: str, rate_per_min: float, burst: int, max_concurrent: int) -> dict:
+    _check_limits(name, rate_per_min, burst, max_concurrent)
+    return {
+        "bucket": _TokenBucket(rate_per_min, burst),
+        "sem": threading.BoundedSemaphore(max(1, max_concurrent)),
+        "stats": {"requests": 0, "retries": 0, "failures": 0, "throttle_waits": 0, "throttle_wait_s": 0.0},
+        "config": {"rate_per_min": rate_per_min, "burst": burst, "max_concurrent": max_concurrent},
+    }
+
+def _configure(name: str, rate_per_min: float = None, burst: int = None, max_concurrent: int = None):
+    base = dict(_DEFAULTS.get(name, _DEFAULTS["fred"]))
+    if rate_per_min is not None:
+        base["rate_per_min"] = rate_per_min
+    if burst is not None:
+        base["burst"] = burst
+    if max_concurrent is not None:
+        base["max_concurrent"] = max_concurrent
+    with _LOCK:
+        _PROVIDERS[name] = _new_provider(name, **base)
+
+def _provider(name: str) -> dict:
+    with _LOCK:
+        if name not in _PROVIDERS:
+            _PROVIDERS[name] = _new_provider(name, **_DEFAULTS.get(name, _DEFAULTS["fred"]))
+        return _PROVIDERS[name]
+
+def _retryable(err: Exception) -> bool:
+    if isinstance(err, urllib.error.HTTPError):
+        return err.code == 429 or err.code >= 500
+    if isinstance(err, (OSError, ParseError)):
+        return True
+    msg = str(err).lower()
+    return any(m in msg for m in _RETRY_MARKERS)
+
+def _bump(p: dict, key: str, value=1):
+    with _LOCK:
+        p["stats"][key] += value
+
+def _call(name: str, fn, *args, **kwargs):
+    p = _provider(name)
+    attempt = 0
+    while True:
+        with p["sem"]:
+            waited = p["bucket"].acquire()
+            if waited > 0:
+                _bump(p, "throttle_waits")
+                _bump(p, "throttle_wait_s", waited)
+            _bump(p, "requests")
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                err = e
+        if attempt >= _RETRY["max_retries"] or not _retryable(err):
+            _bump(p, "failures")
+            raise err
+        delay = min(_RETRY["max_delay"], _RETRY["base_delay"] * 2 ** attempt) * random.uniform(0.5, 1.0)
+        _bump(p, "retries")
+        logging.info("%s request failed (%s), retry %d in %.1fs", name, err, attempt + 1, delay)
+        time.sleep(delay)
+        attempt += 1
+
+def _stats() -> dict:
+    with _LOCK:
+        return {name: dict(p["stats"]) for name, p in _PROVIDERS.items()}
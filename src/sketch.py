@@ -0,0 +1,49 @@
+import numpy as np
+
+_METHODS = ("auto", "exact", "tdigest")
+
+def _config(reg: dict = None) -> dict:
+    q = dict((reg or {}).get("quantiles", {}))
+    method = q.get("method", "auto")
+    if method not in _METHODS:
+        raise RuntimeError(f"unknown quantile method: {method}")
+    return {"method": method, "compression": float(q.get("compression", 200)), "exact_rows": int(q.get("exact_rows", 5000))}
+
+def _use_exact(cfg: dict, rows: int) -> bool:
+    return cfg["method"] == "exact" or (cfg["method"] == "auto" and rows <= cfg["exact_rows"])
+
+def _compress(means: np.ndarray, weights: np.ndarray, compression: float):
+    order = np.argsort(means, kind="stable")
+    means, weights = means[order], weights[order]
+    total = weights.sum()
+    if len(means) <= 1 or total <= 0:
+        return means, weights
+    left = (np.cumsum(weights) - weights) / total
+    k = np.floor(compression / (2 * np.pi) * np.arcsin(np.clip(2 * left - 1, -1.0, 1.0)))
+    starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+    w = np.add.reduceat(weights, starts)
+    m = np.add.reduceat(means * weights, starts) / w
+    return m, w
+
+def _from_values(x: np.ndarray, compression: float):
+    x = x[~np.isnan(x)]
+    return _compress(x, np.ones(len(x)), compression)
+
+def _merge(parts: list, compression: float):
+    parts = [p for p in parts if len(p[0])]
+    if not parts:
+        return np.empty(0), np.empty(0)
+    return _compress(np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts]), compression)
+
+def _quantile(means: np.ndarray, weights: np.ndarray, qs, lo: float = None, hi: float = None) -> np.ndarray:
+    qs = np.asarray(qs, dtype=float)
+    if len(means) == 0:
+        return np.full(qs.shape, np.nan)
+    n = weights.sum()
+    centers = np.cumsum(weights) - weights + (weights - 1) / 2
+    xs, ys = centers, means
+    if lo is not None and centers[0] > 0:
+        xs, ys = np.r_[0.0, xs], np.r_[lo, ys]
+    if hi is not None and xs[-1] < n - 1:
+        xs, ys = np.r_[xs, n - 1], np.r_[ys, hi]
+    return np.interp(qs * (n - 1), xs, ys)
@@ -0,0 +1,133 @@
+import os
+import json
+import pandas as pd
+
+_MANIFEST = "_manifest.json"
+_EXTS = {"parquet": ".parquet", "feather": ".feather", "csv": ".csv"}
+
+def _is_partitioned(path: str) -> bool:
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, _MANIFEST))
+
+def _data_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        return "parquet"
+    if ext in (".feather", ".arrow"):
+        return "feather"
+    return "csv"
+
+def _write_frame(df: pd.DataFrame, path: str):
+    fmt = _data_format(path)
+    if fmt == "parquet":
+        df.reset_index().to_parquet(path, index=False, compression="zstd")
+    elif fmt == "feather":
+        df.reset_index().to_feather(path, compression="uncompressed")
+    else:
+        df.reset_index().to_csv(path, index=False)
+
+def _read_frame(src, fmt: str, columns: list = None, exact: bool = False) -> pd.DataFrame:
+    cols = None if columns is None else ["Date"] + [c for c in columns if c != "Date"]
+    if fmt == "parquet":
+        return pd.read_parquet(src, columns=cols, memory_map=True)
+    if fmt == "feather":
+        import pyarrow.feather as feather
+        return feather.read_table(src, columns=cols, memory_map=True).to_pandas()
+    return pd.read_csv(src, usecols=cols, float_precision="round_trip" if exact else None)
+
+def _finish(df: pd.DataFrame) -> pd.DataFrame:
+    if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        df["Date"] = pd.to_datetime(df["Date"])
+    return df.sort_values("Date").set_index("Date")
+
+def _manifest(path: str) -> dict:
+    with open(os.path.join(path, _MANIFEST), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _layout(path: str):
+    return _manifest(path)["partition"] if _is_partitioned(path) else None
+
+def _partition_keys(idx: pd.DatetimeIndex, partition: str) -> pd.Index:
+    if partition == "month":
+        return pd.Index(idx.strftime("%Y-%m"))
+    return pd.Index(idx.strftime("%Y"))
+
+def _partition_floor(ts: pd.Timestamp, partition: str) -> pd.Timestamp:
+    return ts.to_period("M" if partition == "month" else "Y").start_time
+
+def _save_partitions(df: pd.DataFrame, path: str, partition: str, keys: set = None):
+    os.makedirs(path, exist_ok=True)
+    fmt = _data_format(path)
+    old = _manifest(path) if _is_partitioned(path) else {"partitions": []}
+    entries = {p["key"]: p for p in old["partitions"]}
+    stale = set(entries) if keys is None else set(keys) & set(entries)
+    part_keys = _partition_keys(df.index, partition)
+    for key, part in df.groupby(part_keys.values, sort=True):
+        if keys is not None and key not in keys:
+            continue
+        fname = key + _EXTS[fmt]
+        _write_frame(part, os.path.join(path, fname))
+        stale.discard(key)
+        entries[key] = {
+            "key": key,
+            "file": fname,
+            "start": part.index.min().strftime("%Y-%m-%d"),
+            "end": part.index.max().strftime("%Y-%m-%d"),
+            "rows": int(len(part)),
+            "bytes": os.path.getsize(os.path.join(path, fname)),
+        }
+    for key in stale:
+        p = entries.pop(key)
+        if os.path.exists(os.path.join(path, p["file"])):
+            os.remove(os.path.join(path, p["file"]))
+    manifest = {
+        "format": fmt,
+        "partition": partition,
+        "columns": list(df.columns),
+        "partitions": [entries[k] for k in sorted(entries)],
+    }
+    with open(os.path.join(path, _MANIFEST + ".tmp"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(os.path.join(path, _MANIFEST + ".tmp"), os.path.join(path, _MANIFEST))
+
+def _save(df: pd.DataFrame, path: str, partition: str = None):
+    partition = partition or _layout(path)
+    if partition:
+        _save_partitions(df, path, partition)
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _write_frame(df, path)
+
+def _prune(manifest: dict, start=None, end=None) -> list:
+    out = []
+    for p in manifest["partitions"]:
+        if start is not None and pd.Timestamp(p["end"]) < pd.Timestamp(start):
+            continue
+        if end is not None and pd.Timestamp(p["start"]) > pd.Timestamp(end):
+            continue
+        out.append(p)
+    return out
+
+def _load(path: str, columns: list = None, start=None, end=None, exact: bool = False) -> pd.DataFrame:
+    if _is_partitioned(path):
+        manifest = _manifest(path)
+        parts = _prune(manifest, start, end)
+        if not parts:
+            return pd.DataFrame(columns=manifest["columns"], index=pd.DatetimeIndex([], name="Date"))
+        frames = [_read_frame(os.path.join(path, p["file"]), manifest["format"], columns, exact) for p in parts]
+        df = _finish(pd.concat(frames, ignore_index=True))
+    else:
+        df = _finish(_read_frame(path, _data_format(path), columns, exact))
+    if start is not None:
+        df = df.loc[df.index >= pd.Timestamp(start)]
+    if end is not None:
+        df = df.loc[df.index < pd.Timestamp(end) + pd.Timedelta(days=1)]
+    return df
+
+def _bounds(path: str):
+    if _is_partitioned(path):
+        parts = _manifest(path)["partitions"]
+        if not parts:
+            return None, None
+        return pd.Timestamp(parts[0]["start"]), pd.Timestamp(parts[-1]["end"])
+    idx = _load(path, columns=[]).index
+    return idx.min(), idx.max()
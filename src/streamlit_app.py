@@ -7,6 +7,7 @@ except ModuleNotFoundError:
 import json
 import hashlib
 import datetime as dt
+import numpy as np
 import pandas as pd
 import streamlit as st
 import plotly.express as px
@@ -14,29 +15,68 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import time
 import socket
+try:
+    from src import eda_script, fingerprint, prefix, registry, scenario, storage
+except ModuleNotFoundError:
+    import eda_script
+    import fingerprint
+    import prefix
+    import registry
+    import scenario
+    import storage
 
 st.set_page_config(layout="wide", page_title="汇率 (USD/CNY) 深度分析仪表盘")
+EDA_DIR = os.getenv("EDA_OUT_DIR") or os.path.join("output", "eda")
 
-def load_csv(pth: str) -> pd.DataFrame:
+def load_data(pth: str, start: dt.date = None, end: dt.date = None) -> pd.DataFrame:
     @st.cache_data(show_spinner=False)
-    def _load(path: str):
+    def _load(path: str, start: dt.date, end: dt.date):
         try:
             if path.startswith("http://") or path.startswith("https://"):
                 import urllib.request
                 import io
                 req = urllib.request.Request(path, headers={"User-Agent": "Mozilla/5.0"})
                 with urllib.request.urlopen(req) as resp:
-                    data = resp.read().decode("utf-8")
-                df = pd.read_csv(io.StringIO(data))
-            else:
-                df = pd.read_csv(path)
+                    data = resp.read()
+                fmt = storage._data_format(path.split("?", 1)[0])
+                return storage._finish(storage._read_frame(io.BytesIO(data), fmt))
+            return eda_script._load_df(path, start=start, end=end)
         except Exception as e:
             st.error(f"数据加载失败: {e}")
             return pd.DataFrame()
-        df["Date"] = pd.to_datetime(df["Date"]) 
-        df = df.sort_values("Date").set_index("Date")
-        return df
-    return _load(pth)
+    if not storage._is_partitioned(pth):
+        start, end = None, None
+    return _load(pth, start, end)
+
+def load_bounds(pth: str):
+    if storage._is_partitioned(pth):
+        lo, hi = storage._bounds(pth)
+    else:
+        df = load_data(pth)
+        lo, hi = (df.index.min(), df.index.max()) if not df.empty else (None, None)
+    if lo is None:
+        return None
+    return lo.date(), hi.date()
+
+def _mtime(pth: str) -> float:
+    return os.path.getmtime(os.path.join(pth, storage._MANIFEST) if storage._is_partitioned(pth) else pth)
+
+def default_data_path() -> str:
+    candidates = [os.path.join("output", "master_data" + ext) for ext in (".parquet", ".feather", ".csv")]
+    existing = [p for p in candidates if os.path.exists(p)]
+    if not existing:
+        return candidates[-1]
+    return max(existing, key=_mtime)
+
+def load_prefix_index(pth: str) -> dict:
+    @st.cache_resource(show_spinner=False)
+    def _load(idx_path: str, stamp: str, mtime: float):
+        idx = prefix._read(idx_path)
+        return idx if idx and str(idx["digest"]) == stamp else {}
+    idx_path = os.path.join(EDA_DIR, "prefix_index.npz")
+    if pth.startswith("http://") or pth.startswith("https://") or not os.path.exists(idx_path):
+        return {}
+    return _load(idx_path, fingerprint._stat_digest(pth), os.path.getmtime(idx_path))
 
 def load_json(pth: str):
     @st.cache_data(show_spinner=False)
@@ -47,6 +87,166 @@ def load_json(pth: str):
             return json.load(f)
     return _load(pth)
 
+def load_rolling(pth: str) -> pd.DataFrame:
+    @st.cache_data(show_spinner=False)
+    def _load(path: str, mtime: float):
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        df = pd.read_csv(path, index_col=0, parse_dates=True)
+        df.index.name = "Date"
+        return df
+    return _load(pth, os.path.getmtime(pth) if os.path.exists(pth) else 0.0)
+
+def rolling_windows(roll: pd.DataFrame) -> list[int]:
+    return sorted({int(c.split("_")[1]) for c in roll.columns if c.startswith("vol_")})
+
+def rolling_drivers(roll: pd.DataFrame, window: int) -> list[str]:
+    prefix = f"corr_{window}_"
+    return [c[len(prefix):] for c in roll.columns if c.startswith(prefix)]
+
+def render_rolling(roll: pd.DataFrame, window: int, drivers: list[str], kind: str, title: str):
+    cols = [f"vol_{window}"] if kind == "vol" else [f"{kind}_{window}_{d}" for d in drivers]
+    cols = [c for c in cols if c in roll.columns]
+    if not cols:
+        return
+    data = roll[cols].rename(columns=lambda c: c.split(f"_{window}", 1)[-1].lstrip("_") or c)
+    fig = px.line(data.reset_index(), x="Date", y=list(data.columns), title=title)
+    st.plotly_chart(fig, use_container_width=True)
+
+def load_leadlag(pth: str, start: dt.date, end: dt.date, full: bool) -> dict:
+    @st.cache_data(show_spinner=False)
+    def _load(path: str, mtime: float):
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    @st.cache_data(show_spinner=False)
+    def _compute(src: str, mtime: float, start: dt.date, end: dt.date):
+        return eda_script._leadlag(load_data(src, start, end), registry._load_registry())
+    art = os.path.join(EDA_DIR, "leadlag.json")
+    if full and os.path.exists(art):
+        return _load(art, os.path.getmtime(art))
+    return _compute(pth, _mtime(pth), start, end)
+
+def leadlag_peaks(ll: dict, basis: str, labels: dict) -> pd.DataFrame:
+    items = ll.get("bases", {}).get(basis, {})
+    rows = [{"driver": labels.get(k, k), "peak_lag": v["peak_lag"], "peak_corr": v["peak_corr"], "corr_0": v["corr_0"]} for k, v in items.items()]
+    return pd.DataFrame(rows).set_index("driver") if rows else pd.DataFrame()
+
+def render_leadlag(ll: dict, basis: str, drivers: list[str], title: str):
+    items = ll.get("bases", {}).get(basis, {})
+    data = pd.DataFrame({d: items[d]["corr"] for d in drivers if d in items}, index=ll.get("lags", []), dtype=float)
+    if data.empty:
+        return
+    data.index.name = "Lag"
+    fig = px.line(data.reset_index(), x="Lag", y=list(data.columns), title=title, markers=True)
+    fig.add_vline(x=0, line_dash="dot")
+    st.plotly_chart(fig, use_container_width=True)
+
+def load_breakpoints(pth: str, start: dt.date, end: dt.date) -> dict:
+    @st.cache_data(show_spinner=False)
+    def _load(path: str, mtime: float):
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    bp = _load(pth, os.path.getmtime(pth) if os.path.exists(pth) else 0.0)
+    s, e = pd.Timestamp(start), pd.Timestamp(end)
+    return {k: [b for b in bp.get(k, []) if s <= pd.Timestamp(b["date"]) <= e] for k in ("levels", "volatility")}
+
+def breaks_text(breaks: dict, lang: str) -> str:
+    lines = []
+    for b in breaks.get("levels", []):
+        lines.append(f"{b['date']} 趋势转折: 斜率 {b['slope_before']:+.4f} → {b['slope_after']:+.4f}/期, 水平 {b['value']:.4f}" if lang == "zh" else f"{b['date']} trend break: slope {b['slope_before']:+.4f} -> {b['slope_after']:+.4f}/period at {b['value']:.4f}")
+    for b in breaks.get("volatility", []):
+        lines.append(f"{b['date']} 波动率转折: {b['vol_before']:.4f} → {b['vol_after']:.4f}" if lang == "zh" else f"{b['date']} volatility break: {b['vol_before']:.4f} -> {b['vol_after']:.4f}")
+    if not lines:
+        return "无" if lang == "zh" else "none"
+    return "\n".join(sorted(lines))
+
+def load_forecast(pth: str) -> dict:
+    @st.cache_data(show_spinner=False)
+    def _load(path: str, mtime: float):
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return _load(pth, os.path.getmtime(pth) if os.path.exists(pth) else 0.0)
+
+def render_forecast(df: pd.DataFrame, fc: dict, col: str, model: str, title: str, labels: dict):
+    item = fc.get("series", {}).get(col, {})
+    res = item.get("models", {}).get(model)
+    if not res:
+        return
+    dates = pd.to_datetime(item["dates"])
+    hist = df[col].dropna().tail(3 * len(dates)) if col in df.columns else pd.Series(dtype=float)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=hist.index, y=hist.values, mode="lines", name=labels.get(col, col)))
+    fig.add_trace(go.Scatter(x=list(dates) + list(dates[::-1]), y=res["upper"] + res["lower"][::-1], fill="toself", line=dict(width=0), opacity=0.25, name=f"{fc.get('level', 0.95):.0%}", hoverinfo="skip"))
+    fig.add_trace(go.Scatter(x=dates, y=res["mean"], mode="lines", line=dict(dash="dash"), name=model.upper()))
+    fig.update_layout(title=title)
+    st.plotly_chart(fig, use_container_width=True)
+
+def load_scenario(pth: str) -> dict:
+    @st.cache_data(show_spinner=False)
+    def _load(path: str, mtime: float):
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return _load(pth, os.path.getmtime(pth) if os.path.exists(pth) else 0.0)
+
+def run_scenario(pth: str, shocks: dict, horizon: int, paths: int) -> dict:
+    @st.cache_data(show_spinner=False, max_entries=64)
+    def _run(path: str, mtime: float, shocks: tuple, horizon: int, paths: int):
+        cal = load_scenario(path)
+        levels = scenario._simulate(cal, dict(shocks), horizon, paths, cal.get("seed", 0))
+        return scenario._summary(levels, cal["last_value"])
+    return _run(pth, os.path.getmtime(pth), tuple(sorted(shocks.items())), horizon, paths)
+
+def render_fan(summary: dict, last_value: float, title: str, labels: dict):
+    fan = summary["fan"]
+    x = [0] + fan["steps"]
+    band = lambda p: [last_value] + fan[p]
+    fig = go.Figure()
+    for lo, hi, op in (("5", "95", 0.15), ("25", "75", 0.3)):
+        fig.add_trace(go.Scatter(x=x + x[::-1], y=band(hi) + band(lo)[::-1], fill="toself", line=dict(width=0), opacity=op, name=f"P{lo}-P{hi}", hoverinfo="skip"))
+    fig.add_trace(go.Scatter(x=x, y=band("50"), mode="lines", name="P50"))
+    fig.update_layout(title=title, xaxis_title=labels.get("x", ""))
+    st.plotly_chart(fig, use_container_width=True)
+
+def risk_table(summary: dict, lang: str) -> pd.DataFrame:
+    df = pd.DataFrame(summary["risk"]).T
+    names = {"var_up": "VaR（人民币贬值）", "es_up": "ES（人民币贬值）", "var_down": "VaR（人民币升值）", "es_down": "ES（人民币升值）"} if lang == "zh" else {"var_up": "VaR (CNY depreciation)", "es_up": "ES (CNY depreciation)", "var_down": "VaR (CNY appreciation)", "es_down": "ES (CNY appreciation)"}
+    return df.rename(columns=names)
+
+def scenario_text(summary: dict, shocks: dict, horizon: int, lang: str) -> str:
+    r = summary["risk"].get("95%", {})
+    shock = ", ".join(f"{k} {v:+.2f}" for k, v in shocks.items() if v) or ("无冲击" if lang == "zh" else "no shock")
+    if lang == "zh":
+        return f"蒙特卡洛情景（{horizon} 期，{shock}）：期末收益均值 {summary['mean_return']:+.2%}，上涨概率 {summary['prob_up']:.0%}，95% VaR 贬值 {r.get('var_up', 0):.2%} / 升值 {r.get('var_down', 0):.2%}，95% ES 贬值 {r.get('es_up', 0):.2%} / 升值 {r.get('es_down', 0):.2%}"
+    return f"Monte Carlo scenario ({horizon} periods, {shock}): mean terminal return {summary['mean_return']:+.2%}, P(up) {summary['prob_up']:.0%}, 95% VaR depreciation {r.get('var_up', 0):.2%} / appreciation {r.get('var_down', 0):.2%}, 95% ES depreciation {r.get('es_up', 0):.2%} / appreciation {r.get('es_down', 0):.2%}"
+
+def load_granger(pth: str) -> dict:
+    @st.cache_data(show_spinner=False)
+    def _load(path: str, mtime: float):
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return _load(pth, os.path.getmtime(pth) if os.path.exists(pth) else 0.0)
+
+def render_granger(gr: dict, labels: dict, title: str):
+    rank = pd.DataFrame(gr.get("ranking", []))
+    if rank.empty:
+        return rank
+    rank["driver"] = rank["driver"].map(lambda x: labels.get(x, x))
+    rank["-log10(p)"] = -np.log10(rank["p_value"].clip(lower=1e-300))
+    fig = px.bar(rank, x="driver", y="-log10(p)", hover_data=["lag", "f", "p_value", "reverse_p_value"], title=title)
+    fig.add_hline(y=-np.log10(0.05), line_dash="dot")
+    st.plotly_chart(fig, use_container_width=True)
+    return rank.set_index("driver")[["lag", "f", "p_value", "reverse_p_value", "min_p_lag", "min_p_value", "nobs"]]
+
 def filter_by_date(df: pd.DataFrame, start: dt.date, end: dt.date) -> pd.DataFrame:
     if df.empty:
         return df
@@ -55,9 +255,9 @@ def filter_by_date(df: pd.DataFrame, start: dt.date, end: dt.date) -> pd.DataFra
     return df.loc[(df.index >= s) & (df.index < e)]
 
 def render_kpis(kpis: dict):
-    cols = st.columns(4)
+    keys = registry._load_registry()["headline_kpis"]
+    cols = st.columns(len(keys))
     items = kpis.get("items", {})
-    keys = ["USD_CNY_Rate", "US_Interest_Rate", "CN_LPR", "Gold_Price"]
     for i, k in enumerate(keys):
         it = items.get(k, {})
         val = it.get("value")
@@ -72,8 +272,11 @@ def render_dual_axis(df: pd.DataFrame, y1: str, y2: str, title: str):
     fig.update_layout(title=title, legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
     st.plotly_chart(fig, use_container_width=True)
 
-def render_line(df: pd.DataFrame, col: str, title: str):
+def render_line(df: pd.DataFrame, col: str, title: str, breaks: dict = None):
     fig = px.line(df.reset_index(), x="Date", y=col, title=title)
+    for kind, dash, color in (("levels", "solid", "firebrick"), ("volatility", "dash", "darkorange")):
+        for b in (breaks or {}).get(kind, []):
+            fig.add_vline(x=b["date"], line_dash=dash, line_color=color, opacity=0.6)
     st.plotly_chart(fig, use_container_width=True)
 
 def render_scatter(df: pd.DataFrame, x_col: str, y_col: str, title: str):
@@ -117,7 +320,7 @@ def _fp(chart_id: str, lang: str, s: dt.date, e: dt.date, params: dict) -> str:
 def _ai_cache_load() -> dict:
     if "ai_chart_cache" in st.session_state:
         return st.session_state["ai_chart_cache"]
-    p = os.path.join("output", "eda", "ai_chart_cache.json")
+    p = os.path.join(EDA_DIR, "ai_chart_cache.json")
     if os.path.exists(p):
         try:
             with open(p, "r", encoding="utf-8") as f:
@@ -129,7 +332,7 @@ def _ai_cache_load() -> dict:
     return st.session_state["ai_chart_cache"]
 
 def _ai_cache_save():
-    p = os.path.join("output", "eda", "ai_chart_cache.json")
+    p = os.path.join(EDA_DIR, "ai_chart_cache.json")
     os.makedirs(os.path.dirname(p), exist_ok=True)
     with open(p, "w", encoding="utf-8") as f:
         json.dump(st.session_state.get("ai_chart_cache", {}), f, ensure_ascii=False, indent=2)
@@ -148,7 +351,8 @@ def _reanalyze(chart_id: str, lang: str, df_f: pd.DataFrame, api_key: str, TEXT:
         s = df_f["USD_CNY_Rate"].dropna()
         desc = s.describe().to_string()
         head = df_f[["USD_CNY_Rate"]].head().to_string()
-        prompt = (f"你是一个金融分析师。基于以下统计数据与数据摘要，分析 USD/CNY 汇率在所选时间范围内的趋势、波动性和关键转折点。\n\n统计:\n{desc}\n\n数据摘要:\n{head}" if lang == "zh" else f"You are a financial analyst. Analyze USD/CNY trend, volatility and turning points based on stats and snippet.\n\nStats:\n{desc}\n\nSnippet:\n{head}")
+        bp = breaks_text(load_breakpoints(os.path.join(EDA_DIR, "breakpoints.json"), start_date, end_date), lang)
+        prompt = (f"你是一个金融分析师。基于以下统计数据、检测到的结构性断点与数据摘要，分析 USD/CNY 汇率在所选时间范围内的趋势、波动性和关键转折点。\n\n统计:\n{desc}\n\n结构性断点:\n{bp}\n\n数据摘要:\n{head}" if lang == "zh" else f"You are a financial analyst. Analyze USD/CNY trend, volatility and turning points based on stats, detected structural breaks and snippet.\n\nStats:\n{desc}\n\nStructural breaks:\n{bp}\n\nSnippet:\n{head}")
     elif chart_id == "rate_comp":
         c = df_f["US_Interest_Rate"].corr(df_f["CN_LPR"]) if "US_Interest_Rate" in df_f.columns and "CN_LPR" in df_f.columns else None
         sp = None
@@ -164,8 +368,7 @@ def _reanalyze(chart_id: str, lang: str, df_f: pd.DataFrame, api_key: str, TEXT:
         head = df_f[["Gold_Price"]].head().to_string()
         prompt = (f"你是一个金融分析师。基于以下统计与数据摘要，分析黄金价格在所选时间范围内的趋势与波动性。\n\n统计:\n{desc}\n\n数据摘要:\n{head}" if lang == "zh" else f"You are a financial analyst. Analyze gold price trend and volatility based on stats and snippet.\n\nStats:\n{desc}\n\nSnippet:\n{head}")
     elif chart_id == "corr_matrix":
-        cols = ["USD_CNY_Rate","US_Interest_Rate","CN_LPR","US_CPI","CN_CPI","Gold_Price","SP500_Close","CN_M2","CN_Stock_Price","Interest_Spread"]
-        use = [c for c in cols if c in df_f.columns]
+        use = [c for c in registry._dashboard_cols(registry._load_registry()) if c in df_f.columns]
         js = df_f[use].corr().to_json()
         prompt = (f"这是相关性矩阵(JSON): {js}。请找出与 USD/CNY_Rate 相关性最强(正或负)的三个变量，并解释含义。" if lang == "zh" else f"This is the correlation matrix (JSON): {js}. Find the top 3 variables most correlated (pos/neg) with USD_CNY_Rate and explain.")
     elif chart_id == "spread_fx":
@@ -241,6 +444,13 @@ def compute_summary_stats(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
     out = pd.DataFrame(res)
     return out.round(4)
 
+def range_kpis(idx: dict, start: dt.date, end: dt.date, keys: list[str]) -> dict:
+    items: dict[str, dict] = {}
+    for k, (val, prev) in prefix._latest(idx, start, end, keys).items():
+        mom_pct = (val - prev) / abs(prev) if prev else None
+        items[k] = {"value": val, "mom_pct": mom_pct}
+    return {"items": items}
+
 def render_summary_stats(stats_df: pd.DataFrame, info_text: str):
     if stats_df is None or stats_df.empty:
         st.info(info_text)
@@ -303,6 +513,41 @@ def main():
             "m2_trend": "中国 M2 趋势",
             "corr_heat": "相关性热图",
             "corr_unavail": "相关性数据不可用",
+            "rolling": "滚动分析",
+            "rolling_window": "滚动窗口（期）",
+            "rolling_drivers": "驱动因素",
+            "rolling_unavail": "滚动分析数据不可用，请先运行 EDA",
+            "chart_rolling_vol": "USD/CNY 滚动波动率",
+            "chart_rolling_corr": "USD/CNY 与驱动因素的滚动相关性",
+            "chart_rolling_beta": "USD/CNY 对驱动因素的滚动 Beta",
+            "breaks_note": "实线：趋势结构性断点；虚线：波动率结构性断点（变点检测）",
+            "leadlag": "领先/滞后分析",
+            "leadlag_basis": "口径",
+            "leadlag_levels": "水平值",
+            "leadlag_returns": "变化率",
+            "leadlag_unavail": "领先/滞后分析数据不可用",
+            "leadlag_note": "正滞后表示驱动因素领先 USD/CNY 相应期数",
+            "chart_leadlag": "USD/CNY 与驱动因素的互相关（按滞后期）",
+            "forecast": "预测",
+            "forecast_series": "预测序列",
+            "forecast_model": "模型",
+            "forecast_unavail": "预测结果不可用，请先运行 EDA",
+            "forecast_note": "基于截至最新数据的全样本模型，阴影为预测区间",
+            "chart_forecast": "多期预测",
+            "scenario": "情景模拟",
+            "scenario_unavail": "情景模型不可用，请先运行 EDA",
+            "scenario_horizon": "期限（期）",
+            "scenario_paths": "路径数",
+            "scenario_shock": "累计冲击",
+            "scenario_prob_up": "上涨概率",
+            "scenario_mean": "期末收益均值",
+            "scenario_x": "未来期数",
+            "scenario_note": "基于历史收益动态（AR(1) + 利差/通胀差变化敏感度）与残差自助抽样模拟 USD/CNY 路径；冲击在期限内均匀施加",
+            "chart_scenario": "USD/CNY 情景分位扇形图",
+            "granger": "Granger 因果检验",
+            "granger_unavail": "Granger 检验结果不可用，请先运行 EDA",
+            "granger_note": "基于全样本变化率的双变量 VAR，滞后阶数按 AIC 选取；虚线为 5% 显著性水平",
+            "chart_granger": "驱动因素对 USD/CNY 的 Granger 因果显著性",
             "summary_stats": "总结统计",
             "stats_unavail": "统计数据不可用",
             "stats_select_cols": "选择统计字段",
@@ -353,6 +598,41 @@ def main():
             "m2_trend": "China M2 Trend",
             "corr_heat": "Correlation Heatmap",
             "corr_unavail": "Correlation data unavailable",
+            "rolling": "Rolling Analytics",
+            "rolling_window": "Rolling window (periods)",
+            "rolling_drivers": "Drivers",
+            "rolling_unavail": "Rolling analytics unavailable, run EDA first",
+            "chart_rolling_vol": "USD/CNY Rolling Volatility",
+            "chart_rolling_corr": "Rolling Correlation of USD/CNY with Drivers",
+            "chart_rolling_beta": "Rolling Beta of USD/CNY to Drivers",
+            "breaks_note": "Solid lines: trend breaks; dashed lines: volatility breaks (change-point detection)",
+            "leadlag": "Lead/Lag Analysis",
+            "leadlag_basis": "Basis",
+            "leadlag_levels": "Levels",
+            "leadlag_returns": "Changes",
+            "leadlag_unavail": "Lead/lag analysis unavailable",
+            "leadlag_note": "A positive lag means the driver leads USD/CNY by that many periods",
+            "chart_leadlag": "Cross-correlation of USD/CNY with Drivers by Lag",
+            "forecast": "Forecasts",
+            "forecast_series": "Series",
+            "forecast_model": "Model",
+            "forecast_unavail": "Forecasts unavailable, run EDA first",
+            "forecast_note": "Full-sample models fitted on data up to the latest period; shaded band is the prediction interval",
+            "chart_forecast": "Multi-horizon Forecast",
+            "scenario": "Scenario Simulation",
+            "scenario_unavail": "Scenario model unavailable, run EDA first",
+            "scenario_horizon": "Horizon (periods)",
+            "scenario_paths": "Paths",
+            "scenario_shock": "Cumulative shock",
+            "scenario_prob_up": "P(up)",
+            "scenario_mean": "Mean terminal return",
+            "scenario_x": "Periods ahead",
+            "scenario_note": "USD/CNY paths simulated from historical return dynamics (AR(1) plus sensitivity to spread changes) with bootstrapped residuals; shocks are spread evenly over the horizon",
+            "chart_scenario": "USD/CNY Scenario Percentile Fan",
+            "granger": "Granger Causality",
+            "granger_unavail": "Granger results unavailable, run EDA first",
+            "granger_note": "Bivariate VARs on full-sample changes, lag order chosen by AIC; dotted line marks 5% significance",
+            "chart_granger": "Granger Causality Significance of Drivers for USD/CNY",
             "summary_stats": "Summary Stats",
             "stats_unavail": "Summary data unavailable",
             "stats_select_cols": "Select fields",
@@ -390,30 +670,8 @@ def main():
             "ai_clear_this": "Clear this analysis",
         },
     }
-    KPI_LABELS = {
-        "zh": {
-            "USD_CNY_Rate": "USD/CNY 汇率",
-            "US_Interest_Rate": "美国利率",
-            "CN_LPR": "中国LPR",
-            "Gold_Price": "黄金价格",
-            "SP500_Close": "标普500收盘",
-            "CN_M2": "中国M2",
-            "US_CPI": "美国CPI",
-            "CN_CPI": "中国CPI",
-            "CN_Stock_Price": "中国股市指数",
-        },
-        "en": {
-            "USD_CNY_Rate": "USD/CNY Rate",
-            "US_Interest_Rate": "US Interest Rate",
-            "CN_LPR": "CN LPR",
-            "Gold_Price": "Gold Price",
-            "SP500_Close": "S&P 500 Close",
-            "CN_M2": "China M2",
-            "US_CPI": "US CPI",
-            "CN_CPI": "China CPI",
-            "CN_Stock_Price": "China Stock Index",
-        },
-    }
+    reg = registry._load_registry()
+    KPI_LABELS = {"zh": registry._labels(reg, "zh"), "en": registry._labels(reg, "en")}
     if "lang" not in st.session_state:
         st.session_state["lang"] = "中文"
     lang_choice = st.sidebar.selectbox("Language / 语言", ["中文", "English"], index=0 if st.session_state["lang"] == "中文" else 1)
@@ -426,22 +684,20 @@ def main():
     except Exception:
         pass
     data_url = st.sidebar.text_input("数据源 URL (Gist Raw)", value=default_url)
-    src_path = data_url if data_url else os.path.join("output", "master_data.csv")
+    src_path = data_url if data_url else default_data_path()
     if not (data_url.startswith("http://") or data_url.startswith("https://")) and not os.path.exists(src_path):
         st.error("未找到数据文件。请在侧边栏输入 Gist Raw URL 或在 Secrets 设置 DATA_URL。")
         st.stop()
-    df = load_csv(src_path)
-    if df.empty:
+    bounds = load_bounds(src_path)
+    if bounds is None:
         st.stop()
-    df["Interest_Spread"] = df["US_Interest_Rate"] - df["CN_LPR"]
-    kpis = load_json(os.path.join("output", "eda", "kpis.json"))
+    kpis = load_json(os.path.join(EDA_DIR, "kpis.json"))
     corr_df = None
-    corr_path = os.path.join("output", "eda", "correlation.csv")
+    corr_path = os.path.join(EDA_DIR, "correlation.csv")
     if os.path.exists(corr_path):
         corr_df = pd.read_csv(corr_path, index_col=0)
     st.sidebar.title(TEXT[lang]["filters"])
-    date_min = df.index.min().date() if not df.empty else dt.date(2000, 1, 1)
-    date_max = df.index.max().date() if not df.empty else dt.date.today()
+    date_min, date_max = bounds
     date_range = st.sidebar.date_input(TEXT[lang]["date_range"], (date_min, date_max))
     api_key_default = os.environ.get("GEMINI_API_KEY", os.environ.get("Gemini_API_KEY", ""))
     try:
@@ -456,40 +712,26 @@ def main():
     else:
         st.sidebar.caption("⚠️ 未检测到 API Key")
         api_key = st.sidebar.text_input(TEXT[lang]["api_key"], type="password")
-    selectable_cols = [
-        "USD_CNY_Rate",
-        "US_Interest_Rate",
-        "CN_LPR",
-        "US_CPI",
-        "CN_CPI",
-        "Gold_Price",
-        "SP500_Close",
-        "CN_M2",
-        "CN_Stock_Price",
-        "Interest_Spread",
-    ]
+    start_date, end_date = date_range if isinstance(date_range, tuple) and len(date_range) == 2 else (date_min, date_max)
+    df = load_data(src_path, start_date, end_date)
+    if df.empty:
+        st.stop()
+    df = registry._add_derived(reg, df, registry._dashboard_cols(reg))
+    selectable_cols = registry._dashboard_cols(reg)
     available_cols = [c for c in selectable_cols if c in df.columns]
     selected_stats_cols = st.sidebar.multiselect(TEXT[lang]["stats_select_cols"], options=available_cols, default=available_cols[:4])
-    start_date, end_date = date_range if isinstance(date_range, tuple) else (date_min, date_max)
     df_f = filter_by_date(df, start_date, end_date)
-    if corr_df is None or corr_df.empty:
-        corr_cols = [
-            "USD_CNY_Rate",
-            "US_Interest_Rate",
-            "CN_LPR",
-            "US_CPI",
-            "CN_CPI",
-            "Gold_Price",
-            "SP500_Close",
-            "CN_M2",
-            "CN_Stock_Price",
-            "Interest_Spread",
-        ]
+    pidx = load_prefix_index(src_path)
+    pidx = prefix._window(pidx, df_f, start_date, end_date) if pidx else {}
+    corr_cols = registry._dashboard_cols(reg)
+    if pidx:
+        corr_df = prefix._corr(pidx, start_date, end_date, corr_cols)
+    elif corr_df is None or corr_df.empty:
         corr_df = compute_corr(df_f, corr_cols)
     tab1, tab2 = st.tabs([TEXT[lang]["tab_dashboard"], TEXT[lang]["tab_ai"]])
     with tab1:
-        kpi_keys = list(KPI_LABELS[lang].keys())
-        computed = compute_kpis(df_f, kpi_keys)
+        kpi_keys = [k for k in reg["kpi_fields"] if k in KPI_LABELS[lang]]
+        computed = range_kpis(pidx, start_date, end_date, kpi_keys) if pidx else compute_kpis(df_f, kpi_keys)
         items = {}
         for k in kpi_keys:
             src = kpis.get("items", {}).get(k, {}) if kpis else {}
@@ -501,7 +743,10 @@ def main():
             }
         render_kpis({"items": items})
         st.subheader(TEXT[lang]["core_trends"])
-        render_line(df_f, "USD_CNY_Rate", TEXT[lang]["chart_fx_trend"])
+        breaks = load_breakpoints(os.path.join(EDA_DIR, "breakpoints.json"), start_date, end_date)
+        render_line(df_f, "USD_CNY_Rate", TEXT[lang]["chart_fx_trend"], breaks)
+        if breaks["levels"] or breaks["volatility"]:
+            st.caption(TEXT[lang]["breaks_note"])
         _ai_cache_show("fx_trend", start_date, end_date, {}, TEXT, df_f, api_key)
         if st.button(TEXT[lang]["btn_fx_trend"]):
             s = df_f["USD_CNY_Rate"].dropna()
@@ -512,10 +757,11 @@ def main():
             else:
                 desc = s.describe().to_string()
                 head = df_f[["USD_CNY_Rate"]].head().to_string()
+                bp = breaks_text(breaks, lang)
                 if lang == "zh":
-                    prompt = f"你是一个金融分析师。基于以下统计数据与数据摘要，分析 USD/CNY 汇率在所选时间范围内的趋势、波动性和关键转折点。\n\n统计:\n{desc}\n\n数据摘要:\n{head}"
+                    prompt = f"你是一个金融分析师。基于以下统计数据、检测到的结构性断点与数据摘要，分析 USD/CNY 汇率在所选时间范围内的趋势、波动性和关键转折点。\n\n统计:\n{desc}\n\n结构性断点:\n{bp}\n\n数据摘要:\n{head}"
                 else:
-                    prompt = f"You are a financial analyst. Analyze USD/CNY trend, volatility and turning points based on stats and snippet.\n\nStats:\n{desc}\n\nSnippet:\n{head}"
+                    prompt = f"You are a financial analyst. Analyze USD/CNY trend, volatility and turning points based on stats, detected structural breaks and snippet.\n\nStats:\n{desc}\n\nStructural breaks:\n{bp}\n\nSnippet:\n{head}"
                 resp = run_gemini(prompt, df_f, api_key, lang)
                 with st.expander(TEXT[lang]["ai_cached"] + f" | {TEXT[lang]['ai_based_on_range']}: " + _range_str(start_date, end_date)):
                     st.write(resp)
@@ -528,7 +774,7 @@ def main():
                 entry = {"time": ts, "question": "FX Trend", "summary": summ, "detail": resp}
                 st.session_state["ai_history"].append(entry)
                 st.session_state["ai_history"] = st.session_state["ai_history"][-7:]
-                save_path = os.path.join("output", "eda", "ai_history.json")
+                save_path = os.path.join(EDA_DIR, "ai_history.json")
                 os.makedirs(os.path.dirname(save_path), exist_ok=True)
                 with open(save_path, "w", encoding="utf-8") as f:
                     import json as _json
@@ -572,7 +818,7 @@ def main():
                 entry = {"time": ts, "question": "Rate Comparison", "summary": summ, "detail": resp}
                 st.session_state["ai_history"].append(entry)
                 st.session_state["ai_history"] = st.session_state["ai_history"][-7:]
-                save_path = os.path.join("output", "eda", "ai_history.json")
+                save_path = os.path.join(EDA_DIR, "ai_history.json")
                 os.makedirs(os.path.dirname(save_path), exist_ok=True)
                 with open(save_path, "w", encoding="utf-8") as f:
                     import json as _json
@@ -612,7 +858,7 @@ def main():
                 entry = {"time": ts, "question": "CPI Comparison", "summary": summ, "detail": resp}
                 st.session_state["ai_history"].append(entry)
                 st.session_state["ai_history"] = st.session_state["ai_history"][-7:]
-                save_path = os.path.join("output", "eda", "ai_history.json")
+                save_path = os.path.join(EDA_DIR, "ai_history.json")
                 os.makedirs(os.path.dirname(save_path), exist_ok=True)
                 with open(save_path, "w", encoding="utf-8") as f:
                     import json as _json
@@ -651,7 +897,7 @@ def main():
                 entry = {"time": ts, "question": "Gold Trend", "summary": summ, "detail": resp}
                 st.session_state["ai_history"].append(entry)
                 st.session_state["ai_history"] = st.session_state["ai_history"][-7:]
-                save_path = os.path.join("output", "eda", "ai_history.json")
+                save_path = os.path.join(EDA_DIR, "ai_history.json")
                 os.makedirs(os.path.dirname(save_path), exist_ok=True)
                 with open(save_path, "w", encoding="utf-8") as f:
                     import json as _json
@@ -668,8 +914,7 @@ def main():
         render_heatmap(corr_df if corr_df is not None else pd.DataFrame(), TEXT[lang]["corr_heat"], TEXT[lang]["corr_unavail"])
         _ai_cache_show("corr_matrix", start_date, end_date, {}, TEXT, df_f, api_key)
         if st.button(TEXT[lang]["btn_corr_matrix"]):
-            cols = ["USD_CNY_Rate","US_Interest_Rate","CN_LPR","US_CPI","CN_CPI","Gold_Price","SP500_Close","CN_M2","CN_Stock_Price","Interest_Spread"]
-            use = [c for c in cols if c in df_f.columns]
+            use = [c for c in selectable_cols if c in df_f.columns]
             if not use:
                 st.info(TEXT[lang]["corr_unavail"])
             elif not api_key:
@@ -692,7 +937,7 @@ def main():
                 entry = {"time": ts, "question": "Correlation Matrix", "summary": summ, "detail": resp}
                 st.session_state["ai_history"].append(entry)
                 st.session_state["ai_history"] = st.session_state["ai_history"][-7:]
-                save_path = os.path.join("output", "eda", "ai_history.json")
+                save_path = os.path.join(EDA_DIR, "ai_history.json")
                 os.makedirs(os.path.dirname(save_path), exist_ok=True)
                 with open(save_path, "w", encoding="utf-8") as f:
                     import json as _json
@@ -702,8 +947,75 @@ def main():
                 fpv = _fp("fx_hist", lang, start_date, end_date, {})
                 cache[key] = {"fingerprint": fpv, "detail": resp, "summary": summ, "time": ts}
                 _ai_cache_save()
+        st.subheader(TEXT[lang]["rolling"])
+        roll = filter_by_date(load_rolling(os.path.join(EDA_DIR, "rolling.csv")), start_date, end_date)
+        windows = rolling_windows(roll)
+        if roll.empty or not windows:
+            st.info(TEXT[lang]["rolling_unavail"])
+        else:
+            c1, c2 = st.columns([1, 3])
+            window = c1.selectbox(TEXT[lang]["rolling_window"], windows, index=len(windows) // 2)
+            drivers = rolling_drivers(roll, window)
+            default_drivers = [d for d in reg["correlations"] if d in drivers] or drivers[:3]
+            chosen = c2.multiselect(TEXT[lang]["rolling_drivers"], options=drivers, default=default_drivers, format_func=lambda x: KPI_LABELS[lang].get(x, x))
+            render_rolling(roll, window, chosen, "vol", TEXT[lang]["chart_rolling_vol"])
+            render_rolling(roll, window, chosen, "corr", TEXT[lang]["chart_rolling_corr"])
+            render_rolling(roll, window, chosen, "beta", TEXT[lang]["chart_rolling_beta"])
+        st.subheader(TEXT[lang]["leadlag"])
+        ll = load_leadlag(src_path, start_date, end_date, (start_date, end_date) == (date_min, date_max))
+        ll_drivers = list(ll.get("bases", {}).get("levels", {}))
+        if not ll_drivers:
+            st.info(TEXT[lang]["leadlag_unavail"])
+        else:
+            c1, c2 = st.columns([1, 3])
+            basis = c1.radio(TEXT[lang]["leadlag_basis"], ["returns", "levels"], format_func=lambda x: TEXT[lang][f"leadlag_{x}"])
+            default_drivers = [d for d in reg["correlations"] if d in ll_drivers] or ll_drivers[:3]
+            chosen = c2.multiselect(TEXT[lang]["rolling_drivers"], options=ll_drivers, default=default_drivers, format_func=lambda x: KPI_LABELS[lang].get(x, x), key="leadlag_drivers")
+            render_leadlag(ll, basis, chosen, TEXT[lang]["chart_leadlag"])
+            st.caption(TEXT[lang]["leadlag_note"])
+            st.dataframe(leadlag_peaks(ll, basis, KPI_LABELS[lang]).round(4), use_container_width=True)
+        st.subheader(TEXT[lang]["forecast"])
+        fc = load_forecast(os.path.join(EDA_DIR, "forecast.json"))
+        fc_series = list(fc.get("series", {}))
+        if not fc_series:
+            st.info(TEXT[lang]["forecast_unavail"])
+        else:
+            c1, c2 = st.columns([3, 1])
+            fc_col = c1.selectbox(TEXT[lang]["forecast_series"], fc_series, format_func=lambda x: KPI_LABELS[lang].get(x, x))
+            fc_models = list(fc["series"][fc_col]["models"])
+            fc_model = c2.radio(TEXT[lang]["forecast_model"], fc_models, format_func=str.upper, horizontal=True) if fc_models else None
+            if fc_model:
+                render_forecast(df, fc, fc_col, fc_model, f"{KPI_LABELS[lang].get(fc_col, fc_col)} · {TEXT[lang]['chart_forecast']}", KPI_LABELS[lang])
+            st.caption(TEXT[lang]["forecast_note"])
+        st.subheader(TEXT[lang]["scenario"])
+        sc_path = os.path.join(EDA_DIR, "scenario.json")
+        cal = load_scenario(sc_path)
+        if not cal:
+            st.info(TEXT[lang]["scenario_unavail"])
+        else:
+            cols = st.columns(len(cal["factors"]) + 2)
+            shocks = {}
+            for i, f in enumerate(cal["factors"]):
+                shocks[f] = cols[i].number_input(f"{TEXT[lang]['scenario_shock']}: {KPI_LABELS[lang].get(f, f)}", value=0.0, step=0.25, format="%.2f", key=f"shock_{f}")
+            horizon = cols[-2].number_input(TEXT[lang]["scenario_horizon"], min_value=1, max_value=max(4 * cal["horizon"], 12), value=cal["horizon"], step=1)
+            paths = cols[-1].selectbox(TEXT[lang]["scenario_paths"], [10000, 50000, 100000], index=2)
+            summ = run_scenario(sc_path, shocks, int(horizon), int(paths))
+            st.session_state["scenario_text"] = {lg: scenario_text(summ, shocks, int(horizon), lg) for lg in ("zh", "en")}
+            m1, m2 = st.columns(2)
+            m1.metric(TEXT[lang]["scenario_mean"], f"{summ['mean_return']:+.2%}")
+            m2.metric(TEXT[lang]["scenario_prob_up"], f"{summ['prob_up']:.0%}")
+            render_fan(summ, cal["last_value"], TEXT[lang]["chart_scenario"], {"x": TEXT[lang]["scenario_x"]})
+            st.dataframe(risk_table(summ, lang).style.format("{:.2%}"), use_container_width=True)
+            st.caption(TEXT[lang]["scenario_note"])
+        st.subheader(TEXT[lang]["granger"])
+        gr_rank = render_granger(load_granger(os.path.join(EDA_DIR, "granger.json")), KPI_LABELS[lang], TEXT[lang]["chart_granger"])
+        if gr_rank.empty:
+            st.info(TEXT[lang]["granger_unavail"])
+        else:
+            st.caption(TEXT[lang]["granger_note"])
+            st.dataframe(gr_rank.round(4), use_container_width=True)
         st.subheader(TEXT[lang]["summary_stats"]) 
-        stats_df = compute_summary_stats(df_f, selected_stats_cols)
+        stats_df = prefix._summary(pidx, start_date, end_date, selected_stats_cols).round(4) if pidx else compute_summary_stats(df_f, selected_stats_cols)
         render_summary_stats(stats_df, TEXT[lang]["stats_unavail"]) 
         st.subheader(TEXT[lang]["spread_fx"])
         render_scatter(df_f, "Interest_Spread", "USD_CNY_Rate", TEXT[lang]["chart_spread_fx"])
@@ -731,7 +1043,7 @@ def main():
                 entry = {"time": ts, "question": "Spread vs FX", "summary": summ, "detail": resp}
                 st.session_state["ai_history"].append(entry)
                 st.session_state["ai_history"] = st.session_state["ai_history"][-7:]
-                save_path = os.path.join("output", "eda", "ai_history.json")
+                save_path = os.path.join(EDA_DIR, "ai_history.json")
                 os.makedirs(os.path.dirname(save_path), exist_ok=True)
                 with open(save_path, "w", encoding="utf-8") as f:
                     import json as _json
@@ -764,7 +1076,7 @@ def main():
                 entry = {"time": ts, "question": "FX Histogram", "summary": summ, "detail": resp}
                 st.session_state["ai_history"].append(entry)
                 st.session_state["ai_history"] = st.session_state["ai_history"][-7:]
-                save_path = os.path.join("output", "eda", "ai_history.json")
+                save_path = os.path.join(EDA_DIR, "ai_history.json")
                 os.makedirs(os.path.dirname(save_path), exist_ok=True)
                 with open(save_path, "w", encoding="utf-8") as f:
                     import json as _json
@@ -772,7 +1084,7 @@ def main():
     if "ai_query" not in st.session_state:
         st.session_state["ai_query"] = ""
     if "ai_history" not in st.session_state:
-        hist_path = os.path.join("output", "eda", "ai_history.json")
+        hist_path = os.path.join(EDA_DIR, "ai_history.json")
         h = load_json(hist_path)
         if isinstance(h, list):
             st.session_state["ai_history"] = h[-3:]
@@ -802,7 +1114,9 @@ def main():
             st.session_state["ai_query"] = sel
         q = st.text_area(TEXT[lang]["enter_question"], key="ai_query")
         if c2.button(TEXT[lang]["gen_analysis"]):
-            resp = run_gemini(q, df_f, api_key, lang)
+            bp = breaks_text(load_breakpoints(os.path.join(EDA_DIR, "breakpoints.json"), start_date, end_date), lang)
+            sc_txt = st.session_state.get("scenario_text", {}).get(lang, "")
+            resp = run_gemini(q + (f"\n\n已检测到的 USD/CNY 结构性断点:\n{bp}" if lang == "zh" else f"\n\nDetected USD/CNY structural breaks:\n{bp}") + (f"\n\n{sc_txt}" if sc_txt else ""), df_f, api_key, lang)
             st.write(resp)
             ts = time.strftime("%Y-%m-%d %H:%M:%S")
             summ = resp.strip()
@@ -811,7 +1125,7 @@ def main():
             entry = {"time": ts, "question": q, "summary": summ, "detail": resp}
             st.session_state["ai_history"].append(entry)
             st.session_state["ai_history"] = st.session_state["ai_history"][-3:]
-            save_path = os.path.join("output", "eda", "ai_history.json")
+            save_path = os.path.join(EDA_DIR, "ai_history.json")
             os.makedirs(os.path.dirname(save_path), exist_ok=True)
             with open(save_path, "w", encoding="utf-8") as f:
                 import json as _json
@@ -821,7 +1135,7 @@ def main():
         c_del_all, c_del_last = st.columns([1,1])
         if c_del_all.button(TEXT[lang]["clear_history"]):
             st.session_state["ai_history"] = []
-            save_path = os.path.join("output", "eda", "ai_history.json")
+            save_path = os.path.join(EDA_DIR, "ai_history.json")
             os.makedirs(os.path.dirname(save_path), exist_ok=True)
             with open(save_path, "w", encoding="utf-8") as f:
                 import json as _json
@@ -830,7 +1144,7 @@ def main():
         if c_del_last.button(TEXT[lang]["delete_last"]):
             if st.session_state.get("ai_history"):
                 st.session_state["ai_history"].pop()
-                save_path = os.path.join("output", "eda", "ai_history.json")
+                save_path = os.path.join(EDA_DIR, "ai_history.json")
                 os.makedirs(os.path.dirname(save_path), exist_ok=True)
                 with open(save_path, "w", encoding="utf-8") as f:
                     import json as _json
@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+from src import bootstrap
+
+def _pair(n: int = 240, seed: int = 0, rho: float = 0.6):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(0, 1, n)
+    y = rho * x + np.sqrt(1 - rho * rho) * rng.normal(0, 1, n)
+    return x, y
+
+@pytest.mark.parametrize("n, block", [(240, 6), (97, 5), (50, 50), (10, 1)])
+def test_replicates_match_naive_block_resampling(n, block):
+    x, y = _pair(n)
+    got = bootstrap._replicates(x, y, block, 200, 7)
+    starts = bootstrap._starts(np.random.default_rng(7), n, block, 200)
+    for r, s in zip(got, starts):
+        rows = np.concatenate([np.arange(a, a + block) for a in s])[:n]
+        assert r == pytest.approx(np.corrcoef(x[rows], y[rows])[0, 1], abs=1e-10)
+
+def test_block_length_rule():
+    assert bootstrap._block_length(1000) == 10
+    assert bootstrap._block_length(240) == 6
+    assert bootstrap._block_length(240, 12) == 12
+    assert bootstrap._block_length(5, 12) == 5
+
+def test_corr_ci_is_deterministic_and_executor_independent():
+    pairs = {"a": _pair(seed=1), "b": _pair(seed=2, rho=-0.3)}
+    serial = bootstrap._corr_ci(pairs, reps=2500, seed=3)
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        pooled = bootstrap._corr_ci(pairs, reps=2500, seed=3, executor=ex)
+    assert serial == pooled
+    assert serial == bootstrap._corr_ci(pairs, reps=2500, seed=3)
+    for name, (x, y) in pairs.items():
+        r = np.corrcoef(x, y)[0, 1]
+        assert serial[name]["low"] < r < serial[name]["high"]
+        assert serial[name]["n"] == len(x)
+
+def test_corr_ci_drops_nan_rows_and_handles_short_series():
+    x, y = _pair(120)
+    x[::10] = np.nan
+    out = bootstrap._corr_ci({"a": (x, y), "short": (x[1:3], y[1:3])}, reps=500)
+    assert out["a"]["n"] == 108
+    assert out["a"]["block"] == bootstrap._block_length(108)
+    assert out["short"] == {"low": None, "high": None, "block": None, "n": 2}
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src import changepoint
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("dist", ["normal", "t"])
+def test_stationary_monthly_series_has_no_breaks(seed, dist):
+    rng = np.random.default_rng(seed)
+    n = 300
+    e = rng.normal(0, 0.01, n) if dist == "normal" else rng.standard_t(4, n) * 0.01
+    idx = pd.date_range("2000-01-31", periods=n, freq="ME")
+    level = pd.Series(7.0 + e, index=idx)
+    returns = pd.Series(e, index=idx)
+    min_size = int(round(changepoint._periods_per_year(idx) * 1.0))
+    assert changepoint._level_breaks(level, 1.0, min_size) == []
+    assert changepoint._vol_breaks(returns, 1.0, min_size) == []
+
+def test_volatility_shift_is_found():
+    rng = np.random.default_rng(0)
+    e = rng.normal(0, 0.01, 300)
+    e[150:] *= 3
+    r = pd.Series(e, index=pd.date_range("2000-01-31", periods=300, freq="ME"))
+    breaks = changepoint._vol_breaks(r, 1.0, 12)
+    assert len(breaks) == 1
+    assert breaks[0]["vol_after"] > 2 * breaks[0]["vol_before"]
+
+@pytest.mark.parametrize("freq, expected", [("B", 261), ("D", 365), ("W-FRI", 52), ("ME", 12), ("QE", 4)])
+def test_periods_per_year_counts_observed_spacing(freq, expected):
+    idx = pd.date_range("2010-01-01", "2019-12-31", freq=freq)
+    assert changepoint._periods_per_year(idx) == pytest.approx(expected, rel=0.01)
+
+def test_periods_per_year_ignores_holiday_gaps():
+    idx = pd.bdate_range("2015-01-01", "2019-12-31")
+    idx = idx[(idx.month != 10) | (idx.day > 7)]
+    assert 250 < changepoint._periods_per_year(idx) < 261
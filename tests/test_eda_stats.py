@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src import eda_script, registry
+
+_REGISTRY = """
+[dataset]
+target = "FX"
+
+[metrics]
+rolling_windows = [3, 12]
+leadlag_max_lag = 6
+
+[[series]]
+name = "FX"
+ids = ["FX"]
+
+[[series]]
+name = "Rate"
+ids = ["RATE"]
+
+[[series]]
+name = "Stock"
+ids = ["STOCK"]
+"""
+
+def _frame(n: int = 240, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range("2000-01-31", periods=n, freq="ME", name="Date")
+    stock = 100 * np.exp(np.cumsum(rng.normal(0.005, 0.04, n)))
+    rate = np.cumsum(rng.normal(0, 0.2, n))
+    fx = 7 * np.exp(np.cumsum(0.3 * np.r_[0, np.diff(np.log(stock))] + rng.normal(0, 0.01, n)))
+    df = pd.DataFrame({"FX": fx, "Rate": rate, "Stock": stock}, index=idx)
+    df.iloc[[40, 41, 150], 0] = np.nan
+    df.iloc[[90, 200], 2] = np.nan
+    return df
+
+@pytest.fixture
+def reg(tmp_path):
+    path = tmp_path / "series.toml"
+    path.write_text(_REGISTRY, encoding="utf-8")
+    return registry._load_registry(str(path))
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_rolling_matches_pandas_rolling(reg, seed):
+    df = _frame(seed=seed)
+    got = eda_script._rolling(df, reg)
+    ch = pd.DataFrame({"FX": df["FX"].pct_change(fill_method=None), "Rate": df["Rate"].diff(), "Stock": df["Stock"].pct_change(fill_method=None)})
+    for w in (3, 12):
+        r = ch.rolling(w)
+        want = {f"vol_{w}": r["FX"].std()}
+        for d in ("Rate", "Stock"):
+            want[f"corr_{w}_{d}"] = ch["FX"].rolling(w).corr(ch[d])
+            want[f"beta_{w}_{d}"] = ch["FX"].rolling(w).cov(ch[d]) / ch[d].rolling(w).var()
+        for col, s in want.items():
+            pd.testing.assert_series_equal(got[col], s.reindex(got.index), check_names=False, rtol=1e-8, atol=1e-12)
+
+def test_changes_uses_returns_for_positive_series_with_gaps():
+    df = pd.DataFrame({"p": [1.0, np.nan, 2.0, 3.0], "s": [1.0, -1.0, 2.0, 0.0], "e": np.nan})
+    ch = eda_script._changes(df)
+    np.testing.assert_allclose(ch["p"], df["p"].pct_change(fill_method=None))
+    np.testing.assert_allclose(ch["s"], df["s"].diff())
+    assert ch["e"].isna().all()
+
+@pytest.mark.parametrize("basis", ["levels", "returns"])
+def test_leadlag_matches_shifted_pandas_corr(reg, basis):
+    df = _frame()
+    out = eda_script._leadlag(df, reg)
+    assert out["lags"] == list(range(-6, 7))
+    frame = df if basis == "levels" else eda_script._changes(df)
+    for d in ("Rate", "Stock"):
+        want = [frame["FX"].corr(frame[d].shift(lag)) for lag in out["lags"]]
+        np.testing.assert_allclose(out["bases"][basis][d]["corr"], want, atol=2e-6)
+
+def test_positive_lag_means_driver_leads(reg):
+    rng = np.random.default_rng(5)
+    n = 300
+    driver = rng.normal(0, 1, n + 3)
+    idx = pd.date_range("2000-01-31", periods=n, freq="ME")
+    df = pd.DataFrame({
+        "FX": 7 + 0.01 * np.cumsum(driver[:n] + 0.3 * rng.normal(0, 1, n)),
+        "Rate": np.cumsum(driver[3:]),
+        "Stock": 100 + np.cumsum(rng.normal(0, 1, n)),
+    }, index=idx)
+    item = eda_script._leadlag(df, reg)["bases"]["returns"]["Rate"]
+    assert item["peak_lag"] == 3
+    assert item["peak_corr"] > 0.8
+    df["Rate"] = np.r_[np.zeros(3), np.cumsum(driver[:n - 3])]
+    item = eda_script._leadlag(df, reg)["bases"]["returns"]["Rate"]
+    assert item["peak_lag"] == -3
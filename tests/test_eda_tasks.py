@@ -0,0 +1,19 @@
+import pytest
+from src import eda_script
+
+@pytest.mark.parametrize("jobs, tasks, expected", [
+    (8, 12, (8, 1)),
+    (8, 2, (2, 4)),
+    (8, 1, (1, 8)),
+    (3, 2, (2, 1)),
+    (1, 12, (1, 1)),
+])
+def test_worker_budget_is_split_between_task_and_stage_pools(jobs, tasks, expected):
+    outer, inner = eda_script._budget(jobs, tasks)
+    assert (outer, inner) == expected
+    assert outer * inner <= jobs
+
+def test_default_budget_never_exceeds_cpu_count(monkeypatch):
+    monkeypatch.setattr(eda_script.os, "cpu_count", lambda: 16)
+    outer, inner = eda_script._budget(0, 12)
+    assert (outer, inner) == (12, 1)
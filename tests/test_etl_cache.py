@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+from src import etl_script
+
+class _Source:
+    def __init__(self, end: str):
+        days = pd.bdate_range("2024-01-01", end)
+        self.df = pd.DataFrame({"v": range(len(days))}, index=days, dtype=float)
+        self.calls = []
+
+    def __call__(self, start: str, end: str) -> pd.DataFrame:
+        self.calls.append((start, end))
+        return self.df.loc[start:end].copy()
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path):
+    etl_script._configure_cache(str(tmp_path / "cache"), enabled=True)
+    yield
+    etl_script._configure_cache("output/cache", enabled=True)
+
+def _check(got: pd.DataFrame, want: pd.DataFrame):
+    pd.testing.assert_frame_equal(got, want, check_freq=False, check_index_type=False, check_names=False)
+
+def test_fresh_cache_is_served_without_fetching():
+    src = _Source("2024-06-28")
+    etl_script._cached_fetch("k", "2024-01-01", "2024-06-28", src, (24, 14))
+    got = etl_script._cached_fetch("k", "2024-02-01", "2024-05-31", src, (24, 14))
+    assert len(src.calls) == 1
+    _check(got, src.df.loc["2024-02-01":"2024-05-31"])
+
+def test_expired_cache_refetches_revision_window_only():
+    src = _Source("2024-06-28")
+    etl_script._cached_fetch("k", "2024-01-01", "2024-06-28", src, (0, 14))
+    src.df = _Source("2024-07-31").df
+    src.df.loc["2024-06-20", "v"] = -1.0
+    src.df.loc["2024-03-01", "v"] = -2.0
+    got = etl_script._cached_fetch("k", "2024-01-01", "2024-07-31", src, (0, 14))
+    assert src.calls[-1] == ("2024-06-14", "2024-07-31")
+    assert got.loc["2024-06-20", "v"] == -1.0
+    assert got.loc["2024-03-01", "v"] != -2.0
+    assert len(got) == len(src.df)
+
+def test_expired_cache_with_earlier_end_keeps_history():
+    src = _Source("2024-06-28")
+    etl_script._cached_fetch("k", "2024-01-01", "2024-06-28", src, (0, 14))
+    got = etl_script._cached_fetch("k", "2024-01-01", "2024-03-29", src, (0, 14))
+    _check(got, src.df.loc[:"2024-03-29"])
+    again = etl_script._cached_fetch("k", "2024-01-01", "2024-06-28", src, (24, 14))
+    _check(again, src.df)
@@ -0,0 +1,159 @@
+import threading
+import pandas as pd
+import pytest
+from src import etl_script, registry, scheduler
+
+_REGISTRY = """
+[dataset]
+target = "SGE_Gold_Price"
+
+[[series]]
+name = "SGE_Gold_Price"
+source = "tushare"
+ids = ["AU9999.SGE", "AU"]
+apis = ["index_daily", "fut_daily"]
+freq = "daily"
+"""
+
+_FRED_REGISTRY = """
+[dataset]
+target = "Gold_Price"
+
+[[series]]
+name = "Gold_Price"
+ids = ["BAD1", "BAD2"]
+queries = ["gold fixing price"]
+freq = "daily"
+
+[[series]]
+name = "SP500_Close"
+ids = ["SP500"]
+queries = ["s&p 500"]
+freq = "daily"
+"""
+
+class _Fred:
+    def __init__(self, good: set):
+        self.good = good
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get_series(self, series_id, observation_start=None, observation_end=None):
+        with self.lock:
+            self.calls.append(("series", series_id))
+        if series_id not in self.good:
+            raise ValueError(f"Bad Request. The series does not exist: {series_id}")
+        days = pd.bdate_range(observation_start, observation_end)
+        return pd.Series(range(len(days)), index=days, dtype=float)
+
+    def search(self, text):
+        with self.lock:
+            self.calls.append(("search", text))
+        return pd.DataFrame({"id": ["GOLDAMGBD228NLBM" if "gold" in text else "SP500"]})
+
+class _Pro:
+    def __init__(self, rows: dict):
+        self.rows = rows
+        self.calls = []
+
+    def _query(self, api, ts_code, start_date, end_date):
+        self.calls.append((api, ts_code))
+        days = pd.bdate_range(start_date, end_date) if self.rows.get(api) else pd.DatetimeIndex([])
+        return pd.DataFrame({"trade_date": days.strftime("%Y%m%d"), "close": 400.0 + pd.RangeIndex(len(days))})
+
+    def index_daily(self, **kwargs):
+        return self._query("index_daily", **kwargs)
+
+    def fut_daily(self, **kwargs):
+        return self._query("fut_daily", **kwargs)
+
+@pytest.fixture
+def reg(tmp_path):
+    path = tmp_path / "series.toml"
+    path.write_text(_REGISTRY, encoding="utf-8")
+    return registry._load_registry(str(path))
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path):
+    etl_script._configure_cache(str(tmp_path / "cache"), enabled=True)
+    for name in ("fred", "tushare"):
+        scheduler._configure(name, 1e6, burst=1000)
+    yield
+    etl_script._configure_cache("output/cache", enabled=True)
+    for name in ("fred", "tushare"):
+        scheduler._configure(name)
+
+def test_empty_tushare_primary_falls_back(monkeypatch, reg):
+    pro = _Pro({"index_daily": False, "fut_daily": True})
+    monkeypatch.setattr(etl_script, "_ts_pro", lambda: pro)
+    plan = etl_script._extract_plan(None, "2024-01-01", "2024-03-29", reg)
+    df = etl_script._first_ok(plan["SGE_Gold_Price"])
+    assert [c[0] for c in pro.calls] == ["index_daily", "fut_daily"]
+    assert isinstance(df.index, pd.DatetimeIndex)
+    assert len(df) == len(pd.bdate_range("2024-01-01", "2024-03-29"))
+    assert list(df.columns) == ["SGE_Gold_Price"]
+    assert etl_script._year_digests(df)
+
+def test_empty_tushare_everywhere_raises(monkeypatch, reg):
+    monkeypatch.setattr(etl_script, "_ts_pro", lambda: _Pro({}))
+    plan = etl_script._extract_plan(None, "2024-01-01", "2024-03-29", reg)
+    with pytest.raises(RuntimeError, match="no rows"):
+        etl_script._first_ok(plan["SGE_Gold_Price"])
+
+@pytest.fixture
+def fred_reg(tmp_path):
+    path = tmp_path / "fred.toml"
+    path.write_text(_FRED_REGISTRY, encoding="utf-8")
+    return registry._load_registry(str(path))
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_search_fallback_runs_only_after_all_ids_fail(monkeypatch, fred_reg, jobs):
+    fred = _Fred({"SP500", "GOLDAMGBD228NLBM"})
+    monkeypatch.setattr(etl_script, "_fred_client", lambda: fred)
+    out = etl_script._extract("2024-01-01", "2024-02-29", jobs, fred_reg)
+    gold = [c for c in fred.calls if c[1] in ("BAD1", "BAD2", "gold fixing price", "GOLDAMGBD228NLBM")]
+    assert gold == [("series", "BAD1"), ("series", "BAD2"), ("search", "gold fixing price"), ("series", "GOLDAMGBD228NLBM")]
+    assert ("search", "s&p 500") not in fred.calls
+    assert list(out["Gold_Price"].columns) == ["Gold_Price"]
+    assert list(out["SP500_Close"].columns) == ["SP500_Close"]
+
+def test_cached_resolution_skips_search(monkeypatch, fred_reg):
+    fred = _Fred({"SP500", "GOLDAMGBD228NLBM"})
+    monkeypatch.setattr(etl_script, "_fred_client", lambda: fred)
+    etl_script._extract("2024-01-01", "2024-02-29", 1, fred_reg)
+    fred.calls.clear()
+    etl_script._configure_cache(etl_script._CACHE["dir"], enabled=True, refresh=True)
+    etl_script._extract("2024-01-01", "2024-02-29", 1, fred_reg)
+    assert not [c for c in fred.calls if c[0] == "search"]
+
+class _Search:
+    def __init__(self, ids: list):
+        self.ids = list(ids)
+        self.calls = 0
+
+    def search(self, text):
+        self.calls += 1
+        chosen = self.ids.pop(0)
+        return pd.DataFrame({"id": [chosen]}) if chosen else pd.DataFrame()
+
+def _age(query: str, hours: float):
+    ent = etl_script._resolve_map()[query]
+    ent["resolved_at"] = (pd.Timestamp.now() - pd.Timedelta(hours=hours)).isoformat(timespec="seconds")
+
+def test_failed_search_uses_short_negative_ttl():
+    etl_script._configure_resolve(ttl_days=30, miss_ttl_hours=6)
+    fred = _Search([None, "GOLDAMGBD228NLBM"])
+    assert etl_script._fred_resolve(fred, "gold") == (None, False)
+    assert etl_script._fred_resolve(fred, "gold") == (None, True)
+    assert fred.calls == 1
+    _age("gold", 7)
+    assert etl_script._fred_resolve(fred, "gold") == ("GOLDAMGBD228NLBM", False)
+    assert fred.calls == 2
+
+def test_successful_search_keeps_long_ttl():
+    etl_script._configure_resolve(ttl_days=30, miss_ttl_hours=6)
+    fred = _Search(["SP500"])
+    etl_script._fred_resolve(fred, "s&p 500")
+    _age("s&p 500", 24 * 29)
+    assert etl_script._fred_resolve(fred, "s&p 500") == ("SP500", True)
+    assert fred.calls == 1
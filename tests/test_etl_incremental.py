@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src import etl_script, registry
+
+_REGISTRY = """
+[dataset]
+target = "USD_CNY_Rate"
+
+[[series]]
+name = "USD_CNY_Rate"
+ids = ["DEXCHUS"]
+freq = "daily"
+
+[[series]]
+name = "US_CPI"
+ids = ["CPIAUCSL"]
+freq = "monthly"
+revision_days = 180
+"""
+
+def _raw(end: str) -> dict:
+    days = pd.bdate_range("2022-01-03", end)
+    months = pd.date_range("2022-01-01", end, freq="MS")
+    rng = np.random.default_rng(0)
+    fx = pd.DataFrame({"USD_CNY_Rate": 6.5 + np.cumsum(rng.normal(0, 0.01, len(days)))}, index=days)
+    cpi = pd.DataFrame({"US_CPI": 280 + np.arange(len(months)) * 0.8}, index=months)
+    return {"USD_CNY_Rate": fx, "US_CPI": cpi}
+
+@pytest.fixture
+def reg(tmp_path):
+    path = tmp_path / "series.toml"
+    path.write_text(_REGISTRY, encoding="utf-8")
+    return registry._load_registry(str(path))
+
+@pytest.mark.parametrize("mode", ["monthly", "daily"])
+def test_incremental_picks_up_revised_history(tmp_path, reg, mode):
+    out = str(tmp_path / "master.csv")
+    dfs = _raw("2024-06-28")
+    etl_script._save(etl_script._transform(dfs, mode, "mean", reg), out)
+    etl_script._save_state(dfs, out)
+    revised = _raw("2024-07-31")
+    revised["US_CPI"].loc["2024-01-01", "US_CPI"] += 5
+    etl_script._save_incremental(revised, out, mode, "mean", reg)
+    got = pd.read_csv(out, index_col="Date", parse_dates=True, float_precision="round_trip")
+    full = etl_script._transform(revised, mode, "mean", reg)
+    pd.testing.assert_frame_equal(got, full, check_freq=False, check_index_type=False)
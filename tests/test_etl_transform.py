@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src import etl_script, registry
+
+_REGISTRY = """
+[dataset]
+target = "USD_CNY_Rate"
+
+[[series]]
+name = "USD_CNY_Rate"
+ids = ["DEXCHUS"]
+freq = "daily"
+
+[[series]]
+name = "SP500_Close"
+ids = ["SP500"]
+freq = "daily"
+agg = "last"
+
+[[series]]
+name = "US_CPI"
+ids = ["CPIAUCSL"]
+freq = "monthly"
+
+[[series]]
+name = "CN_M2"
+ids = ["MYAGM2CNM189N"]
+freq = "monthly"
+agg = "mean"
+optional = true
+"""
+
+def _reference(dfs: dict, mode: str, monthly_agg: str, reg: dict) -> pd.DataFrame:
+    specs = registry._by_name(reg)
+    df = pd.concat(list(dfs.values()), axis=1, sort=True)
+    daily_cols = [c for c in df.columns if specs.get(c, {}).get("freq", "daily") == "daily"]
+    slow_cols = [c for c in df.columns if specs.get(c, {}).get("freq", "daily") != "daily"]
+    df[daily_cols] = df[daily_cols].ffill()
+    if mode == "daily":
+        df[slow_cols] = df[slow_cols].ffill()
+    else:
+        aggs = {c: specs.get(c, {}).get("agg") or monthly_agg for c in df.columns}
+        r = df.resample("ME")
+        last_cols = [c for c in df.columns if aggs[c] == "last"]
+        mean_cols = [c for c in df.columns if aggs[c] != "last"]
+        df = pd.concat([r[last_cols].last(), r[mean_cols].mean()], axis=1)[df.columns].ffill()
+    df = df.dropna(subset=[c for c in registry._required(reg) if c in df.columns])
+    df.index = pd.to_datetime(df.index)
+    df.index.name = "Date"
+    return df
+
+def _raw(seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    fx_days = pd.bdate_range("2019-01-01", "2023-12-29")
+    sp_days = pd.bdate_range("2019-03-11", "2023-12-22")
+    months = pd.date_range("2018-11-01", "2023-10-01", freq="MS")
+    fx = pd.DataFrame({"USD_CNY_Rate": 6.8 + np.cumsum(rng.normal(0, 0.01, len(fx_days)))}, index=fx_days)
+    sp = pd.DataFrame({"SP500_Close": 3000 + np.cumsum(rng.normal(0, 20, len(sp_days)))}, index=sp_days)
+    cpi = pd.DataFrame({"US_CPI": 250 + np.cumsum(rng.normal(0.3, 0.2, len(months)))}, index=months)
+    m2 = pd.DataFrame({"CN_M2": 190 + np.cumsum(rng.normal(1, 0.5, len(months)))}, index=months + pd.Timedelta(days=14))
+    fx.iloc[rng.choice(len(fx), 120, replace=False)] = np.nan
+    fx.iloc[300:330] = np.nan
+    sp.iloc[rng.choice(len(sp), 80, replace=False)] = np.nan
+    cpi.iloc[[5, 6, 30]] = np.nan
+    m2 = m2.drop(m2.index[[10, 11, 12]])
+    return {"USD_CNY_Rate": fx, "SP500_Close": sp, "US_CPI": cpi, "CN_M2": m2}
+
+@pytest.fixture
+def reg(tmp_path):
+    path = tmp_path / "series.toml"
+    path.write_text(_REGISTRY, encoding="utf-8")
+    return registry._load_registry(str(path))
+
+@pytest.mark.parametrize("seed", [0, 1])
+@pytest.mark.parametrize("monthly_agg", ["last", "mean"])
+@pytest.mark.parametrize("mode", ["monthly", "daily"])
+def test_transform_matches_resample_reference(reg, mode, monthly_agg, seed):
+    dfs = _raw(seed)
+    got = etl_script._transform(dfs, mode, monthly_agg, reg)
+    want = _reference(dfs, mode, monthly_agg, reg)
+    pd.testing.assert_frame_equal(got, want, check_freq=False, check_index_type=False, rtol=1e-12)
+
+@pytest.mark.parametrize("mode", ["monthly", "daily"])
+def test_transform_since_matches_full_tail(reg, mode):
+    dfs = _raw(0)
+    since = pd.Timestamp("2022-06-01") if mode == "daily" else pd.Timestamp("2022-06-30")
+    full = etl_script._transform(dfs, mode, "mean", reg)
+    tail = etl_script._transform(dfs, mode, "mean", reg, since=since)
+    pd.testing.assert_frame_equal(tail, full.loc[full.index >= since], check_freq=False, rtol=1e-12)
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src import eda_script, etl_script, fingerprint, registry, storage
+
+_REGISTRY = """
+[dataset]
+target = "USD_CNY_Rate"
+
+[[series]]
+name = "USD_CNY_Rate"
+ids = ["DEXCHUS"]
+
+[[series]]
+name = "Brent_Oil"
+ids = ["DCOILBRENTEU"]
+"""
+
+_ONLY = "moments,describe,correlation"
+
+def _frame(n: int = 300, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2022-01-03", periods=n, name="Date")
+    return pd.DataFrame({"USD_CNY_Rate": 6.8 + rng.normal(0, 0.01, n).cumsum(), "Brent_Oil": 80 + rng.normal(0, 0.5, n).cumsum()}, index=idx)
+
+@pytest.fixture
+def reg(tmp_path):
+    path = tmp_path / "series.toml"
+    path.write_text(_REGISTRY, encoding="utf-8")
+    return registry._load_registry(str(path))
+
+def test_frames_digest_is_stable_and_value_sensitive():
+    a, b = _frame(seed=1), _frame(seed=2)
+    digest = fingerprint._frames_digest({"a": a, "b": b}, {"mode": "daily"})
+    assert fingerprint._frames_digest({"b": b.copy(), "a": a.copy()}, {"mode": "daily"}) == digest
+    assert fingerprint._frames_digest({"a": a, "b": b}, {"mode": "monthly"}) != digest
+    changed = a.copy()
+    changed.iloc[10, 0] = np.nan
+    assert fingerprint._frames_digest({"a": changed, "b": b}, {"mode": "daily"}) != digest
+    shifted = a.copy()
+    shifted.index = shifted.index + pd.Timedelta(days=1)
+    assert fingerprint._frames_digest({"a": shifted, "b": b}, {"mode": "daily"}) != digest
+
+def test_path_digest_tracks_partition_contents(tmp_path):
+    df = _frame()
+    path = str(tmp_path / "master.parquet")
+    storage._save(df, path, "year")
+    digest = fingerprint._path_digest(path)
+    storage._save(df, path)
+    assert fingerprint._path_digest(path) == digest
+    df.iloc[-1, 0] += 0.01
+    storage._save_partitions(df, path, "year", keys={"2023"})
+    assert fingerprint._path_digest(path) != digest
+    assert fingerprint._path_digest(str(tmp_path / "absent.parquet")) is None
+
+def test_etl_manifest_skips_only_unchanged_runs(tmp_path, reg):
+    out = str(tmp_path / "master.csv")
+    raw = etl_script._raw_digest({"USD_CNY_Rate": _frame()}, "daily", "last", reg)
+    assert not etl_script._etl_unchanged(out, raw)
+    etl_script._save(_frame(), out)
+    etl_script._record_etl(out, raw)
+    assert etl_script._etl_unchanged(out, raw)
+    assert not etl_script._etl_unchanged(out, etl_script._raw_digest({"USD_CNY_Rate": _frame()}, "monthly", "last", reg))
+    etl_script._save(_frame(seed=3), out)
+    assert not etl_script._etl_unchanged(out, raw)
+
+def test_eda_tasks_skip_when_inputs_are_unchanged(tmp_path, reg, monkeypatch):
+    inp, out = str(tmp_path / "master.csv"), str(tmp_path / "eda")
+    etl_script._save(_frame(), inp)
+    assert eda_script._run_tasks(inp, out, reg, only=_ONLY, jobs=1) == {"moments": "ran", "describe": "ran", "correlation": "ran"}
+    real = eda_script._load_df
+    monkeypatch.setattr(eda_script, "_load_df", lambda *a, **k: pytest.fail("fresh run must not load data"))
+    assert eda_script._run_tasks(inp, out, reg, only=_ONLY, jobs=1) == {"moments": "fresh", "describe": "fresh", "correlation": "fresh"}
+    monkeypatch.setattr(eda_script, "_load_df", real)
+    (tmp_path / "eda" / "describe.csv").unlink()
+    assert eda_script._run_tasks(inp, out, reg, only=_ONLY, jobs=1) == {"moments": "fresh", "correlation": "fresh", "describe": "ran"}
+    assert eda_script._run_tasks(inp, out, reg, only=_ONLY, jobs=1, force=True) == {"moments": "ran", "describe": "ran", "correlation": "ran"}
+
+def test_eda_tasks_rerun_when_data_or_window_changes(tmp_path, reg):
+    inp, out = str(tmp_path / "master.csv"), str(tmp_path / "eda")
+    etl_script._save(_frame(), inp)
+    eda_script._run_tasks(inp, out, reg, only=_ONLY, jobs=1)
+    before = (tmp_path / "eda" / "describe.csv").read_text()
+    etl_script._save(_frame(seed=5), inp)
+    assert set(eda_script._run_tasks(inp, out, reg, only=_ONLY, jobs=1).values()) == {"ran"}
+    assert (tmp_path / "eda" / "describe.csv").read_text() != before
+    assert set(eda_script._run_tasks(inp, out, reg, start="2022-06-01", only=_ONLY, jobs=1).values()) == {"ran"}
+    assert set(eda_script._run_tasks(inp, out, reg, start="2022-06-01", only=_ONLY, jobs=1).values()) == {"fresh"}
@@ -0,0 +1,66 @@
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.arima.model import ARIMA
+from src import forecast
+
+_CFG = {"series": ["y"], "models": ["arima"], "horizon": 6, "level": 0.9, "arima_order": [1, 1, 1], "refit_every": 6}
+
+def _frame(n: int = 120, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    e = rng.normal(0, 1, n + 1)
+    y = 100 + np.cumsum(0.5 * e[1:] + 0.3 * e[:-1])
+    return pd.DataFrame({"y": y}, index=pd.date_range("2010-01-31", periods=n, freq="ME"))
+
+def test_cold_arima_fit_matches_statsmodels():
+    y = _frame()["y"].to_numpy()
+    got = forecast._fit("arima", y, _CFG)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        res = ARIMA(pd.Series(y), order=(1, 1, 1)).fit()
+    frame = res.get_forecast(6).summary_frame(alpha=0.1)
+    np.testing.assert_allclose(got["params"], res.params, rtol=1e-8)
+    np.testing.assert_allclose(got["mean"], frame["mean"], rtol=1e-8)
+    np.testing.assert_allclose(got["lower"], frame["mean_ci_lower"], rtol=1e-8)
+    np.testing.assert_allclose(got["upper"], frame["mean_ci_upper"], rtol=1e-8)
+
+def test_filter_mode_reuses_params_without_refitting():
+    y = _frame()["y"].to_numpy()
+    params = forecast._fit("arima", y[:-2], _CFG)["params"]
+    got = forecast._fit("arima", y, _CFG, params, "filter")
+    res = ARIMA(pd.Series(y), order=(1, 1, 1)).filter(params)
+    np.testing.assert_allclose(got["params"], params)
+    np.testing.assert_allclose(got["mean"], res.get_forecast(6).predicted_mean, rtol=1e-10)
+
+def test_plan_moves_from_cached_to_filter_to_warm_to_cold():
+    df = _frame()
+    out, state = forecast._run(df.iloc[:100], _CFG, {})
+    assert out["y"]["models"]["arima"]["fit"] == "cold"
+    cfg = {k: v for k, v in _CFG.items() if k != "series"}
+    prev = state["y:arima"]
+    assert forecast._plan(df["y"].iloc[:100], "arima", cfg, prev)[0] == "cached"
+    assert forecast._plan(df["y"].iloc[:103], "arima", cfg, prev)[0] == "filter"
+    assert forecast._plan(df["y"].iloc[:106], "arima", cfg, prev)[0] == "warm"
+    revised = df["y"].iloc[:103].copy()
+    revised.iloc[10] += 1.0
+    assert forecast._plan(revised, "arima", cfg, prev)[0] == "cold"
+    assert forecast._plan(df["y"].iloc[:103], "arima", dict(cfg, horizon=12), prev)[0] == "cold"
+
+def test_run_reports_cached_results_and_filter_state():
+    df = _frame()
+    out1, state1 = forecast._run(df.iloc[:100], _CFG, {})
+    out2, state2 = forecast._run(df.iloc[:100], _CFG, state1)
+    assert out2["y"]["models"]["arima"]["fit"] == "cached"
+    assert out2["y"]["models"]["arima"]["mean"] == out1["y"]["models"]["arima"]["mean"]
+    out3, state3 = forecast._run(df.iloc[:102], _CFG, state2)
+    assert out3["y"]["models"]["arima"]["fit"] == "filter"
+    assert state3["y:arima"]["fit_nobs"] == 100
+    assert out3["y"]["dates"][0] == "2018-07-31"
+
+def test_warm_start_lands_on_cold_optimum():
+    y = _frame(n=160)["y"].to_numpy()
+    prev = forecast._fit("arima", y[:150], _CFG)["params"]
+    warm = forecast._fit("arima", y, _CFG, prev, "warm")
+    cold = forecast._fit("arima", y, _CFG)
+    np.testing.assert_allclose(warm["mean"], cold["mean"], rtol=1e-3)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src import moments
+
+def _frame(n: int = 400, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2019-06-03", periods=n)
+    base = rng.normal(0, 1, n)
+    df = pd.DataFrame({
+        "a": 1e4 + base,
+        "b": 0.5 * base + rng.normal(0, 1, n),
+        "c": rng.gamma(2.0, 3.0, n),
+    }, index=idx)
+    df.loc[df.index[rng.choice(n, 60, replace=False)], "a"] = np.nan
+    df.loc[df.index[rng.choice(n, 90, replace=False)], "b"] = np.nan
+    df.loc[df.index[50:120], "c"] = np.nan
+    return df
+
+def _chunked(df: pd.DataFrame, cuts: list) -> dict:
+    x = df.to_numpy(dtype=float)
+    bounds = [0] + cuts + [len(df)]
+    blocks = [moments._block_stats(x[lo:hi]) for lo, hi in zip(bounds[:-1], bounds[1:])]
+    state = moments._combine(blocks, df.shape[1])
+    state["columns"] = list(df.columns)
+    state["compression"] = None
+    return state
+
+@pytest.mark.parametrize("cuts", [[], [1, 2, 3], [55, 56, 200, 201, 399], list(range(1, 400, 37))])
+def test_merged_chunks_match_batch_describe_and_corr(cuts):
+    df = _frame()
+    state = _chunked(df, cuts)
+    pd.testing.assert_frame_equal(moments._describe(state), df.describe(), rtol=1e-9)
+    pd.testing.assert_frame_equal(moments._corr(state), df.corr(), rtol=1e-9)
+
+def test_update_reuses_unchanged_year_blocks(tmp_path):
+    df = _frame()
+    path = str(tmp_path / "moments.npz")
+    first = moments._update(df, path)
+    assert first["fresh_rows"] == len(df)
+    again = moments._update(df, path)
+    assert again["fresh_rows"] == 0
+    revised = df.copy()
+    revised.iloc[-1, 0] += 1.0
+    third = moments._update(revised, path)
+    assert third["fresh_rows"] == int((revised.index.year == revised.index[-1].year).sum())
+    pd.testing.assert_frame_equal(moments._describe(third), revised.describe(), rtol=1e-9)
+    pd.testing.assert_frame_equal(moments._corr(moments._load(path)), revised.corr(), rtol=1e-9)
@@ -0,0 +1,112 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src import fingerprint, prefix, sketch, storage
+
+def _frame(n: int = 600, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2020-01-01", periods=n, name="Date")
+    df = pd.DataFrame({"a": rng.normal(7, 0.3, n).cumsum() / 50 + 7, "b": rng.normal(0, 1, n), "c": rng.gamma(2.0, 1.0, n)}, index=idx)
+    df.loc[df.index[::7], "b"] = np.nan
+    df.loc[df.index[100:160], "c"] = np.nan
+    return df
+
+def _assert_same(a: pd.DataFrame, b: pd.DataFrame):
+    pd.testing.assert_frame_equal(a, b, rtol=1e-12, atol=1e-12)
+
+@pytest.mark.parametrize("method", ["exact", "tdigest"])
+def test_written_index_drops_values_and_uses_loaded_window(tmp_path, method):
+    df = _frame()
+    full = prefix._build(df, "x", {"method": method})
+    path = str(tmp_path / "prefix_index.npz")
+    prefix._write(full, path)
+    idx = prefix._read(path)
+    assert "values" not in idx
+    start, end = df.index[60], df.index[580]
+    win = prefix._window(idx, df.loc[start:end], start, end)
+    _assert_same(prefix._summary(win, start, end), prefix._summary(full, start, end))
+    _assert_same(prefix._corr(win, start, end), prefix._corr(full, start, end))
+    assert prefix._latest(win, start, end) == prefix._latest(full, start, end)
+    assert prefix._window(idx, df.loc[start:end].iloc[1:], start, end) == {}
+
+def test_stat_digest_tracks_partition_rewrites(tmp_path):
+    path = str(tmp_path / "master.parquet")
+    df = _frame()
+    storage._save(df, path, "year")
+    before = fingerprint._stat_digest(path)
+    assert fingerprint._stat_digest(path) == before
+    entry = storage._manifest(path)["partitions"][-1]
+    st = os.stat(os.path.join(path, entry["file"]))
+    os.utime(os.path.join(path, entry["file"]), ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert fingerprint._stat_digest(path) != before
+
+def _brute(df: pd.DataFrame) -> pd.DataFrame:
+    rows = {
+        "count": df.count(), "mean": df.mean(), "median": df.median(), "std": df.std(), "min": df.min(), "max": df.max(),
+        "q25": df.quantile(0.25), "q75": df.quantile(0.75), "skew": df.skew(), "kurt": df.kurt(),
+    }
+    return pd.DataFrame(rows).T.loc[prefix._ROWS].astype(float)
+
+@pytest.mark.parametrize("seed", range(8))
+def test_range_summary_and_corr_match_pandas(seed):
+    df = _frame(seed=seed)
+    idx = prefix._build(df, "x", {"method": "exact"})
+    rng = np.random.default_rng(100 + seed)
+    a, b = sorted(rng.choice(len(df), 2, replace=False))
+    start, end = df.index[a], df.index[b]
+    part = df.loc[start:end]
+    got = prefix._summary(idx, start, end)
+    want = _brute(part).loc[:, part.count() > 0]
+    pd.testing.assert_frame_equal(got, want, rtol=1e-8, atol=1e-10)
+    pd.testing.assert_frame_equal(prefix._corr(idx, start, end), part.corr(), rtol=1e-8, atol=1e-10)
+
+def test_latest_returns_last_two_valid_values_in_range():
+    df = _frame()
+    idx = prefix._build(df, "x")
+    start, end = df.index[90], df.index[170]
+    part = df.loc[start:end]
+    got = prefix._latest(idx, start, end)
+    assert "c" in got
+    for col, (val, prev) in got.items():
+        s = part[col].dropna()
+        assert val == s.iloc[-1]
+        assert prev == (s.iloc[-2] if len(s) > 1 else None)
+
+def test_cancellation_falls_back_to_exact_moments():
+    df = _frame() + 1e9
+    df.iloc[:5] -= 0.999e9
+    idx = prefix._build(df, "x", {"method": "exact"})
+    start, end = df.index[200], df.index[230]
+    lo, hi = prefix._span(idx, start, end)
+    assert prefix._moments(idx, lo, hi, [0, 1, 2])["exact_fallback"] > 0
+    part = df.loc[start:end]
+    got = prefix._summary(idx, start, end)
+    assert np.allclose(got.loc["std"], part.std(), rtol=1e-9)
+    assert np.allclose(got.loc["kurt"], part.kurt(), rtol=1e-6)
+
+@pytest.mark.parametrize("dist", ["normal", "lognormal"])
+def test_tdigest_quantiles_stay_within_rank_error(dist):
+    rng = np.random.default_rng(3)
+    x = rng.normal(0, 1, 200_000) if dist == "normal" else rng.lognormal(0, 1, 200_000)
+    parts = [sketch._from_values(c, 200) for c in np.array_split(x, 17)]
+    m, w = sketch._merge(parts, 200)
+    assert len(m) < 1000
+    qs = np.array([0.01, 0.25, 0.5, 0.75, 0.99])
+    est = sketch._quantile(m, w, qs, x.min(), x.max())
+    ranks = np.searchsorted(np.sort(x), est) / len(x)
+    assert np.all(np.abs(ranks - qs) < 0.005)
+
+def test_sketched_range_quantiles_close_to_exact():
+    df = _frame(n=3000)
+    exact = prefix._build(df, "x", {"method": "exact"})
+    approx = prefix._build(df, "x", {"method": "tdigest", "compression": 200})
+    start, end = df.index[100], df.index[2900]
+    a = prefix._summary(approx, start, end)
+    e = prefix._summary(exact, start, end)
+    part = df.loc[start:end]
+    for col in a.columns:
+        s = np.sort(part[col].dropna().to_numpy())
+        for row, q in (("q25", 0.25), ("median", 0.5), ("q75", 0.75)):
+            assert abs(np.searchsorted(s, a.loc[row, col]) / len(s) - q) < 0.01
+    pd.testing.assert_frame_equal(a.loc[["count", "mean", "std", "min", "max"]], e.loc[["count", "mean", "std", "min", "max"]])
@@ -0,0 +1,97 @@
+import json
+import urllib.error
+import pandas as pd
+import pytest
+import requests
+from src import providers, scheduler
+
+_OBS = b"""<?xml version="1.0" encoding="utf-8"?>
+<observations realtime_start="2024-01-01" realtime_end="2024-01-01" count="3">
+<observation realtime_start="2024-01-01" realtime_end="2024-01-01" date="2023-01-03" value="6.9"/>
+<observation realtime_start="2024-01-01" realtime_end="2024-01-01" date="2023-01-04" value="."/>
+<observation realtime_start="2024-01-01" realtime_end="2024-01-01" date="2023-01-05" value="6.8"/>
+</observations>"""
+
+class _Resp:
+    def __init__(self, status: int, content: bytes = b"", reason: str = ""):
+        self.status_code = status
+        self.content = content
+        self.text = content.decode("utf-8")
+        self.reason = reason
+        self.headers = {}
+        self.ok = status < 400
+
+class _Session(requests.Session):
+    def __init__(self, *responses):
+        super().__init__()
+        self.responses = list(responses)
+        self.sent = []
+
+    def get(self, url, **kwargs):
+        self.sent.append(url)
+        return self.responses.pop(0)
+
+    def post(self, url, json=None, **kwargs):
+        self.sent.append((url, json))
+        return self.responses.pop(0)
+
+def _ts_body(code: int = 0, msg: str = "") -> bytes:
+    data = {"fields": ["ts_code", "trade_date", "close"], "items": [["AU9999.SGE", "20230104", 410.5], ["AU9999.SGE", "20230103", 409.0]]}
+    return json.dumps({"code": code, "msg": msg, "data": data}).encode("utf-8")
+
+def test_fred_parses_observations_over_pooled_session():
+    session = _Session(_Resp(200, _OBS))
+    s = providers._PooledFred("k" * 32, session).get_series("DEXCHUS")
+    assert s.index.tolist() == [pd.Timestamp("2023-01-03"), pd.Timestamp("2023-01-04"), pd.Timestamp("2023-01-05")]
+    assert s.iloc[0] == 6.9 and pd.isna(s.iloc[1])
+    assert "series_id=DEXCHUS" in session.sent[0] and session.sent[0].endswith("&api_key=" + "k" * 32)
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_fred_server_errors_are_retryable_and_hide_key(status):
+    session = _Session(_Resp(status, reason="busy"))
+    with pytest.raises(urllib.error.HTTPError) as err:
+        providers._PooledFred("k" * 32, session).get_series("DEXCHUS")
+    assert err.value.code == status and scheduler._retryable(err.value)
+    assert "k" * 32 not in err.value.url
+
+def test_fred_client_error_uses_api_message():
+    body = b'<error code="400" message="Bad Request.  The series does not exist."/>'
+    with pytest.raises(ValueError, match="does not exist") as err:
+        providers._PooledFred("k" * 32, _Session(_Resp(400, body))).get_series("NOPE")
+    assert not scheduler._retryable(err.value)
+
+def test_data_api_returns_frame():
+    session = _Session(_Resp(200, _ts_body()))
+    df = providers._PooledDataApi("tok", session, url="http://ts.test").index_daily(ts_code="AU9999.SGE", start_date="20230101", end_date="20230131")
+    assert df.columns.tolist() == ["ts_code", "trade_date", "close"] and df["close"].tolist() == [410.5, 409.0]
+    url, body = session.sent[0]
+    assert url == "http://ts.test/index_daily" and body["token"] == "tok" and body["params"]["ts_code"] == "AU9999.SGE"
+
+@pytest.mark.parametrize("status", [429, 502])
+def test_data_api_rate_limit_and_server_errors_are_retryable(status):
+    with pytest.raises(urllib.error.HTTPError) as err:
+        providers._PooledDataApi("tok", _Session(_Resp(status, reason="slow down"))).query("daily")
+    assert scheduler._retryable(err.value)
+
+def test_data_api_client_and_api_errors():
+    with pytest.raises(RuntimeError, match="HTTP 401") as err:
+        providers._PooledDataApi("tok", _Session(_Resp(401, reason="Unauthorized"))).query("daily")
+    assert not scheduler._retryable(err.value)
+    with pytest.raises(Exception, match="每分钟最多访问") as err:
+        providers._PooledDataApi("tok", _Session(_Resp(200, _ts_body(40203, "抱歉，您每分钟最多访问该接口200次")))).query("daily")
+    assert scheduler._retryable(err.value)
+
+def test_session_pool_follows_concurrency_limit(monkeypatch):
+    monkeypatch.setattr(scheduler, "_PROVIDERS", {})
+    scheduler._configure("tushare", max_concurrent=3)
+    adapter = providers._session("tushare").get_adapter("https://api.test")
+    assert adapter._pool_maxsize == 3
+
+def test_clients_are_cached_until_reset(monkeypatch):
+    made = []
+    monkeypatch.setitem(providers._FACTORIES, "fred", lambda: made.append(providers._PooledFred("k" * 32, _Session())) or made[-1])
+    providers._reset()
+    assert providers._get("fred") is providers._get("fred") and len(made) == 1
+    providers._reset()
+    assert providers._get("fred") is not made[0] and len(made) == 2
+    providers._reset()
@@ -0,0 +1,113 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from src import etl_script, quality, registry
+
+_REGISTRY = """
+[dataset]
+target = "USD_CNY_Rate"
+
+[quality]
+outlier_z = 8.0
+
+[[series]]
+name = "USD_CNY_Rate"
+ids = ["DEXCHUS"]
+
+[[series]]
+name = "US_CPI"
+ids = ["CPIAUCSL"]
+freq = "monthly"
+optional = true
+
+[[series]]
+name = "Brent_Oil"
+ids = ["DCOILBRENTEU"]
+optional = true
+quality = { stale_fail = 5 }
+"""
+
+@pytest.fixture
+def reg(tmp_path):
+    path = tmp_path / "series.toml"
+    path.write_text(_REGISTRY, encoding="utf-8")
+    return registry._load_registry(str(path))
+
+def _clean(n: int = 500) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    idx = pd.bdate_range("2022-01-03", periods=n, name="Date")
+    cpi = pd.Series(280 + np.arange(n) * 0.05, index=idx).groupby(idx.to_period("M")).transform("first")
+    return pd.DataFrame({
+        "USD_CNY_Rate": 6.8 + rng.normal(0, 0.01, n).cumsum(),
+        "US_CPI": cpi.to_numpy(),
+        "Brent_Oil": 80 + rng.normal(0, 0.5, n).cumsum(),
+    }, index=idx)
+
+def _issues(report: dict) -> dict:
+    return {(i["column"], i["check"]): i for i in report["issues"]}
+
+def test_clean_frame_passes(reg):
+    report = quality._check(_clean(), reg)
+    assert report["status"] == "ok" and report["issues"] == []
+    assert report["index"]["rows"] == 500 and report["thresholds"]["outlier_z"] == 8.0
+    assert report["series"]["US_CPI"]["period_rows"] > 15
+    assert report["series"]["US_CPI"]["max_stale_periods"] < 2
+
+def test_stale_gap_outlier_and_jump_warnings(reg):
+    df = _clean()
+    df.iloc[100:120, 0] = df.iloc[100, 0]
+    df.iloc[200:203, 0] = np.nan
+    df.iloc[300, 0] *= 1.2
+    df.iloc[400, 2] *= 6
+    report = quality._check(df, reg)
+    found = _issues(report)
+    assert report["status"] == "fail"
+    assert [k for k, i in found.items() if i["level"] == "fail"] == [("USD_CNY_Rate", "coverage")]
+    assert found[("USD_CNY_Rate", "stale")]["value"] == pytest.approx(19, rel=0.05)
+    assert report["series"]["USD_CNY_Rate"]["max_stale_end"] == str(df.index[119].date())
+    assert found[("USD_CNY_Rate", "gap")]["value"] == pytest.approx(3, rel=0.05)
+    assert report["series"]["USD_CNY_Rate"]["max_gap_end"] == str(df.index[202].date())
+    assert found[("USD_CNY_Rate", "outliers")]["value"] >= 1
+    assert report["series"]["USD_CNY_Rate"]["max_abs_z_date"] in (str(df.index[300].date()), str(df.index[301].date()))
+    assert found[("Brent_Oil", "jump")]["value"] == pytest.approx(6.0, rel=0.05)
+    assert ("US_CPI", "stale") not in found
+
+def test_mad_method_flags_spike(reg):
+    df = _clean()
+    df.iloc[300, 0] *= 1.05
+    reg = dict(reg, quality={"outlier_method": "mad"})
+    report = quality._check(df, reg)
+    assert ("USD_CNY_Rate", "outliers") in _issues(report)
+
+def test_failures_raise_and_write_report(reg, tmp_path):
+    df = _clean()
+    df.iloc[50:60, 2] = df.iloc[50, 2]
+    report_path = str(tmp_path / "master.quality.json")
+    with pytest.raises(RuntimeError, match="Brent_Oil stale=8.8"):
+        etl_script._validate(df, reg, report_path)
+    with open(report_path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    assert report["status"] == "fail" and _issues(report)[("Brent_Oil", "stale")]["threshold"] == 5.0
+
+def test_index_problems_and_missing_target_fail(reg):
+    df = _clean(50)
+    report = quality._check(pd.concat([df, df.iloc[[10]]]).sort_index(), reg)
+    assert _issues(report)[(None, "duplicate_dates")]["value"] == 1
+    assert (None, "non_monotonic") not in _issues(report)
+    report = quality._check(pd.concat([df.iloc[25:], df.iloc[:25]]), reg)
+    assert _issues(report)[(None, "non_monotonic")]["level"] == "fail"
+    report = quality._check(df.drop(columns="USD_CNY_Rate"), reg)
+    assert _issues(report)[("USD_CNY_Rate", "missing")]["level"] == "fail"
+
+def test_required_coverage_fails_when_below_one(reg):
+    df = _clean()
+    df.iloc[:60, 1] = np.nan
+    df.iloc[-5:, 0] = np.nan
+    found = _issues(quality._check(df, reg))
+    assert found[("USD_CNY_Rate", "coverage")]["level"] == "fail"
+    assert found[("US_CPI", "coverage")]["level"] == "warn"
+    assert ("US_CPI", "gap") not in found
+
+def test_validate_passes_clean_frame(reg):
+    assert etl_script._validate(_clean(), reg)["status"] == "ok"
@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+from src import registry
+
+_BASE = """
+[dataset]
+target = "FX"
+kpi_fields = ["FX", "Gold"]
+
+[[series]]
+name = "FX"
+ids = ["DEXCHUS"]
+label = { zh = "汇率", en = "FX rate" }
+
+[[series]]
+name = "Gold"
+source = "tushare"
+ids = ["AU9999.SGE", "AU"]
+apis = ["index_daily", "fut_daily"]
+optional = true
+
+[[series]]
+name = "CPI"
+queries = ["consumer price index"]
+freq = "monthly"
+agg = "mean"
+revision_days = 180
+
+[[derived]]
+name = "Gap"
+expr = "FX - CPI"
+dashboard = false
+"""
+
+def _load(tmp_path, text: str) -> dict:
+    path = tmp_path / "series.toml"
+    path.write_text(text, encoding="utf-8")
+    return registry._load_registry(str(path))
+
+def test_defaults_and_overrides(tmp_path):
+    reg = _load(tmp_path, _BASE)
+    by = registry._by_name(reg)
+    assert registry._names(reg) == ["FX", "Gold", "CPI"]
+    assert registry._required(reg) == ["FX", "CPI"]
+    assert by["FX"]["source"] == "fred" and by["FX"]["freq"] == "daily" and by["FX"]["revision_days"] == 90
+    assert by["Gold"]["apis"] == ["index_daily", "fut_daily"]
+    assert by["CPI"]["agg"] == "mean" and by["CPI"]["revision_days"] == 180
+    assert registry._dashboard_cols(reg) == ["FX", "Gold", "CPI"]
+    assert reg["kpi_fields"] == ["FX", "Gold"]
+    assert reg["changepoints"]["min_years"] == 1.0
+
+def test_labels_cover_every_entry(tmp_path):
+    reg = _load(tmp_path, _BASE)
+    assert registry._labels(reg, "en") == {"FX": "FX rate", "Gold": "Gold", "CPI": "CPI", "Gap": "Gap"}
+    assert registry._labels(reg, "zh")["FX"] == "汇率"
+
+def test_add_derived_evaluates_expressions(tmp_path):
+    reg = _load(tmp_path, _BASE)
+    df = pd.DataFrame({"FX": [7.0, 7.1], "CPI": [1.0, 2.0]})
+    assert registry._add_derived(reg, df.copy())["Gap"].tolist() == [6.0, 5.1]
+    assert "Gap" not in registry._add_derived(reg, df.copy(), ["FX"]).columns
+
+@pytest.mark.parametrize("broken, message", [
+    ('[[series]]\nids = ["X"]\n', "without name"),
+    ('[[series]]\nname = "X"\nsource = "yahoo"\nids = ["X"]\n', "unknown source"),
+    ('[[series]]\nname = "X"\n', "no ids or queries"),
+    ('[[series]]\nname = "X"\nsource = "tushare"\nids = ["A", "B"]\napis = ["daily"]\n', "differ in length"),
+    ('[[series]]\nname = "FX"\nids = ["X"]\n', "duplicate series"),
+])
+def test_invalid_entries_are_rejected(tmp_path, broken, message):
+    with pytest.raises(RuntimeError, match=message):
+        _load(tmp_path, _BASE + "\n" + broken)
+
+def test_target_must_be_a_series(tmp_path):
+    with pytest.raises(RuntimeError, match="target"):
+        _load(tmp_path, _BASE.replace('target = "FX"', 'target = "Nope"'))
+
+def test_shipped_registry_loads():
+    reg = registry._load_registry(registry._DEFAULT_PATH)
+    assert reg["target"] == "USD_CNY_Rate"
+    assert set(reg["kpi_fields"]) <= set(registry._by_name(reg))
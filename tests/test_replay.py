@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src import providers, replay
+
+class _LiveFred:
+    def get_series(self, series_id, observation_start=None, observation_end=None, **kwargs):
+        days = pd.bdate_range(observation_start, observation_end)
+        values = 7.0 + np.arange(len(days)) / 3.0
+        values[::5] = np.nan
+        return pd.Series(values, index=days, name=series_id)
+
+    def search(self, text, **kwargs):
+        return pd.DataFrame({"id": ["GOLDAMGBD228NLBM"]}) if "gold" in text else None
+
+class _LivePro:
+    def index_daily(self, ts_code=None, start_date=None, end_date=None, **kwargs):
+        days = pd.bdate_range(start_date, end_date)[::-1]
+        return pd.DataFrame({"ts_code": ts_code, "trade_date": days.strftime("%Y%m%d"), "close": 400.0 + np.arange(len(days)) * 0.123456789})
+
+@pytest.fixture(autouse=True)
+def _clients(monkeypatch):
+    monkeypatch.setattr(providers, "_new_fred", _LiveFred)
+    monkeypatch.setattr(providers, "_new_pro", _LivePro)
+    providers._reset()
+    yield
+    providers._reset()
+
+def _fetch(start: str, end: str) -> tuple:
+    fred, pro = providers._get("fred"), providers._get("tushare")
+    s = fred.get_series("DEXCHUS", observation_start=start, observation_end=end)
+    search = fred.search("gold fixing price")
+    ts = pro.index_daily(ts_code="AU9999.SGE", start_date=start.replace("-", ""), end_date=end.replace("-", ""))
+    return s, search, ts
+
+def test_recorded_responses_replay_identically(tmp_path):
+    root = str(tmp_path / "fixtures")
+    replay._install("record", root)
+    live = _fetch("2023-01-02", "2023-03-31")
+    replay._install("replay", root)
+    assert isinstance(providers._get("fred"), replay._FakeFred)
+    s, search, ts = _fetch("2023-01-02", "2023-03-31")
+    pd.testing.assert_series_equal(s, live[0], check_names=False, check_freq=False, check_index_type=False)
+    assert search["id"].tolist() == ["GOLDAMGBD228NLBM"]
+    pd.testing.assert_frame_equal(ts, live[2])
+    assert providers._get("fred").search("unknown query") is None
+
+def test_recording_merges_overlapping_windows(tmp_path):
+    root = str(tmp_path / "fixtures")
+    replay._install("record", root)
+    _fetch("2023-01-02", "2023-02-28")
+    _fetch("2023-02-01", "2023-04-28")
+    replay._install("replay", root)
+    s, _, ts = _fetch("2023-01-02", "2023-04-28")
+    assert s.index[0] == pd.Timestamp("2023-01-02") and s.index[-1] == pd.Timestamp("2023-04-28")
+    assert s.index.is_unique and len(ts) == len(s)
+    assert ts["trade_date"].iloc[0] == "20230428"
+
+def test_replay_missing_fixtures(tmp_path):
+    with pytest.raises(RuntimeError, match="fixtures not found"):
+        replay._install("replay", str(tmp_path / "absent"))
+    replay._install("replay", str(tmp_path))
+    with pytest.raises(ValueError, match="does not exist"):
+        providers._get("fred").get_series("NOPE")
+    assert providers._get("tushare").daily(ts_code="X", start_date="20230101", end_date="20230131").empty
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src import scenario
+
+@pytest.mark.parametrize("index, expected", [
+    (pd.bdate_range("2015-01-01", "2024-12-31"), 65),
+    (pd.date_range("2015-01-31", "2024-12-31", freq="ME"), 3),
+    (pd.date_range("2015-01-02", "2024-12-27", freq="W-FRI"), 13),
+])
+def test_quarter_horizon_follows_observed_frequency(index, expected):
+    assert scenario._horizon(index, 0.25) == expected
+
+def test_zero_shock_paths_match_calibrated_drift():
+    rng = np.random.default_rng(0)
+    idx = pd.bdate_range("2015-01-01", periods=2000)
+    df = pd.DataFrame({"fx": 7 * np.exp(np.cumsum(rng.normal(2e-4, 3e-3, len(idx)))), "f": rng.normal(0, 1, len(idx)).cumsum()}, index=idx)
+    cal = scenario._calibrate(df, "fx", ["f"])
+    h = scenario._horizon(df.index, 0.25)
+    levels = scenario._simulate(cal, None, h, 20000, seed=1)
+    assert levels.shape == (20000, h)
+    ret = np.log(levels[:, -1] / cal["last_value"])
+    assert ret.std() == pytest.approx(cal["sigma"] * np.sqrt(h), rel=0.1)
@@ -0,0 +1,92 @@
+import types
+import urllib.error
+import pytest
+from src import scheduler
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, s):
+        self.sleeps.append(s)
+        self.now += s
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = _Clock()
+    monkeypatch.setattr(scheduler, "time", types.SimpleNamespace(monotonic=c.monotonic, sleep=c.sleep))
+    monkeypatch.setattr(scheduler.random, "uniform", lambda a, b: 1.0)
+    monkeypatch.setattr(scheduler, "_PROVIDERS", {})
+    return c
+
+def test_bucket_allows_burst_then_throttles(clock):
+    bucket = scheduler._TokenBucket(rate_per_min=60, burst=3)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(1.0)
+    clock.now += 10
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(1.0)
+
+def test_call_records_throttle_waits(clock):
+    scheduler._configure("fred", rate_per_min=30, burst=1)
+    for _ in range(3):
+        scheduler._call("fred", lambda: None)
+    stats = scheduler._stats()["fred"]
+    assert stats["requests"] == 3 and stats["throttle_waits"] == 2
+    assert stats["throttle_wait_s"] == pytest.approx(4.0)
+
+def test_call_retries_with_exponential_backoff(clock):
+    scheduler._configure("fred", rate_per_min=1e6, burst=100)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 4:
+            raise urllib.error.HTTPError("u", 503, "Service Unavailable", None, None)
+        return "ok"
+
+    assert scheduler._call("fred", flaky) == "ok"
+    assert clock.sleeps == [1.0, 2.0, 4.0]
+    stats = scheduler._stats()["fred"]
+    assert stats["requests"] == 4 and stats["retries"] == 3 and stats["failures"] == 0
+
+def test_call_gives_up_after_max_retries(clock, monkeypatch):
+    monkeypatch.setitem(scheduler._RETRY, "max_retries", 2)
+    scheduler._configure("tushare", rate_per_min=1e6, burst=100)
+
+    def limited():
+        raise RuntimeError("抱歉，您每分钟最多访问该接口200次")
+
+    with pytest.raises(RuntimeError):
+        scheduler._call("tushare", limited)
+    stats = scheduler._stats()["tushare"]
+    assert stats["requests"] == 3 and stats["retries"] == 2 and stats["failures"] == 1
+
+def test_non_retryable_errors_fail_immediately(clock):
+    scheduler._configure("fred", rate_per_min=1e6, burst=100)
+
+    def bad():
+        raise urllib.error.HTTPError("u", 400, "Bad Request", None, None)
+
+    with pytest.raises(urllib.error.HTTPError):
+        scheduler._call("fred", bad)
+    assert clock.sleeps == []
+    assert scheduler._stats()["fred"]["failures"] == 1
+
+@pytest.mark.parametrize("kwargs", [
+    {"rate_per_min": 0},
+    {"rate_per_min": -5},
+    {"rate_per_min": float("nan")},
+    {"rate_per_min": "60"},
+    {"burst": 0},
+    {"max_concurrent": 0},
+    {"burst": 2.5},
+])
+def test_configure_rejects_invalid_limits(clock, kwargs):
+    with pytest.raises(ValueError):
+        scheduler._configure("fred", **kwargs)
+    assert "fred" not in scheduler._PROVIDERS
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src import moments, sketch
+
+def test_small_inputs_are_kept_exact():
+    x = np.array([3.0, np.nan, 1.0, 2.0, 5.0])
+    m, w = sketch._from_values(x, 200)
+    np.testing.assert_array_equal(m, [1.0, 2.0, 3.0, 5.0])
+    np.testing.assert_array_equal(w, np.ones(4))
+    est = sketch._quantile(m, w, [0.0, 0.25, 0.5, 0.75, 1.0], 1.0, 5.0)
+    np.testing.assert_allclose(est, np.quantile([1.0, 2.0, 3.0, 5.0], [0.0, 0.25, 0.5, 0.75, 1.0]))
+
+def test_merge_keeps_total_weight_and_bounds_size():
+    rng = np.random.default_rng(0)
+    parts = [sketch._from_values(rng.normal(i, 1, 5000), 100) for i in range(20)]
+    m, w = sketch._merge(parts, 100)
+    assert w.sum() == 100_000
+    assert len(m) <= 200
+    assert np.all(np.diff(m) >= 0)
+
+def test_empty_sketch_gives_nan():
+    m, w = sketch._merge([sketch._from_values(np.array([np.nan]), 100)], 100)
+    assert np.isnan(sketch._quantile(m, w, [0.5])).all()
+
+@pytest.mark.parametrize("method, rows", [("auto", 10), ("exact", 100_000), ("tdigest", 10)])
+def test_config_picks_exact_or_sketch(method, rows):
+    cfg = sketch._config({"quantiles": {"method": method, "exact_rows": 1000}})
+    assert sketch._use_exact(cfg, rows) == (method != "tdigest")
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(RuntimeError):
+        sketch._config({"quantiles": {"method": "gk"}})
+
+def test_sketched_describe_quartiles_within_rank_error(tmp_path):
+    rng = np.random.default_rng(1)
+    idx = pd.bdate_range("1990-01-01", periods=20_000)
+    df = pd.DataFrame({"a": rng.lognormal(0, 1, len(idx)), "b": rng.standard_t(3, len(idx))}, index=idx)
+    state = moments._update(df, str(tmp_path / "moments.npz"), quantiles={"method": "tdigest", "compression": 200})
+    got = moments._describe(state)
+    exact = df.describe()
+    pd.testing.assert_frame_equal(got.loc[["count", "mean", "std", "min", "max"]], exact.loc[["count", "mean", "std", "min", "max"]], rtol=1e-9)
+    for col in df.columns:
+        s = np.sort(df[col].to_numpy())
+        for row, q in (("25%", 0.25), ("50%", 0.5), ("75%", 0.75)):
+            assert abs(np.searchsorted(s, got.loc[row, col]) / len(s) - q) < 0.005
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src import etl_script, storage
+
+def _frame(n: int = 800, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2021-03-01", periods=n, name="Date")
+    df = pd.DataFrame({"USD_CNY_Rate": 6.5 + rng.normal(0, 0.1, n).cumsum() / 10, "US_CPI": rng.normal(300, 5, n)}, index=idx)
+    df.iloc[::17, 1] = np.nan
+    return df
+
+def _same(a: pd.DataFrame, b: pd.DataFrame):
+    pd.testing.assert_frame_equal(a, b, check_freq=False, check_index_type=False)
+
+@pytest.mark.parametrize("ext", [".csv", ".parquet", ".feather"])
+def test_single_file_round_trip_is_exact(tmp_path, ext):
+    df = _frame()
+    path = str(tmp_path / ("master" + ext))
+    etl_script._save(df, path)
+    _same(storage._load(path, exact=True), df)
+    _same(storage._load(path, columns=["US_CPI"], start="2022-01-01", end="2022-03-31", exact=True), df.loc["2022-01-01":"2022-03-31", ["US_CPI"]])
+
+@pytest.mark.parametrize("ext", [".parquet", ".feather"])
+def test_export_csv_from_columnar(tmp_path, ext):
+    df = _frame()
+    src = str(tmp_path / ("master" + ext))
+    etl_script._save(df, src)
+    etl_script._export_csv(src, str(tmp_path / "master.csv"))
+    _same(storage._load(str(tmp_path / "master.csv"), exact=True), df)
+
+@pytest.mark.parametrize("path, fmt", [("a.parquet", "parquet"), ("a.FEATHER", "feather"), ("a.arrow", "feather"), ("a.csv", "csv"), ("a", "csv")])
+def test_format_from_extension(path, fmt):
+    assert storage._data_format(path) == fmt
+
+@pytest.mark.parametrize("partition, count", [("year", 4), ("month", 37)])
+def test_partitioned_save_writes_manifest(tmp_path, partition, count):
+    df = _frame()
+    path = str(tmp_path / "master.parquet")
+    storage._save(df, path, partition)
+    manifest = storage._manifest(path)
+    assert storage._is_partitioned(path) and storage._layout(path) == partition
+    assert manifest["format"] == "parquet" and manifest["columns"] == list(df.columns)
+    assert len(manifest["partitions"]) == count
+    assert sum(p["rows"] for p in manifest["partitions"]) == len(df)
+    assert manifest["partitions"][0]["start"] == "2021-03-01"
+    assert storage._bounds(path) == (df.index[0], df.index[-1])
+    _same(storage._load(path, exact=True), df)
+
+def test_range_load_reads_only_overlapping_partitions(tmp_path, monkeypatch):
+    df = _frame()
+    path = str(tmp_path / "master.feather")
+    storage._save(df, path, "month")
+    read = []
+    real = storage._read_frame
+    monkeypatch.setattr(storage, "_read_frame", lambda src, *a: read.append(src.rsplit("/", 1)[-1]) or real(src, *a))
+    out = storage._load(path, columns=["USD_CNY_Rate"], start="2022-01-15", end="2022-03-10", exact=True)
+    assert read == ["2022-01.feather", "2022-02.feather", "2022-03.feather"]
+    _same(out, df.loc["2022-01-15":"2022-03-10", ["USD_CNY_Rate"]])
+    read.clear()
+    assert storage._load(path, start="2030-01-01").empty and read == []
+
+def test_save_partitions_rewrites_only_requested_keys(tmp_path):
+    df = _frame()
+    path = str(tmp_path / "master.csv")
+    storage._save(df, path, "year")
+    before = {p["key"]: p for p in storage._manifest(path)["partitions"]}
+    changed = df.copy()
+    changed.loc["2022", "USD_CNY_Rate"] += 1.0
+    changed.loc["2021", "USD_CNY_Rate"] += 1.0
+    storage._save_partitions(changed, path, "year", keys={"2022"})
+    _same(storage._load(path, exact=True), pd.concat([df.loc[:"2021"], changed.loc["2022"], df.loc["2023":]]))
+    after = {p["key"]: p for p in storage._manifest(path)["partitions"]}
+    assert after["2021"] == before["2021"] and after["2023"] == before["2023"]
+
+def test_save_partitions_drops_stale_files(tmp_path):
+    df = _frame()
+    path = str(tmp_path / "master.parquet")
+    storage._save(df, path, "year")
+    storage._save(df.loc["2022":], path)
+    assert [p["key"] for p in storage._manifest(path)["partitions"]] == ["2022", "2023", "2024"]
+    assert not (tmp_path / "master.parquet" / "2021.parquet").exists()
+    assert storage._bounds(path)[0] == pd.Timestamp("2022-01-03")